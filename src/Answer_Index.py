@@ -0,0 +1,392 @@
+"""This file builds an index of answers so a user's answer can be checked without scanning every capital.
+
+Answers are normalized (case, accents, whitespace, punctuation and abbreviations such as "St." for "Saint") and
+stored in a hash map, so "nashville " and "Saint Paul" match exactly. Answers that are still not found are looked up
+in a deletion-variant index, which finds every answer within a small edit distance without comparing against the
+whole list, so lookups stay fast as the list of answers grows.
+
+Exports:
+    AnswerIndex: a class that maps answers back to their keys and checks a user's answer
+    AnswerMatch: a class that describes how an answer was checked
+    normalize_answer: turns an answer into the form stored in the index
+    calculate_edit_distance: the Levenshtein distance between two strings
+    calculate_bounded_edit_distance: the Levenshtein distance between two strings, given up on once it is too large
+
+Use Cases:
+    answer_index = AnswerIndex({"Tennessee": "Nashville", "Minnesota": "St. Paul"})
+    answer_index.check("Minnesota", "saint paul").accepted == True
+    answer_index.check("Tennessee", "Nashvile").accepted == True
+    answer_index.check("Tennessee", "St Paul").matched_keys == ("Minnesota",)
+    answer_index.updated({"Tennessee": "Memphis"}).check("Tennessee", "memphis").accepted == True
+"""
+
+import re
+import unicodedata
+
+#answers within this many single-character edits of the correct answer are accepted
+DEFAULT_MAXIMUM_EDIT_DISTANCE = 1
+
+#shorter answers must be spelled exactly, since one edit changes too much of them
+MINIMUM_LENGTH_FOR_TYPOS = 4
+
+#abbreviations that are written out so both spellings normalize to the same words
+WORD_ALIASES = {
+    "st": "saint",
+    "ste": "sainte",
+    "ft": "fort",
+    "mt": "mount",
+}
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+_SEPARATOR_PATTERN = re.compile(r"[-_/]")
+
+
+def normalize_answer(answer: str) -> str:
+    """turns an answer into the form stored in the index
+
+    Arguments:
+        answer: the answer as it was written
+
+    Returns:
+        the answer in lowercase, without accents or punctuation, with single spaces and with abbreviations written out
+    """
+    decomposed_answer = unicodedata.normalize("NFKD", answer)
+    answer_without_accents = "".join(character for character in decomposed_answer if not unicodedata.combining(character))
+    answer_with_spaces = _SEPARATOR_PATTERN.sub(" ", answer_without_accents.casefold())
+    words = _PUNCTUATION_PATTERN.sub("", answer_with_spaces).split()
+    return " ".join(WORD_ALIASES.get(word, word) for word in words)
+
+
+def calculate_edit_distance(first: str, second: str) -> int:
+    """returns the Levenshtein distance (insertions, deletions and substitutions) between two strings
+
+    Arguments:
+        first: one string
+        second: the other string
+    """
+    if len(first) < len(second):
+        first, second = second, first
+
+    previous_row = list(range(len(second) + 1))
+    for first_position, first_character in enumerate(first, 1):
+        current_row = [first_position]
+        for second_position, second_character in enumerate(second, 1):
+            current_row.append(min(
+                previous_row[second_position] + 1,
+                current_row[second_position - 1] + 1,
+                previous_row[second_position - 1] + (first_character != second_character),
+            ))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def calculate_bounded_edit_distance(first: str, second: str, maximum_distance: int) -> int:
+    """returns the Levenshtein distance between two strings if it is at most maximum_distance, otherwise maximum_distance + 1
+
+    It stops as soon as the distance is known to be too large. A single edit takes one scan past the common prefix
+    and one slice comparison. Larger distances fill only the 2 * maximum_distance + 1 diagonals a close enough
+    match can pass through, and stop at the first row that has no cell within the distance.
+
+    Arguments:
+        first: one string
+        second: the other string
+        maximum_distance: the largest distance worth knowing exactly
+    """
+    if len(first) < len(second):
+        first, second = second, first
+    too_far = maximum_distance + 1
+    if len(first) - len(second) > maximum_distance:
+        return too_far
+    if first == second:
+        return 0
+    if maximum_distance <= 0:
+        return too_far
+
+    if maximum_distance == 1:
+        #after the common prefix, what is left must differ by one substituted character or one extra character in first
+        position = 0
+        while position < len(second) and first[position] == second[position]:
+            position += 1
+        rest_of_second = second[position + 1:] if len(first) == len(second) else second[position:]
+        return 1 if first[position + 1:] == rest_of_second else too_far
+
+    #cells off the band are never within the distance, so they stay too_far
+    previous_row = [column if column <= maximum_distance else too_far for column in range(len(second) + 1)]
+    for row, first_character in enumerate(first, 1):
+        current_row = [too_far] * (len(second) + 1)
+        if row <= maximum_distance:
+            current_row[0] = row
+        lowest_column = max(1, row - maximum_distance)
+        highest_column = min(len(second), row + maximum_distance)
+        for column in range(lowest_column, highest_column + 1):
+            distance = previous_row[column - 1] + (first_character != second[column - 1])
+            if previous_row[column] + 1 < distance:
+                distance = previous_row[column] + 1
+            if current_row[column - 1] + 1 < distance:
+                distance = current_row[column - 1] + 1
+            current_row[column] = distance if distance < too_far else too_far
+        if min(current_row[lowest_column - 1:highest_column + 1]) > maximum_distance:
+            return too_far
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def _create_deletion_variants(word: str, maximum_deletions: int) -> set[str]:
+    """returns every string made by deleting up to maximum_deletions characters from a word, including the word itself
+
+    Arguments:
+        word: the word to delete characters from
+        maximum_deletions: the most characters to delete
+    """
+    variants = {word}
+    newest_variants = {word}
+    for _ in range(maximum_deletions):
+        newest_variants = {variant[:position] + variant[position + 1:] for variant in newest_variants for position in range(len(variant))}
+        variants |= newest_variants
+    return variants
+
+
+class _DeletionIndex:
+    """This class finds every stored word within an edit distance of a query with hash lookups instead of comparisons.
+
+    Two words within k edits of each other always share a string made by deleting at most k characters from each,
+    so every deletion variant of every word is stored and a query only looks up its own variants (about one per
+    character for k = 1) before confirming the few candidates with calculate_bounded_edit_distance.
+
+    An updated index shares the variants of the index it came from and keeps only the variants it changed in a small
+    overlay, since copying every variant (about a dozen per word) would cost more than the change itself. The overlay
+    is folded into a new dictionary once it grows past a fraction of the shared one, so lookups stay two hash lookups.
+    """
+    #how large the overlay may grow, as a fraction of the shared variants, before the two are folded together
+    MAXIMUM_OVERLAY_FRACTION = 0.125
+
+    def __init__(self, words, maximum_distance: int):
+        "initializes the _DeletionIndex class"
+        self.maximum_distance = maximum_distance
+        self._words_by_variant = {}
+        self._changed_words_by_variant = {}
+        for word in words:
+            for variant in _create_deletion_variants(word, maximum_distance):
+                self._words_by_variant.setdefault(variant, []).append(word)
+
+    def _get_words(self, variant: str):
+        """returns the words stored under a variant, looking at the overlay first"""
+        words = self._changed_words_by_variant.get(variant)
+        return words if words is not None else self._words_by_variant.get(variant, ())
+
+    def search(self, query: str, maximum_distance: int) -> list[tuple[int, str]]:
+        """returns (distance, word) for every stored word within maximum_distance of the query, closest first
+
+        maximum_distance cannot be larger than the distance the index was built for.
+        """
+        maximum_distance = min(maximum_distance, self.maximum_distance)
+        #the overlay is checked inline (and only if there is one), since this loop runs for every misspelled answer
+        candidates = set()
+        words_by_variant = self._words_by_variant
+        changed_words_by_variant = self._changed_words_by_variant
+        for variant in _create_deletion_variants(query, maximum_distance):
+            words = changed_words_by_variant.get(variant) if changed_words_by_variant else None
+            candidates.update(words if words is not None else words_by_variant.get(variant, ()))
+
+        matches = []
+        for candidate in candidates:
+            distance = calculate_bounded_edit_distance(query, candidate, maximum_distance)
+            if distance <= maximum_distance:
+                matches.append((distance, candidate))
+        matches.sort()
+        return matches
+
+    def updated(self, removed_words, added_words) -> "_DeletionIndex":
+        """returns a copy with some words removed and others added, leaving this index untouched
+
+        Only the variants of those words are touched, and they go into the copy's overlay (an empty tuple marks a
+        variant that no word has anymore), so the cost grows with the number of changed words.
+        """
+        deletion_index = _DeletionIndex.__new__(_DeletionIndex)
+        deletion_index.maximum_distance = self.maximum_distance
+        deletion_index._words_by_variant = self._words_by_variant
+        deletion_index._changed_words_by_variant = changed_words_by_variant = dict(self._changed_words_by_variant)
+        for word in removed_words:
+            for variant in _create_deletion_variants(word, self.maximum_distance):
+                changed_words_by_variant[variant] = tuple(other_word for other_word in deletion_index._get_words(variant) if other_word != word)
+        for word in added_words:
+            for variant in _create_deletion_variants(word, self.maximum_distance):
+                changed_words_by_variant[variant] = (*deletion_index._get_words(variant), word)
+
+        if len(changed_words_by_variant) > self.MAXIMUM_OVERLAY_FRACTION * len(deletion_index._words_by_variant):
+            words_by_variant = dict(deletion_index._words_by_variant)
+            for variant, words in changed_words_by_variant.items():
+                if words:
+                    words_by_variant[variant] = words
+                else:
+                    words_by_variant.pop(variant, None)
+            deletion_index._words_by_variant = words_by_variant
+            deletion_index._changed_words_by_variant = {}
+        return deletion_index
+
+
+class AnswerMatch:
+    """This class describes how an answer was checked.
+
+    Attributes:
+        accepted: if the answer counts as the correct answer for the key
+        matched_answer: the answer from the index that the user's answer matched, or None
+        matched_keys: every key whose answer was matched (for example the state whose capital was given), in index order
+        edit_distance: how many edits were needed to match (0 for a match after normalization), or None if nothing matched
+    """
+    def __init__(self, accepted: bool, matched_answer: str | None, matched_keys: tuple[str, ...], edit_distance: int | None):
+        "initializes the AnswerMatch class"
+        self.accepted = accepted
+        self.matched_answer = matched_answer
+        self.matched_keys = matched_keys
+        self.edit_distance = edit_distance
+
+
+class AnswerIndex:
+    """This class maps answers back to their keys (such as capitals back to states) and checks a user's answer.
+
+    Attributes:
+        maximum_edit_distance: how many single-character edits a misspelled answer may have and still match
+        dictionary_of_answers: a dict that maps each key to its answer
+    """
+    def __init__(self, dictionary_of_answers: dict[str, str], maximum_edit_distance: int = DEFAULT_MAXIMUM_EDIT_DISTANCE):
+        """builds the index
+
+        Arguments:
+            dictionary_of_answers: a dict that maps each key to its answer, such as each state to its capital
+            maximum_edit_distance: how many single-character edits a misspelled answer may have and still match
+        """
+        self.maximum_edit_distance = maximum_edit_distance
+        self.dictionary_of_answers = dictionary_of_answers
+
+        #normalized answer -> the answer as written and every key that has it (place names repeat in larger datasets)
+        #answer as written -> normalized answer, so a correctly written answer skips normalization
+        self._normalized_answer_by_written_answer = {}
+        self._normalized_answers = {}
+        self._keys_by_normalized_answer = {}
+        self._normalized_answer_by_key = {}
+        for key, answer in dictionary_of_answers.items():
+            normalized_answer = normalize_answer(answer)
+            self._normalized_answer_by_written_answer[answer] = normalized_answer
+            self._normalized_answers.setdefault(normalized_answer, answer)
+            self._keys_by_normalized_answer.setdefault(normalized_answer, []).append(key)
+            self._normalized_answer_by_key[key] = normalized_answer
+
+        self._keys_by_normalized_answer = {normalized_answer: tuple(keys) for normalized_answer, keys in self._keys_by_normalized_answer.items()}
+        self._typo_index = _DeletionIndex(self._normalized_answers, maximum_edit_distance) if maximum_edit_distance > 0 else None
+
+    def __len__(self) -> int:
+        return len(self._normalized_answer_by_key)
+
+    def updated(self, changed_answers: dict[str, str], removed_keys = ()) -> "AnswerIndex":
+        """returns a copy of the index with some answers changed, added or removed, leaving this index untouched
+
+        The dictionaries are copied as they are and only the changed answers are normalized and indexed again, so the
+        cost grows with the number of changes rather than the number of answers. Indexes in use are never edited.
+
+        Arguments:
+            changed_answers: a dict that maps each new or changed key to its answer
+            removed_keys: the keys to take out of the index
+        """
+        answer_index = AnswerIndex.__new__(AnswerIndex)
+        answer_index.maximum_edit_distance = self.maximum_edit_distance
+        answer_index.dictionary_of_answers = dict(self.dictionary_of_answers)
+        answer_index._normalized_answer_by_written_answer = dict(self._normalized_answer_by_written_answer)
+        answer_index._normalized_answers = dict(self._normalized_answers)
+        answer_index._keys_by_normalized_answer = dict(self._keys_by_normalized_answer)
+        answer_index._normalized_answer_by_key = dict(self._normalized_answer_by_key)
+
+        #normalized answers that stop or start being in the index, for the typo index
+        removed_normalized_answers = set()
+        added_normalized_answers = set()
+        for key in [*removed_keys, *changed_answers]:
+            if key in answer_index._normalized_answer_by_key:
+                removed_normalized_answers.add(answer_index._remove_key(key))
+        for key, answer in changed_answers.items():
+            added_normalized_answers.add(answer_index._add_key(key, answer))
+        for key in removed_keys:
+            answer_index.dictionary_of_answers.pop(key, None)
+
+        #an answer that was taken out and put back (such as a state whose capital moved to another state) keeps its variants
+        still_removed = {normalized_answer for normalized_answer in removed_normalized_answers if normalized_answer not in answer_index._keys_by_normalized_answer}
+        newly_added = {normalized_answer for normalized_answer in added_normalized_answers if normalized_answer not in self._keys_by_normalized_answer}
+        answer_index._typo_index = self._typo_index.updated(still_removed, newly_added) if self._typo_index is not None else None
+        return answer_index
+
+    def _remove_key(self, key: str) -> str:
+        """takes a key out of the lookup dictionaries (but not out of dictionary_of_answers) and returns its normalized answer"""
+        normalized_answer = self._normalized_answer_by_key.pop(key)
+        answer = self.dictionary_of_answers[key]
+        remaining_keys = tuple(other_key for other_key in self._keys_by_normalized_answer[normalized_answer] if other_key != key)
+        if remaining_keys:
+            self._keys_by_normalized_answer[normalized_answer] = remaining_keys
+            #the answer as written is the first remaining key's, as if the index had been built without this key
+            self._normalized_answers[normalized_answer] = self.dictionary_of_answers[remaining_keys[0]]
+        else:
+            del self._keys_by_normalized_answer[normalized_answer]
+            del self._normalized_answers[normalized_answer]
+        if not any(self.dictionary_of_answers[other_key] == answer for other_key in remaining_keys):
+            self._normalized_answer_by_written_answer.pop(answer, None)
+        return normalized_answer
+
+    def _add_key(self, key: str, answer: str) -> str:
+        """puts a key and its answer into the lookup dictionaries and returns its normalized answer"""
+        normalized_answer = normalize_answer(answer)
+        self.dictionary_of_answers[key] = answer
+        self._normalized_answer_by_written_answer[answer] = normalized_answer
+        self._normalized_answers.setdefault(normalized_answer, answer)
+        self._keys_by_normalized_answer[normalized_answer] = self._keys_by_normalized_answer.get(normalized_answer, ()) + (key,)
+        self._normalized_answer_by_key[key] = normalized_answer
+        return normalized_answer
+
+    def find(self, user_answer: str, maximum_edit_distance: int | None = None) -> AnswerMatch:
+        """finds the answer in the index that the user's answer matches, without knowing what the correct answer is
+
+        Arguments:
+            user_answer: the user's answer
+            maximum_edit_distance: lowers the index's maximum edit distance for this lookup
+        """
+        return self._match(self._normalize_query(user_answer), None, maximum_edit_distance)
+
+    def check(self, key: str, user_answer: str, maximum_edit_distance: int | None = None) -> AnswerMatch:
+        """checks the user's answer for a key, such as a user's capital for a state
+
+        Arguments:
+            key: the key the question is about
+            user_answer: the user's answer
+            maximum_edit_distance: lowers the index's maximum edit distance for this lookup
+
+        Returns:
+            an AnswerMatch that is accepted if the answer matches the key's own answer; otherwise it names what it matched
+        """
+        return self._match(self._normalize_query(user_answer), self._normalized_answer_by_key[key], maximum_edit_distance)
+
+    def _normalize_query(self, user_answer: str) -> str:
+        """normalizes a user's answer, skipping the work for answers written exactly as in the index or already normalized"""
+        normalized_answer = self._normalized_answer_by_written_answer.get(user_answer)
+        if normalized_answer is not None:
+            return normalized_answer
+        return user_answer if user_answer in self._keys_by_normalized_answer else normalize_answer(user_answer)
+
+    def _match(self, normalized_user_answer: str, normalized_correct_answer: str | None, maximum_edit_distance: int | None) -> AnswerMatch:
+        """matches a normalized answer exactly and then within the edit distance, preferring the correct answer on ties"""
+        #the common case: a hash lookup after normalization
+        if normalized_user_answer == normalized_correct_answer or normalized_user_answer in self._keys_by_normalized_answer:
+            return AnswerMatch(normalized_user_answer == normalized_correct_answer, self._normalized_answers[normalized_user_answer],
+                self._keys_by_normalized_answer[normalized_user_answer], 0)
+
+        if maximum_edit_distance is None:
+            maximum_edit_distance = self.maximum_edit_distance
+        if maximum_edit_distance <= 0 or self._typo_index is None or len(normalized_user_answer) < MINIMUM_LENGTH_FOR_TYPOS:
+            return AnswerMatch(False, None, (), None)
+
+        #misspellings: only the few answers that share a deletion variant with the user's answer are compared
+        matches = self._typo_index.search(normalized_user_answer, maximum_edit_distance)
+        if not matches:
+            return AnswerMatch(False, None, (), None)
+
+        closest_distance = matches[0][0]
+        closest_answers = [answer for distance, answer in matches if distance == closest_distance]
+        matched_normalized_answer = normalized_correct_answer if normalized_correct_answer in closest_answers else closest_answers[0]
+        return AnswerMatch(matched_normalized_answer == normalized_correct_answer, self._normalized_answers[matched_normalized_answer],
+            self._keys_by_normalized_answer[matched_normalized_answer], closest_distance)
@@ -0,0 +1,301 @@
+"""This file grades completed answer sheets in bulk, spreading the sheets across every core.
+
+Every sheet is graded by a Quiz_Session.QuizSession that asks exactly the sheet's questions in the sheet's order,
+so scores, points and feedback (including "... is actually the capital of X") match the GUI exactly.
+Sheets are streamed: they are read, graded and written in chunks, so memory stays flat however many sheets there are.
+
+Answer sheet formats:
+    .jsonl: one sheet per line, such as
+        {"sheet_id": "7", "answers": {"Tennessee": "Nashville", "Ohio": "Cleveland"}}
+        ("answers" may also be a list of [state, answer] pairs)
+    .csv: one answered question per row with the headers sheet_id, state and answer; a sheet's rows must be together
+
+Output:
+    --output: one JSON line per sheet with its totals and a breakdown of every question (or the reason it was rejected)
+    --scores: optionally, a .csv file with one row of totals per sheet
+
+Usage (from the repository root):
+    python src/Batch_Grader.py SHEETS.jsonl --output GRADED.jsonl [--scores SCORES.csv] [--workers N] [--ranks cached|backup]
+    python src/Batch_Grader.py --synthetic 100000 --output GRADED.jsonl
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import Dataset_Loader
+import Population_Rank_Web_Scraper
+import Questions
+import Quiz_Session
+import States_and_State_Capitals_Reader
+
+#how many sheets each task sent to a worker holds; large enough that sending them costs little next to grading them
+DEFAULT_CHUNK_SIZE = 500
+
+#how many chunks per worker may be waiting at once, which bounds memory while keeping every worker busy
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+SCORE_COLUMNS = ("sheet_id", "number_correct", "number_of_questions", "points_earned", "maximum_points", "error")
+
+#the questions of the bank in this process, by state (filled in by initialize_grader)
+_questions_by_state = {}
+
+
+class FixedOrderScheduler:
+    """This class makes a QuizSession ask given questions in a given order, the way a filled-in sheet already did.
+
+    Attributes:
+        list_of_questions: the questions to ask, in order
+    """
+    def __init__(self, list_of_questions: list[Questions.Question]):
+        "initializes the FixedOrderScheduler class"
+        self.list_of_questions = list_of_questions
+
+    def select_questions(self, number_of_questions: int, list_of_questions: list, random_generator = None) -> list:
+        """returns the sheet's questions, ignoring the bank it is offered"""
+        return self.list_of_questions
+
+    def record_answer(self, question, correct: bool):
+        """ignores the answer, since the order is already fixed"""
+
+
+def initialize_grader(dictionary_of_population_ranks: dict[str, int]):
+    """builds the question bank this process grades with; every worker runs this once when it starts
+
+    Arguments:
+        dictionary_of_population_ranks: the ranks the sheets' questions were worth points by
+    """
+    States_and_State_Capitals_Reader.load()
+    Questions.replace_list_of_questions(Questions.build_list_of_questions(dictionary_of_population_ranks))
+    _questions_by_state.clear()
+    _questions_by_state.update((question.state, question) for question in Questions.list_of_questions)
+
+
+def grade_sheet(sheet_id: str, answers: list[tuple[str, str]]) -> dict:
+    """grades one sheet the way the GUI would have graded it
+
+    Arguments:
+        sheet_id: the sheet's identifier
+        answers: (state, answer) pairs in the order the questions were asked
+
+    Returns:
+        the sheet's totals and a breakdown of every question, or the reason the sheet could not be graded
+    """
+    states = [state for state, _ in answers]
+    unknown_states = [state for state in states if state not in _questions_by_state]
+    if not answers:
+        return _create_rejection(sheet_id, "The sheet has no answers.")
+    if unknown_states:
+        return _create_rejection(sheet_id, f"Unknown states: {', '.join(unknown_states)}.")
+    if len(set(states)) != len(states):
+        return _create_rejection(sheet_id, "A state is asked more than once.")
+
+    list_of_questions = [_questions_by_state[state] for state in states]
+    session = Quiz_Session.QuizSession(len(list_of_questions), list_of_questions, record_answers = False, scheduler = FixedOrderScheduler(list_of_questions))
+
+    breakdown = []
+    for _, user_answer in answers:
+        session.next_question()
+        answer_result = session.submit(user_answer)
+        breakdown.append({
+            "state": answer_result.question.state,
+            "answer": user_answer,
+            "correct": answer_result.correct,
+            "points_awarded": answer_result.points_awarded,
+            "weight": answer_result.question.weight,
+            "other_state": answer_result.other_state,
+            "feedback": answer_result.create_feedback_text(),
+        })
+
+    return {"sheet_id": sheet_id, **session.summary(), "error": None, "questions": breakdown}
+
+
+def grade_sheets(sheets: list[tuple[str, list[tuple[str, str]] | None, str | None]]) -> list[dict]:
+    """grades a chunk of sheets; this is the task each worker runs
+
+    Arguments:
+        sheets: (sheet id, answers, reading error) for every sheet in the chunk
+    """
+    return [_create_rejection(sheet_id, error) if error is not None else grade_sheet(sheet_id, answers) for sheet_id, answers, error in sheets]
+
+
+def _create_rejection(sheet_id: str, error: str) -> dict:
+    """returns the output for a sheet that could not be graded"""
+    return {"sheet_id": sheet_id, "number_correct": 0, "number_of_questions": 0, "points_earned": 0, "maximum_points": 0,
+        "number_answered": 0, "error": error, "questions": []}
+
+
+def iterate_jsonl_sheets(file_name: str):
+    """yields (sheet id, answers, reading error) for every line of a .jsonl file
+
+    Arguments:
+        file_name: the path of the file
+    """
+    with open(file_name, "r", encoding = Dataset_Loader.detect_encoding(file_name)) as sheet_file:
+        for line_number, line in enumerate(sheet_file, 1):
+            if not line.strip():
+                continue
+            sheet_id = f"line {line_number}"
+            try:
+                sheet = json.loads(line)
+                sheet_id = str(sheet.get("sheet_id", sheet_id))
+                answers = sheet["answers"]
+                answers = list(answers.items()) if isinstance(answers, dict) else [(state, answer) for state, answer in answers]
+                if not all(isinstance(state, str) and isinstance(answer, str) for state, answer in answers):
+                    raise TypeError
+            except (ValueError, KeyError, TypeError, AttributeError):
+                yield sheet_id, None, "The sheet is not valid JSON with an \"answers\" object or list of [state, answer] pairs."
+                continue
+            yield sheet_id, answers, None
+
+
+def iterate_csv_sheets(file_name: str):
+    """yields (sheet id, answers, reading error) for every run of rows with the same sheet_id in a .csv file
+
+    Arguments:
+        file_name: the path of the file
+    """
+    rows = Dataset_Loader.iterate_rows((file_name,))
+    _, header = next(rows, (None, []))
+    header = [name.strip() for name in header]
+    try:
+        sheet_id_index, state_index, answer_index = (header.index(name) for name in ("sheet_id", "state", "answer"))
+    except ValueError:
+        raise ValueError(f"{file_name} needs the headers sheet_id, state and answer (its header is {header}).") from None
+
+    #rows without an answer column count as blank answers, the same as an empty entry box in the GUI
+    cells = ((row[sheet_id_index].strip(), row[state_index].strip(), row[answer_index] if len(row) > answer_index else "")
+        for _, row in rows if len(row) > max(sheet_id_index, state_index))
+    for sheet_id, sheet_rows in itertools.groupby(cells, key = lambda cell: cell[0]):
+        yield sheet_id, [(state, answer) for _, state, answer in sheet_rows], None
+
+
+def iterate_sheets(file_name: str):
+    """yields (sheet id, answers, reading error) for every sheet in a .jsonl or .csv file
+
+    Arguments:
+        file_name: the path of the file
+    """
+    if file_name.lower().endswith((".jsonl", ".ndjson", ".json")):
+        return iterate_jsonl_sheets(file_name)
+    return iterate_csv_sheets(file_name)
+
+
+def iterate_chunks(iterable, chunk_size: int):
+    """yields lists of up to chunk_size items"""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def grade_all(sheets, dictionary_of_population_ranks: dict[str, int], workers: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """yields every graded sheet in input order, grading chunks on a pool of worker processes
+
+    Arguments:
+        sheets: (sheet id, answers, reading error) for every sheet
+        dictionary_of_population_ranks: the ranks the sheets' questions were worth points by
+        workers: how many worker processes to use (1 grades in this process)
+        chunk_size: how many sheets each task holds
+    """
+    chunks = iterate_chunks(sheets, chunk_size)
+
+    if workers <= 1:
+        initialize_grader(dictionary_of_population_ranks)
+        for chunk in chunks:
+            yield from grade_sheets(chunk)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer = initialize_grader, initargs = (dictionary_of_population_ranks,)) as executor:
+        #only a few chunks are queued at a time, so a huge input is never read into memory all at once
+        pending_results = collections.deque()
+        for chunk in chunks:
+            pending_results.append(executor.submit(grade_sheets, chunk))
+            if len(pending_results) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                yield from pending_results.popleft().result()
+        while pending_results:
+            yield from pending_results.popleft().result()
+
+
+def choose_population_ranks(source: str) -> dict[str, int]:
+    """returns the ranks to grade with: the cached ones (what a launch would use now) or the backup dictionary
+
+    Arguments:
+        source: "cached" or "backup"
+    """
+    if source == "cached":
+        cached_entry = Population_Rank_Web_Scraper.load_cached_population_ranks()
+        if cached_entry is not None:
+            return cached_entry.population_ranks
+    return dict(Population_Rank_Web_Scraper.BACKUP_DICTIONARY_OF_POPULATION_RANKS)
+
+
+def write_synthetic_sheets(file_name: str, number_of_sheets: int, seed: int = 0):
+    """writes made-up .jsonl sheets mixing right answers, typos, other states' capitals and blanks, for measuring throughput
+
+    Arguments:
+        file_name: where to write them
+        number_of_sheets: how many sheets to write
+        seed: the seed for the made-up answers
+    """
+    States_and_State_Capitals_Reader.load()
+    random_generator = random.Random(seed)
+    dictionary_of_state_capitals = States_and_State_Capitals_Reader.dictionary_of_state_capitals
+    list_of_state_names = list(dictionary_of_state_capitals)
+    list_of_state_capitals = list(dictionary_of_state_capitals.values())
+
+    with open(file_name, "w", encoding = "utf-8") as sheet_file:
+        for sheet_number in range(number_of_sheets):
+            answers = {}
+            for state in random_generator.sample(list_of_state_names, random_generator.randint(1, Quiz_Session.MAXIMUM_NUMBER_OF_QUESTIONS)):
+                capital = dictionary_of_state_capitals[state]
+                answers[state] = random_generator.choice([capital, capital.lower(), capital[:-1], random_generator.choice(list_of_state_capitals), ""])
+            sheet_file.write(json.dumps({"sheet_id": str(sheet_number), "answers": answers}) + "\n")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Grade answer sheets in bulk, with the same scoring as the GUI.")
+    argument_parser.add_argument("sheets", nargs = "?", help = "a .jsonl or .csv file of answer sheets")
+    argument_parser.add_argument("--output", required = True, help = "where to write one JSON line per graded sheet")
+    argument_parser.add_argument("--scores", help = "also write one .csv row of totals per sheet here")
+    argument_parser.add_argument("--workers", type = int, default = os.cpu_count() or 1, help = "how many worker processes to grade with (1 grades in this process)")
+    argument_parser.add_argument("--chunk-size", type = int, default = DEFAULT_CHUNK_SIZE, help = "how many sheets each worker task holds")
+    argument_parser.add_argument("--ranks", choices = ("cached", "backup"), default = "cached", help = "grade with the cached population ranks or the backup dictionary")
+    argument_parser.add_argument("--synthetic", type = int, metavar = "SHEETS", help = "grade this many made-up sheets instead of a file")
+    arguments = argument_parser.parse_args()
+    if not arguments.sheets and not arguments.synthetic:
+        argument_parser.error("give a file of sheets or --synthetic")
+
+    with tempfile.TemporaryDirectory() as directory:
+        sheets_file_name = arguments.sheets
+        if arguments.synthetic:
+            sheets_file_name = os.path.join(directory, "synthetic.jsonl")
+            write_synthetic_sheets(sheets_file_name, arguments.synthetic)
+
+        number_of_sheets = 0
+        number_rejected = 0
+        start = time.perf_counter()
+        with contextlib.ExitStack() as open_files:
+            output_file = open_files.enter_context(open(arguments.output, "w", encoding = "utf-8"))
+            scores_writer = None
+            if arguments.scores:
+                scores_writer = csv.writer(open_files.enter_context(open(arguments.scores, "w", encoding = "utf-8", newline = "")))
+                scores_writer.writerow(SCORE_COLUMNS)
+
+            for graded_sheet in grade_all(iterate_sheets(sheets_file_name), choose_population_ranks(arguments.ranks), arguments.workers, arguments.chunk_size):
+                output_file.write(json.dumps(graded_sheet) + "\n")
+                if scores_writer is not None:
+                    scores_writer.writerow([graded_sheet[column] for column in SCORE_COLUMNS])
+                number_of_sheets += 1
+                number_rejected += graded_sheet["error"] is not None
+        elapsed_seconds = time.perf_counter() - start
+
+    print(f"Graded {number_of_sheets} sheets ({number_rejected} rejected) in {elapsed_seconds:.2f} s with {arguments.workers} workers: "
+        f"{number_of_sheets / elapsed_seconds:,.0f} sheets/sec", file = sys.stderr)
@@ -0,0 +1,297 @@
+"""This file times every hot path of the quiz, offline, and fails if any has become slower than the stored baseline.
+
+Every benchmark runs at the real size (50 states) and at larger synthetic sizes:
+    csv_load: reading the states and capitals (States_and_State_Capitals_Reader.read_state_table)
+    rank_parse: reading the population rank table out of a page (the saved fixture at 50, generated pages above that)
+    rank_parse_beautifulsoup: the same with BeautifulSoup, at 50 only (skipped if bs4 is not installed)
+    question_build: building the Question instances (Questions.build_list_of_questions)
+    rank_text: formatting the population rank and weight text (Questions.create_population_rank_and_weight_text)
+    random_questions: picking a 10 question quiz (Quiz_Session.generate_random_questions)
+    answer_check: grading a mix of exact, differently written, misspelled and wrong answers (AnswerIndex.check)
+
+Timings are divided by a fixed pure-python calibration loop timed right before each benchmark, so a baseline recorded
+on one machine can be checked on another and a machine that slows down partway through (a busy CI runner) does not
+look like a regression; a benchmark regresses if its calibrated time grows by more than the tolerance on every one of
+its confirmation runs.
+
+Usage (from the repository root):
+    python src/Benchmark_Suite.py [--sizes 50 5000 50000] [--output results.json] [--tolerance 0.5]
+    python src/Benchmark_Suite.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import Answer_Index
+import Population_Rank_Web_Scraper
+import Questions
+import Quiz_Session
+import States_and_State_Capitals_Reader
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_FILE_NAME = os.path.join(SOURCE_DIRECTORY, "assets", "fixtures", "worldpopulationreview_states.html")
+BASELINE_FILE_NAME = os.path.join(SOURCE_DIRECTORY, "assets", "benchmarks", "baseline.json")
+
+DEFAULT_SIZES = (50, 5000, 50000)
+
+#how much slower (as a fraction) than the baseline a benchmark may get before it counts as a regression
+DEFAULT_TOLERANCE = 0.5
+
+#each timing repeat runs for at least this long, and the fastest repeat is kept (slower ones measured interference, not the code)
+MINIMUM_REPEAT_SECONDS = 0.05
+REPEATS = 5
+
+#a benchmark that looks like a regression is re-timed up to this many times, and only fails if every run is too slow
+CONFIRMATION_RUNS = 2
+
+#the stored baseline keeps each benchmark's median over this many runs, so one lucky run does not make it too strict
+BASELINE_RUNS = 3
+
+
+def time_operation(operation) -> float:
+    """returns the best time (in seconds) of one call, calling it enough times that clock resolution does not matter
+
+    Arguments:
+        operation: a function that takes no arguments
+    """
+    number_of_calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number_of_calls):
+            operation()
+        if time.perf_counter() - start >= MINIMUM_REPEAT_SECONDS:
+            break
+        number_of_calls *= 2
+
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(number_of_calls):
+            operation()
+        timings.append((time.perf_counter() - start) / number_of_calls)
+    return min(timings)
+
+
+def calibrate() -> float:
+    """returns the time of a fixed mix of string, dict and list work, used as this machine's unit of speed"""
+    def workload():
+        words = {}
+        for index in range(2000):
+            word = f"word {index}".upper()
+            words[word] = words.get(word, 0) + len(word)
+        return sorted(words.items())
+    return time_operation(workload)
+
+
+def create_synthetic_states(size: int, random_generator: random.Random) -> tuple[list[str], list[str], dict[str, int]]:
+    """returns made-up states, capitals that read like words, and ranks that repeat 1-50"""
+    syllables = ("ba", "ton", "rou", "ge", "mad", "i", "son", "al", "ba", "ny", "tal", "la", "has", "see", "sa", "lem", "per", "ri")
+    list_of_state_names = [f"State {index}" for index in range(size)]
+    list_of_state_capitals = ["".join(random_generator.choice(syllables) for _ in range(4)).title() + f" {index}" for index in range(size)]
+    dictionary_of_population_ranks = {state: index % Questions.LEAST_POPULOUS_RANK + 1 for index, state in enumerate(list_of_state_names)}
+    return list_of_state_names, list_of_state_capitals, dictionary_of_population_ranks
+
+
+def create_rank_page(list_of_state_names: list[str], dictionary_of_population_ranks: dict[str, int]) -> str:
+    """returns an html page whose first table lists the states by rank, laid out like the WorldPopulationReview table"""
+    rows = "".join(f"<tr><td>{dictionary_of_population_ranks[state]}</td><td><a href=\"#\">{state}</a></td><td>1,000</td></tr>"
+        for state in list_of_state_names)
+    return f"<html><body><table><thead><tr><th>Rank</th><th>State</th><th>Population</th></tr></thead><tbody>{rows}</tbody></table></body></html>"
+
+
+def create_answers(list_of_state_names: list[str], list_of_state_capitals: list[str], random_generator: random.Random, number_of_answers: int = 200) -> list[tuple[str, str]]:
+    """returns (state, answer) pairs mixing exact, lowercased, misspelled and wrong answers"""
+    answers = []
+    for _ in range(number_of_answers):
+        index = random_generator.randrange(len(list_of_state_names))
+        capital = list_of_state_capitals[index]
+        answers.append((list_of_state_names[index], random_generator.choice([capital, capital.lower(), capital[:-1] + "x",
+            list_of_state_capitals[random_generator.randrange(len(list_of_state_capitals))], "I don't know"])))
+    return answers
+
+
+def create_benchmarks(size: int, directory: str):
+    """yields (benchmark name, operation) for one size; the operations share data built here, outside the timing
+
+    Arguments:
+        size: how many states the data has (50 uses the real table, fixture and ranks)
+        directory: where synthetic .csv files are written
+    """
+    random_generator = random.Random(size)
+    if size == len(States_and_State_Capitals_Reader.list_of_state_names):
+        csv_file_name = States_and_State_Capitals_Reader.CSV_FILE_NAME
+        list_of_state_names = States_and_State_Capitals_Reader.list_of_state_names
+        list_of_state_capitals = States_and_State_Capitals_Reader.list_of_state_capitals
+        dictionary_of_population_ranks = dict(Population_Rank_Web_Scraper.BACKUP_DICTIONARY_OF_POPULATION_RANKS)
+        with open(FIXTURE_FILE_NAME, "r", encoding = "utf-8") as fixture_file:
+            rank_page = fixture_file.read()
+        answer_index = States_and_State_Capitals_Reader.answer_index
+    else:
+        list_of_state_names, list_of_state_capitals, dictionary_of_population_ranks = create_synthetic_states(size, random_generator)
+        csv_file_name = os.path.join(directory, f"states_{size}.csv")
+        with open(csv_file_name, "w", encoding = "utf-8") as csv_file:
+            csv_file.write("State,State Capital\n")
+            csv_file.writelines(f"{state},{capital}\n" for state, capital in zip(list_of_state_names, list_of_state_capitals))
+        rank_page = create_rank_page(list_of_state_names, dictionary_of_population_ranks)
+        answer_index = Answer_Index.AnswerIndex(dict(zip(list_of_state_names, list_of_state_capitals)))
+
+    dictionary_of_state_capitals = dict(zip(list_of_state_names, list_of_state_capitals))
+    list_of_questions = Questions.build_list_of_questions(dictionary_of_population_ranks, list_of_state_names, dictionary_of_state_capitals)
+    answers = create_answers(list_of_state_names, list_of_state_capitals, random_generator)
+    population_ranks_and_weights = [(question.state, question.population_rank, question.weight) for question in list_of_questions]
+
+    def parse_rank_page():
+        #the real page is checked against the 50 states; generated pages only go through the table parser
+        if size == len(States_and_State_Capitals_Reader.list_of_state_names):
+            return Population_Rank_Web_Scraper.parse_population_ranks_streaming(rank_page)
+        table_parser = Population_Rank_Web_Scraper.PopulationRankTableParser()
+        table_parser.feed(rank_page)
+        return table_parser.rows
+
+    yield "csv_load", lambda: States_and_State_Capitals_Reader.read_state_table(csv_file_name)
+    yield "rank_parse", parse_rank_page
+    if size == len(States_and_State_Capitals_Reader.list_of_state_names) and _beautifulsoup_installed():
+        yield "rank_parse_beautifulsoup", lambda: Population_Rank_Web_Scraper.parse_population_ranks(rank_page)
+    yield "question_build", lambda: Questions.build_list_of_questions(dictionary_of_population_ranks, list_of_state_names, dictionary_of_state_capitals)
+    yield "rank_text", lambda: [Questions.create_population_rank_and_weight_text(*values) for values in population_ranks_and_weights]
+    yield "random_questions", lambda: Quiz_Session.generate_random_questions(10, list_of_questions, random_generator)
+    yield "answer_check", lambda: [answer_index.check(state, answer) for state, answer in answers]
+
+
+def _beautifulsoup_installed() -> bool:
+    """returns True if bs4 can be imported"""
+    try:
+        import bs4
+    except ImportError:
+        return False
+    return True
+
+
+def run_suite(sizes = DEFAULT_SIZES, names: set[str] | None = None) -> dict:
+    """runs every benchmark at every size and returns the machine-readable results
+
+    Arguments:
+        sizes: how many states each run has (50 is the real data)
+        names: if given, only the benchmarks with these "name@size" keys are run
+    """
+    States_and_State_Capitals_Reader.load()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for name, operation in create_benchmarks(size, directory):
+                if names is not None and f"{name}@{size}" not in names:
+                    continue
+                calibration_seconds = calibrate()
+                seconds = time_operation(operation)
+                results[f"{name}@{size}"] = {"seconds": seconds, "calibration_seconds": calibration_seconds, "calibrated": seconds / calibration_seconds}
+
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def create_baseline(sizes = DEFAULT_SIZES, runs: int = BASELINE_RUNS) -> dict:
+    """runs the suite several times and returns a report holding each benchmark's median (calibrated) result
+
+    Arguments:
+        sizes: how many states each run has (50 is the real data)
+        runs: how many times to run the suite
+    """
+    reports = [run_suite(sizes) for _ in range(runs)]
+    baseline = dict(reports[0], results = {})
+    for name in reports[0]["results"]:
+        results = sorted((report["results"][name] for report in reports), key = lambda result: result["calibrated"])
+        baseline["results"][name] = results[len(results) // 2]
+    return baseline
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """returns a message for every benchmark whose calibrated time grew by more than the tolerance
+
+    Benchmarks missing from either side are not compared, so adding a benchmark does not fail the check.
+
+    Arguments:
+        report: what run_suite returned
+        baseline: a stored report
+        tolerance: how much slower (as a fraction) a benchmark may get
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            continue
+        ratio = result["calibrated"] / baseline_result["calibrated"]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name} is {ratio:.2f}x the baseline")
+    return regressions
+
+
+def confirm_regressions(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """re-times the benchmarks that look like regressions, keeps the faster result for each and returns what is left
+
+    A noisy machine can make one timing look slow; a real regression is slow on every run.
+
+    Arguments:
+        report: what run_suite returned (its results are updated in place)
+        baseline: a stored report
+        tolerance: how much slower (as a fraction) a benchmark may get
+    """
+    regressions = compare_with_baseline(report, baseline, tolerance)
+    for _ in range(CONFIRMATION_RUNS):
+        if not regressions:
+            break
+        suspects = {regression.split(" ", 1)[0] for regression in regressions}
+        sizes = sorted({int(suspect.rsplit("@", 1)[1]) for suspect in suspects})
+        for name, result in run_suite(sizes, suspects)["results"].items():
+            if result["calibrated"] < report["results"][name]["calibrated"]:
+                report["results"][name] = result
+        regressions = compare_with_baseline(report, baseline, tolerance)
+    return regressions
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Time every hot path and compare against the stored baseline.")
+    argument_parser.add_argument("--sizes", type = int, nargs = "+", default = list(DEFAULT_SIZES), help = "how many states each run has (50 is the real data)")
+    argument_parser.add_argument("--output", help = "also write the results as JSON here")
+    argument_parser.add_argument("--baseline", default = BASELINE_FILE_NAME, help = "the stored results to compare against")
+    argument_parser.add_argument("--tolerance", type = float, default = DEFAULT_TOLERANCE, help = "how much slower (as a fraction) than the baseline a benchmark may get")
+    argument_parser.add_argument("--update-baseline", action = "store_true", help = "store the median of several runs as the new baseline instead of comparing")
+    arguments = argument_parser.parse_args()
+
+    report = create_baseline(arguments.sizes) if arguments.update_baseline else run_suite(arguments.sizes)
+
+    baseline = None
+    regressions = []
+    if not arguments.update_baseline and os.path.exists(arguments.baseline):
+        with open(arguments.baseline, "r", encoding = "utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = confirm_regressions(report, baseline, arguments.tolerance)
+
+    print(f"{'benchmark':<34}{'time (us)':>14}{'calibrated':>12}{'vs baseline':>13}")
+    for name, result in report["results"].items():
+        baseline_result = baseline["results"].get(name) if baseline is not None else None
+        comparison = f"{result['calibrated'] / baseline_result['calibrated']:>12.2f}x" if baseline_result is not None else f"{'-':>13}"
+        print(f"{name:<34}{result['seconds'] * 1e6:>14.2f}{result['calibrated']:>12.3f}{comparison}")
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding = "utf-8") as output_file:
+            json.dump(report, output_file, indent = 2)
+
+    if arguments.update_baseline:
+        os.makedirs(os.path.dirname(arguments.baseline), exist_ok = True)
+        with open(arguments.baseline, "w", encoding = "utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent = 2)
+        print(f"Stored the baseline in {arguments.baseline}")
+    elif baseline is None:
+        print(f"No baseline at {arguments.baseline}; run with --update-baseline to store one.")
+    else:
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,155 @@
+"""This file checks that blitz mode shows the next question within one frame of the user pressing Enter.
+
+Two measurements are taken:
+    logic: grading the answer and preparing the next question's text, without any widgets (runs anywhere)
+    input to next question: a real QuizScreen in blitz mode gets an Enter key event, timed until the next question
+        has been drawn (this needs a display or Xvfb, and is skipped without one)
+
+The 99th percentile of each must stay under one frame (1/60 of a second by default), otherwise the process exits
+with status 1, so it can run in CI.
+
+Usage (from the repository root):
+    python src/Blitz_Latency_Benchmark.py [--quizzes N] [--frame-rate FPS]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import tkinter as tk
+import Quiz_Session
+import Questions
+import main
+
+DEFAULT_FRAME_RATE = 60
+
+
+def create_answer(question: Questions.Question, random_generator: random.Random) -> str:
+    """returns a mix of right, misspelled and wrong answers, so every kind of feedback gets drawn
+
+    Arguments:
+        question: the question being answered
+        random_generator: the source of randomness
+    """
+    choice = random_generator.random()
+    if choice < 0.6:
+        return question.capital
+    if choice < 0.8:
+        return question.capital[:-1]
+    return "Springfield"
+
+
+def percentile(timings: list[float], fraction: float) -> float:
+    """returns the timing below which the given fraction of timings fall
+
+    Arguments:
+        timings: the timings (in seconds)
+        fraction: such as 0.99
+    """
+    ordered_timings = sorted(timings)
+    return ordered_timings[min(len(ordered_timings) - 1, int(fraction * len(ordered_timings)))]
+
+
+def time_logic(number_of_quizzes: int) -> list[float]:
+    """returns how long (in seconds) each answer took to grade and turn into the next question's text, without widgets
+
+    Arguments:
+        number_of_quizzes: how many full quizzes to run
+    """
+    random_generator = random.Random(0)
+    timings = []
+    for _ in range(number_of_quizzes):
+        session = Quiz_Session.QuizSession(Quiz_Session.MAXIMUM_NUMBER_OF_QUESTIONS, random_generator = random_generator,
+            speed_bonus_window = Quiz_Session.DEFAULT_SPEED_BONUS_WINDOW)
+        question = session.next_question()
+        while question is not None:
+            user_answer = create_answer(question, random_generator)
+            start = time.perf_counter()
+            answer_result = session.submit(user_answer)
+            question = session.next_question()
+            if question is not None:
+                question.create_question_text(session.question_number)
+                question.create_population_rank_and_weight_text()
+            answer_result.create_feedback_text()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_input_to_next_question(number_of_quizzes: int) -> list[float] | None:
+    """returns how long (in seconds) each Enter press took to get the next question drawn, or None without a display
+
+    Arguments:
+        number_of_quizzes: how many full quizzes to run
+    """
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+
+    random_generator = random.Random(0)
+    timings = []
+    try:
+        for _ in range(number_of_quizzes):
+            finished_quizzes = []
+            quiz_screen = main.QuizScreen(root, Quiz_Session.MAXIMUM_NUMBER_OF_QUESTIONS, on_finished = finished_quizzes.append,
+                blitz_time_limit = 3600)
+            quiz_screen.user_entry.focus_force()
+            root.update()
+
+            while not finished_quizzes:
+                quiz_screen.user_entry.delete(0, tk.END)
+                quiz_screen.user_entry.insert(0, create_answer(quiz_screen.session.current_question, random_generator))
+                root.update_idletasks()
+                question_number = quiz_screen.session.question_number
+
+                start = time.perf_counter()
+                quiz_screen.user_entry.event_generate("<Return>")
+                root.update_idletasks()
+                elapsed_seconds = time.perf_counter() - start
+
+                if quiz_screen.session.question_number == question_number and not finished_quizzes:
+                    raise RuntimeError("Pressing Enter did not move on to the next question.")
+                timings.append(elapsed_seconds)
+
+            quiz_screen.frame.destroy()
+    finally:
+        root.destroy()
+    return timings
+
+
+def print_timings(name: str, timings: list[float], frame_seconds: float) -> bool:
+    """prints the median, 99th percentile and maximum of some timings and returns True if the 99th percentile fits in a frame
+
+    Arguments:
+        name: what was timed
+        timings: the timings (in seconds)
+        frame_seconds: the length of one frame
+    """
+    p99_seconds = percentile(timings, 0.99)
+    print(f"{name}: median {statistics.median(timings) * 1000:.3f} ms, p99 {p99_seconds * 1000:.3f} ms, "
+        f"max {max(timings) * 1000:.3f} ms over {len(timings)} answers (frame {frame_seconds * 1000:.1f} ms)")
+    return p99_seconds < frame_seconds
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Check that blitz mode shows the next question within one frame.")
+    argument_parser.add_argument("--quizzes", type = int, default = 20, help = "how many 50 question blitz quizzes to answer")
+    argument_parser.add_argument("--frame-rate", type = float, default = DEFAULT_FRAME_RATE, help = "the display's frames per second")
+    arguments = argument_parser.parse_args()
+
+    frame_seconds = 1 / arguments.frame_rate
+    failures = []
+
+    if not print_timings("logic", time_logic(arguments.quizzes), frame_seconds):
+        failures.append("grading and preparing the next question took longer than a frame")
+
+    input_timings = time_input_to_next_question(arguments.quizzes)
+    if input_timings is None:
+        print("input to next question: skipped (no display)")
+    elif not print_timings("input to next question", input_timings, frame_seconds):
+        failures.append("the next question took longer than a frame to be drawn")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
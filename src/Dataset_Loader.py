@@ -0,0 +1,352 @@
+"""This file streams (place, answer) pairs, such as (state, capital), out of any .csv file or directory of .csv files.
+
+Rows flow through a pipeline of generators: files -> decoded rows -> chosen columns -> cleaned pairs, so reading holds
+one row at a time no matter how big the dataset is. Only the table the quiz needs (a list of places and a dict of
+answers, plus the reverse dict if asked for) is kept, which lets datasets with millions of rows, such as world cities
+or postal regions, load in memory proportional to what the quiz keeps.
+
+Encodings are detected per file: a byte order mark picks UTF-8, UTF-16 or UTF-32 (and is removed, so it never ends up
+in the first header), otherwise the start of the file is checked for valid UTF-8 and cp1252 is used if it is not.
+A file that passed the UTF-8 check can still hold cp1252 bytes further on (such as a Latin-1 row appended to a UTF-8
+export), so those bytes are read as cp1252 where they are met instead of failing after earlier rows were yielded.
+
+Exports:
+    Dataset: a class that describes where a dataset lives and which columns hold the places and answers
+    DatasetTable: a class that holds the indexes built from a dataset
+    register_dataset, get_dataset, DATASETS: the registry of named datasets ("us-states" is registered here)
+    iterate_pairs: streams the (place, answer) pairs of a path or directory
+    load_table: builds a DatasetTable from a registered dataset or any path
+
+Use Cases:
+    table = load_table("us-states")
+    table.answer_by_place["Tennessee"] == "Nashville"
+    for city, country in iterate_pairs("worldcities/", place_column = "city", answer_column = "country"): ...
+
+Usage (from the repository root):
+    python src/Dataset_Loader.py us-states
+    python src/Dataset_Loader.py --synthetic 5000000
+"""
+
+import argparse
+import codecs
+import copy
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+#byte order marks, longest first so UTF-32's is not mistaken for UTF-16's
+BYTE_ORDER_MARKS = ((codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"), (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+#how much of a file without a byte order mark is checked to tell UTF-8 from cp1252
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+#the error handler that reads bytes UTF-8 rejects as cp1252 instead, for files detected as UTF-8
+CP1252_FALLBACK_ERRORS = "dataset-loader-cp1252-fallback"
+
+#bytes cp1252 leaves undefined, which are read as the Latin-1 characters with the same number
+CP1252_UNDEFINED_BYTES = frozenset((0x81, 0x8D, 0x8F, 0x90, 0x9D))
+
+
+class Dataset:
+    """This class describes where a dataset lives and which columns hold the places and answers.
+
+    Attributes:
+        name: what the dataset is registered as
+        path: a .csv file or a directory of .csv files
+        place_column: the header (or index, counting from 0) of the column with the places, such as states
+        answer_column: the header (or index) of the column with the answers, such as capitals
+        has_header: if every file starts with a header row
+        encoding: the files' encoding, or None to detect it per file
+        description: what the places and answers are
+    """
+    def __init__(self, name: str, path: str, place_column: str | int = 0, answer_column: str | int = 1, has_header: bool = True, encoding: str | None = None, description: str = ""):
+        "initializes the Dataset class"
+        self.name = name
+        self.path = path
+        self.place_column = place_column
+        self.answer_column = answer_column
+        self.has_header = has_header
+        self.encoding = encoding
+        self.description = description
+
+
+class DatasetTable:
+    """This class holds the indexes built from a dataset.
+
+    Attributes:
+        list_of_places: every place, in file order
+        answer_by_place: a dict that maps each place to its answer
+        places_by_answer: a dict that maps each answer to the first place it belongs to, or None if it was not asked for
+        number_of_duplicates: how many rows repeated a place that was already read (the first row wins)
+    """
+    def __init__(self, list_of_places: list[str], answer_by_place: dict[str, str], places_by_answer: dict[str, str] | None, number_of_duplicates: int):
+        "initializes the DatasetTable class"
+        self.list_of_places = list_of_places
+        self.answer_by_place = answer_by_place
+        self.places_by_answer = places_by_answer
+        self.number_of_duplicates = number_of_duplicates
+
+    @property
+    def list_of_answers(self) -> list[str]:
+        """every place's answer, in the same order as list_of_places"""
+        return [self.answer_by_place[place] for place in self.list_of_places]
+
+
+DATASETS = {}
+
+
+def register_dataset(dataset: Dataset):
+    """adds a dataset to the registry, replacing one with the same name
+
+    Arguments:
+        dataset: the dataset to add
+    """
+    DATASETS[dataset.name] = dataset
+
+
+def get_dataset(name_or_path: str) -> Dataset:
+    """returns the registered dataset with that name, or an unregistered one for that path with the first two columns
+
+    Arguments:
+        name_or_path: a registered name or a path
+    """
+    if name_or_path in DATASETS:
+        return DATASETS[name_or_path]
+    if os.path.exists(name_or_path):
+        return Dataset(os.path.basename(os.path.normpath(name_or_path)), name_or_path)
+    raise KeyError(f"There is no dataset called {name_or_path!r} and no file at that path.")
+
+
+def detect_encoding(file_name: str) -> str:
+    """returns the encoding to read a file with
+
+    Arguments:
+        file_name: the path of the file
+    """
+    with open(file_name, "rb") as data_file:
+        sample = data_file.read(ENCODING_SAMPLE_SIZE)
+
+    for byte_order_mark, encoding in BYTE_ORDER_MARKS:
+        if sample.startswith(byte_order_mark):
+            return encoding
+
+    #the sample can end partway through a character, so only the final incomplete character is forgiven
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final = False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def _decode_as_cp1252(error: UnicodeDecodeError) -> tuple[str, int]:
+    """a decoding error handler that reads the bytes UTF-8 rejected as cp1252 and carries on after them"""
+    rejected_bytes = bytes(error.object[error.start:error.end])
+    return "".join(chr(byte) if byte in CP1252_UNDEFINED_BYTES else bytes((byte,)).decode("cp1252") for byte in rejected_bytes), error.end
+
+
+codecs.register_error(CP1252_FALLBACK_ERRORS, _decode_as_cp1252)
+
+
+def iterate_csv_files(path: str):
+    """yields the path itself if it is a file, otherwise every .csv file under the directory in sorted order
+
+    Arguments:
+        path: a file or a directory
+    """
+    if not os.path.isdir(path):
+        yield path
+        return
+
+    for directory, directory_names, file_names in os.walk(path):
+        directory_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(".csv"):
+                yield os.path.join(directory, file_name)
+
+
+def iterate_rows(file_names, encoding: str | None = None):
+    """yields (file name, row) for every row of every file, decoding each file with its own encoding
+
+    Arguments:
+        file_names: the files to read
+        encoding: the files' encoding, or None to detect it per file
+    """
+    for file_name in file_names:
+        #only the start of the file was checked, so a detected UTF-8 file falls back to cp1252 byte by byte past it
+        file_encoding = encoding or detect_encoding(file_name)
+        errors = CP1252_FALLBACK_ERRORS if encoding is None and file_encoding == "utf-8" else "strict"
+        with open(file_name, "r", encoding = file_encoding, errors = errors, newline = "") as data_file:
+            for row in csv.reader(data_file):
+                yield file_name, row
+
+
+def select_columns(rows, place_column: str | int, answer_column: str | int, has_header: bool = True):
+    """yields (place, answer) from each row, finding named columns in each file's header row
+
+    Arguments:
+        rows: (file name, row) pairs from iterate_rows
+        place_column: the header (or index) of the column with the places
+        answer_column: the header (or index) of the column with the answers
+        has_header: if every file starts with a header row
+    """
+    current_file_name = None
+    place_index = answer_index = None
+    for file_name, row in rows:
+        if file_name != current_file_name:
+            current_file_name = file_name
+            if has_header:
+                header = [name.strip() for name in row]
+                place_index = _find_column(header, place_column, file_name)
+                answer_index = _find_column(header, answer_column, file_name)
+                continue
+            place_index, answer_index = place_column, answer_column
+
+        #short rows (such as blank lines) have nothing to ask about
+        if len(row) > place_index and len(row) > answer_index:
+            yield row[place_index], row[answer_index]
+
+
+def clean_pairs(pairs):
+    """yields the pairs with surrounding whitespace removed, skipping pairs with an empty place or answer
+
+    Arguments:
+        pairs: (place, answer) pairs
+    """
+    for place, answer in pairs:
+        place = place.strip()
+        answer = answer.strip()
+        if place and answer:
+            yield place, answer
+
+
+def iterate_pairs(path: str, place_column: str | int = 0, answer_column: str | int = 1, has_header: bool = True, encoding: str | None = None):
+    """streams the cleaned (place, answer) pairs of a .csv file or a directory of them
+
+    Arguments:
+        path: a .csv file or a directory of .csv files
+        place_column: the header (or index) of the column with the places
+        answer_column: the header (or index) of the column with the answers
+        has_header: if every file starts with a header row
+        encoding: the files' encoding, or None to detect it per file
+    """
+    return clean_pairs(select_columns(iterate_rows(iterate_csv_files(path), encoding), place_column, answer_column, has_header))
+
+
+def load_table(name_or_path: str | Dataset, include_places_by_answer: bool = True) -> DatasetTable:
+    """builds the quiz's indexes from a dataset
+
+    Arguments:
+        name_or_path: a registered name, a path or a Dataset
+        include_places_by_answer: if the reverse dict (answer -> place) is built; skip it to save memory on large datasets
+
+    Returns:
+        the indexes, with the first row winning when a place is repeated
+    """
+    dataset = name_or_path if isinstance(name_or_path, Dataset) else get_dataset(name_or_path)
+    list_of_places = []
+    answer_by_place = {}
+    places_by_answer = {} if include_places_by_answer else None
+    number_of_duplicates = 0
+
+    for place, answer in iterate_pairs(dataset.path, dataset.place_column, dataset.answer_column, dataset.has_header, dataset.encoding):
+        if place in answer_by_place:
+            number_of_duplicates += 1
+            continue
+        list_of_places.append(place)
+        answer_by_place[place] = answer
+        if places_by_answer is not None:
+            places_by_answer.setdefault(answer, place)
+
+    return DatasetTable(list_of_places, answer_by_place, places_by_answer, number_of_duplicates)
+
+
+def _find_column(header: list[str], column: str | int, file_name: str) -> int:
+    """returns the index of a column given by header or index, raising ValueError if the file does not have it"""
+    if isinstance(column, int):
+        return column
+    try:
+        return header.index(column)
+    except ValueError:
+        raise ValueError(f"{file_name} has no {column!r} column (its header is {header}).") from None
+
+
+#the table the quiz was built around; every other dataset is registered the same way
+register_dataset(Dataset("us-states", os.path.join(os.path.dirname(os.path.abspath(__file__)), "States_and_State_Capitals_Table.csv"),
+    place_column = "State", answer_column = "State Capital", description = "the 50 U.S. states and their capitals"))
+
+
+def write_synthetic_dataset(file_name: str, number_of_rows: int):
+    """writes a made-up dataset with a UTF-8 byte order mark and some accented names, for measuring the loader
+
+    Arguments:
+        file_name: where to write it
+        number_of_rows: how many places it has
+    """
+    with open(file_name, "w", encoding = "utf-8-sig", newline = "") as data_file:
+        csv_writer = csv.writer(data_file)
+        csv_writer.writerow(["Place", "Answer", "Population"])
+        for index in range(number_of_rows):
+            csv_writer.writerow([f"Place {index}", f"Sāo Capital {index % 100000}", index])
+
+
+def measure_load(dataset: Dataset) -> dict[str, float]:
+    """streams a dataset only counting rows, then builds its table, and returns the time and peak memory of each
+
+    Each is run twice: untraced for the time, then under tracemalloc (which slows python down several times) for the memory.
+
+    Arguments:
+        dataset: the dataset to measure
+    """
+    def stream():
+        return sum(1 for _ in iterate_pairs(dataset.path, dataset.place_column, dataset.answer_column, dataset.has_header, dataset.encoding))
+
+    def build():
+        return load_table(dataset, include_places_by_answer = False)
+
+    report = {}
+    for name, action in (("stream", stream), ("table", build)):
+        start = time.perf_counter()
+        result = action()
+        report[f"{name}_seconds"] = time.perf_counter() - start
+        del result
+
+        tracemalloc.start()
+        result = action()
+        report[f"{name}_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if name == "stream":
+            report["rows"] = result
+        else:
+            report["places"] = len(result.list_of_places)
+        del result
+    return report
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Stream a dataset of places and answers and report its size, speed and memory.")
+    argument_parser.add_argument("dataset", nargs = "?", default = "us-states", help = f"a registered dataset ({', '.join(DATASETS)}) or a path to a .csv file or directory")
+    argument_parser.add_argument("--place-column", help = "the header of the column with the places (for unregistered paths)")
+    argument_parser.add_argument("--answer-column", help = "the header of the column with the answers (for unregistered paths)")
+    argument_parser.add_argument("--synthetic", type = int, metavar = "ROWS", help = "measure a made-up dataset with this many rows instead")
+    arguments = argument_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if arguments.synthetic:
+            dataset = Dataset("synthetic", os.path.join(directory, "synthetic.csv"), "Place", "Answer")
+            write_synthetic_dataset(dataset.path, arguments.synthetic)
+        else:
+            #the registered dataset is copied so the column options never change it
+            dataset = copy.copy(get_dataset(arguments.dataset))
+            if arguments.place_column:
+                dataset.place_column = arguments.place_column
+            if arguments.answer_column:
+                dataset.answer_column = arguments.answer_column
+
+        report = measure_load(dataset)
+
+    print(f"{dataset.name}: {report['rows']} rows, {report['places']} places")
+    print(f"  streaming only:   {report['stream_seconds']:.3f} s, {report['rows'] / report['stream_seconds']:,.0f} rows/s, peak {report['stream_peak_bytes'] / 1024:,.0f} KiB")
+    print(f"  building table:   {report['table_seconds']:.3f} s, peak {report['table_peak_bytes'] / 1024 / 1024:,.1f} MiB")
@@ -0,0 +1,412 @@
+"""This file picks plausible wrong options for multiple-choice questions, worked out once when the questions are loaded.
+
+A state's wrong options (distractors) are the capitals of:
+    neighboring states: states that share a land border with it (STATE_NEIGHBORS)
+    states of similar population rank: the states just above and below it in the population ranks
+    similar-sounding capitals: capitals with the same Soundex code as its own, nearest in alphabetical order
+
+Every state's candidates are worked out when the index is built (sorting once, so building is O(n log n)), and each
+state keeps at most MAXIMUM_CANDIDATES of them, so building a question's choices is O(k) no matter how many
+states there are. The index is built from the questions themselves, so it always matches their capitals and ranks.
+When a few questions change, DistractorIndex.updated works out again only the candidates of the states around them.
+
+Exports:
+    STATE_NEIGHBORS: a dictionary that maps each U.S. state to the states it shares a land border with
+    DistractorIndex: a class that holds every state's distractor candidates and builds a question's choices
+    get_distractor_index: returns the index for a list of questions, building it the first time
+    cache_distractor_index: hands get_distractor_index an index that was built elsewhere (such as by DistractorIndex.updated)
+    calculate_soundex: the Soundex code of a name
+
+Use Cases:
+    distractor_index = get_distractor_index(Questions.list_of_questions)
+    distractor_index.create_choices(question, 4) == ["Nashville", "Frankfort", "Atlanta", "Little Rock"]
+
+Usage (from the repository root):
+    python src/Distractor_Index.py [--synthetic N] [--choices K]    (times building the index and the choices)
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+import threading
+import time
+import Answer_Index
+
+#how many choices a multiple-choice question has unless told otherwise
+DEFAULT_NUMBER_OF_CHOICES = 4
+
+#the most distractor candidates kept for each state, and how many each source may add
+MAXIMUM_CANDIDATES = 9
+CANDIDATES_PER_SOURCE = 4
+
+#how many states above and below a state in the population ranks count as similar
+POPULATION_RANK_WINDOW = 2
+
+#the states each state shares a land border with (Alaska and Hawaii have none)
+STATE_NEIGHBORS = {
+    'Alabama': ('Florida', 'Georgia', 'Mississippi', 'Tennessee'),
+    'Alaska': (),
+    'Arizona': ('California', 'Colorado', 'Nevada', 'New Mexico', 'Utah'),
+    'Arkansas': ('Louisiana', 'Mississippi', 'Missouri', 'Oklahoma', 'Tennessee', 'Texas'),
+    'California': ('Arizona', 'Nevada', 'Oregon'),
+    'Colorado': ('Arizona', 'Kansas', 'Nebraska', 'New Mexico', 'Oklahoma', 'Utah', 'Wyoming'),
+    'Connecticut': ('Massachusetts', 'New York', 'Rhode Island'),
+    'Delaware': ('Maryland', 'New Jersey', 'Pennsylvania'),
+    'Florida': ('Alabama', 'Georgia'),
+    'Georgia': ('Alabama', 'Florida', 'North Carolina', 'South Carolina', 'Tennessee'),
+    'Hawaii': (),
+    'Idaho': ('Montana', 'Nevada', 'Oregon', 'Utah', 'Washington', 'Wyoming'),
+    'Illinois': ('Indiana', 'Iowa', 'Kentucky', 'Missouri', 'Wisconsin'),
+    'Indiana': ('Illinois', 'Kentucky', 'Michigan', 'Ohio'),
+    'Iowa': ('Illinois', 'Minnesota', 'Missouri', 'Nebraska', 'South Dakota', 'Wisconsin'),
+    'Kansas': ('Colorado', 'Missouri', 'Nebraska', 'Oklahoma'),
+    'Kentucky': ('Illinois', 'Indiana', 'Missouri', 'Ohio', 'Tennessee', 'Virginia', 'West Virginia'),
+    'Louisiana': ('Arkansas', 'Mississippi', 'Texas'),
+    'Maine': ('New Hampshire',),
+    'Maryland': ('Delaware', 'Pennsylvania', 'Virginia', 'West Virginia'),
+    'Massachusetts': ('Connecticut', 'New Hampshire', 'New York', 'Rhode Island', 'Vermont'),
+    'Michigan': ('Indiana', 'Ohio', 'Wisconsin'),
+    'Minnesota': ('Iowa', 'North Dakota', 'South Dakota', 'Wisconsin'),
+    'Mississippi': ('Alabama', 'Arkansas', 'Louisiana', 'Tennessee'),
+    'Missouri': ('Arkansas', 'Illinois', 'Iowa', 'Kansas', 'Kentucky', 'Nebraska', 'Oklahoma', 'Tennessee'),
+    'Montana': ('Idaho', 'North Dakota', 'South Dakota', 'Wyoming'),
+    'Nebraska': ('Colorado', 'Iowa', 'Kansas', 'Missouri', 'South Dakota', 'Wyoming'),
+    'Nevada': ('Arizona', 'California', 'Idaho', 'Oregon', 'Utah'),
+    'New Hampshire': ('Maine', 'Massachusetts', 'Vermont'),
+    'New Jersey': ('Delaware', 'New York', 'Pennsylvania'),
+    'New Mexico': ('Arizona', 'Colorado', 'Oklahoma', 'Texas', 'Utah'),
+    'New York': ('Connecticut', 'Massachusetts', 'New Jersey', 'Pennsylvania', 'Vermont'),
+    'North Carolina': ('Georgia', 'South Carolina', 'Tennessee', 'Virginia'),
+    'North Dakota': ('Minnesota', 'Montana', 'South Dakota'),
+    'Ohio': ('Indiana', 'Kentucky', 'Michigan', 'Pennsylvania', 'West Virginia'),
+    'Oklahoma': ('Arkansas', 'Colorado', 'Kansas', 'Missouri', 'New Mexico', 'Texas'),
+    'Oregon': ('California', 'Idaho', 'Nevada', 'Washington'),
+    'Pennsylvania': ('Delaware', 'Maryland', 'New Jersey', 'New York', 'Ohio', 'West Virginia'),
+    'Rhode Island': ('Connecticut', 'Massachusetts'),
+    'South Carolina': ('Georgia', 'North Carolina'),
+    'South Dakota': ('Iowa', 'Minnesota', 'Montana', 'Nebraska', 'North Dakota', 'Wyoming'),
+    'Tennessee': ('Alabama', 'Arkansas', 'Georgia', 'Kentucky', 'Mississippi', 'Missouri', 'North Carolina', 'Virginia'),
+    'Texas': ('Arkansas', 'Louisiana', 'New Mexico', 'Oklahoma'),
+    'Utah': ('Arizona', 'Colorado', 'Idaho', 'Nevada', 'New Mexico', 'Wyoming'),
+    'Vermont': ('Massachusetts', 'New Hampshire', 'New York'),
+    'Virginia': ('Kentucky', 'Maryland', 'North Carolina', 'Tennessee', 'West Virginia'),
+    'Washington': ('Idaho', 'Oregon'),
+    'West Virginia': ('Kentucky', 'Maryland', 'Ohio', 'Pennsylvania', 'Virginia'),
+    'Wisconsin': ('Illinois', 'Iowa', 'Michigan', 'Minnesota'),
+    'Wyoming': ('Colorado', 'Idaho', 'Montana', 'Nebraska', 'South Dakota', 'Utah'),
+}
+
+#the Soundex digit of every consonant that has one (vowels, h, w and y have none)
+SOUNDEX_DIGITS = {letter: str(digit) for digit, letters in enumerate(("bfpv", "cgjkqsxz", "dt", "l", "mn", "r"), 1) for letter in letters}
+
+
+def calculate_soundex(name: str) -> str:
+    """returns the Soundex code of a name (a letter and three digits), so names that sound alike share a code
+
+    Arguments:
+        name: the name, such as "Saint Paul"
+    """
+    #only names with accents need the full normalization, which is most of the cost for plain ascii names
+    if not name.isascii():
+        name = Answer_Index.normalize_answer(name)
+    letters = [character for character in name.casefold() if "a" <= character <= "z"]
+    if not letters:
+        return ""
+
+    code = letters[0].upper()
+    previous_digit = SOUNDEX_DIGITS.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = SOUNDEX_DIGITS.get(letter, "")
+        if digit and digit != previous_digit:
+            code += digit
+            if len(code) == 4:
+                break
+        #h and w do not separate two consonants with the same digit; vowels do
+        if letter not in "hw":
+            previous_digit = digit
+    return code.ljust(4, "0")
+
+
+def _find_nearby(items: list, position: int, window: int) -> list:
+    """returns the items up to window places before and after a position, closest first (the one before wins a tie)
+
+    Arguments:
+        items: the sorted items
+        position: where the item to find neighbors for is
+        window: how far to look on each side
+    """
+    nearby_items = []
+    for distance in range(1, window + 1):
+        if position - distance >= 0:
+            nearby_items.append(items[position - distance])
+        if position + distance < len(items):
+            nearby_items.append(items[position + distance])
+    return nearby_items
+
+
+class DistractorIndex:
+    """This class holds every state's distractor candidates and builds the choices for a question.
+
+    Attributes:
+        candidates_by_state: a dictionary that maps each state to a tuple of its distractor capitals, best first
+        list_of_capitals: every capital, used to fill in choices for a state with too few candidates
+    """
+    def __init__(self, list_of_questions, neighbors: dict[str, tuple[str, ...]] = STATE_NEIGHBORS):
+        """builds the candidates of every state
+
+        Arguments:
+            list_of_questions: the Question instances to build the index for
+            neighbors: a dictionary that maps each state to the states it borders (states not in the questions are skipped)
+        """
+        self._neighbors = neighbors
+        self._capitals_by_state = {question.state: question.capital for question in list_of_questions}
+        self._population_ranks_by_state = {question.state: question.population_rank for question in list_of_questions}
+        #every capital's number of states and place in list_of_capitals, so an update removes a capital without a search
+        self._capital_entries = {}
+        self.list_of_capitals = []
+        for capital in self._capitals_by_state.values():
+            number_of_states, position = self._capital_entries.get(capital, (0, len(self.list_of_capitals)))
+            if number_of_states == 0:
+                self.list_of_capitals.append(capital)
+            self._capital_entries[capital] = (number_of_states + 1, position)
+
+        #the states that list each state as a neighbor, so an update knows whose candidates to work out again
+        self._states_bordering = {}
+        for state, bordering_states in neighbors.items():
+            for neighbor in bordering_states:
+                self._states_bordering.setdefault(neighbor, []).append(state)
+
+        #the states just above and below each state in the population ranks
+        self._rank_keys = sorted((population_rank, state) for state, population_rank in self._population_ranks_by_state.items())
+        similar_rank_states = {state: [nearby_state for _, nearby_state in _find_nearby(self._rank_keys, position, POPULATION_RANK_WINDOW)]
+            for position, (_, state) in enumerate(self._rank_keys)}
+
+        #the capitals with the same Soundex code, nearest in alphabetical order first
+        self._sounds_by_state = {}
+        self._sound_keys = {}
+        for capital, state in sorted((capital, state) for state, capital in self._capitals_by_state.items()):
+            self._sounds_by_state[state] = sound = calculate_soundex(capital)
+            self._sound_keys.setdefault(sound, []).append((capital, state))
+        similar_sound_states = {}
+        for sound_keys in self._sound_keys.values():
+            for position, (_, state) in enumerate(sound_keys):
+                similar_sound_states[state] = [nearby_state for _, nearby_state in _find_nearby(sound_keys, position, CANDIDATES_PER_SOURCE)]
+
+        self.candidates_by_state = {state: self._create_candidates(state, similar_rank_states[state], similar_sound_states[state]) for state in self._capitals_by_state}
+
+    def _create_candidates(self, state: str, similar_rank_states: list[str], similar_sound_states: list[str]) -> tuple[str, ...]:
+        """returns a state's distractor capitals, taking one candidate from each source in turn so every kind shows up"""
+        capitals_by_state = self._capitals_by_state
+        capital = capitals_by_state[state]
+        sources = (
+            [neighbor for neighbor in self._neighbors.get(state, ()) if neighbor in capitals_by_state][:CANDIDATES_PER_SOURCE],
+            similar_rank_states[:CANDIDATES_PER_SOURCE],
+            similar_sound_states[:CANDIDATES_PER_SOURCE],
+        )
+        candidates = {}
+        for candidate_states in itertools.zip_longest(*sources):
+            for candidate_state in candidate_states:
+                if candidate_state is not None and capitals_by_state[candidate_state] != capital:
+                    candidates[capitals_by_state[candidate_state]] = None
+        return tuple(candidates)[:MAXIMUM_CANDIDATES]
+
+    def updated(self, changed_questions, removed_states = ()) -> "DistractorIndex":
+        """returns a copy of the index with some questions changed, added or removed, leaving this index untouched
+
+        A state's candidates only come from its neighbors and the states within a few places of it in the population
+        ranks and in its Soundex group, so only the candidates of the states around each change are worked out again.
+        The dictionaries are copied as they are, and the lists they share with this index are replaced, never edited.
+
+        Arguments:
+            changed_questions: the new or changed Question instances
+            removed_states: the states whose questions were taken out
+        """
+        distractor_index = DistractorIndex.__new__(DistractorIndex)
+        distractor_index._neighbors = self._neighbors
+        distractor_index._states_bordering = self._states_bordering
+        distractor_index._capitals_by_state = dict(self._capitals_by_state)
+        distractor_index._population_ranks_by_state = dict(self._population_ranks_by_state)
+        distractor_index._capital_entries = dict(self._capital_entries)
+        distractor_index.list_of_capitals = list(self.list_of_capitals)
+        distractor_index._rank_keys = list(self._rank_keys)
+        distractor_index._sounds_by_state = dict(self._sounds_by_state)
+        distractor_index._sound_keys = dict(self._sound_keys)
+        distractor_index.candidates_by_state = dict(self.candidates_by_state)
+
+        #every state whose candidates may have changed: the ones near each change before and after it
+        affected_states = set()
+        for state in [*removed_states, *(question.state for question in changed_questions)]:
+            if state in distractor_index._capitals_by_state:
+                affected_states.update(distractor_index._remove_state(state))
+
+        for question in changed_questions:
+            affected_states.update(distractor_index._add_state(question.state, question.capital, question.population_rank))
+
+        for state in affected_states:
+            if state in distractor_index._capitals_by_state:
+                distractor_index.candidates_by_state[state] = distractor_index._create_candidates(state,
+                    distractor_index._find_similar_rank_states(state), distractor_index._find_similar_sound_states(state))
+        return distractor_index
+
+    def _find_similar_rank_states(self, state: str) -> list[str]:
+        """returns the states just above and below a state in the population ranks, closest first"""
+        position = bisect.bisect_left(self._rank_keys, (self._population_ranks_by_state[state], state))
+        return [nearby_state for _, nearby_state in _find_nearby(self._rank_keys, position, POPULATION_RANK_WINDOW)]
+
+    def _find_similar_sound_states(self, state: str) -> list[str]:
+        """returns the states whose capitals share a state's Soundex code, nearest in alphabetical order first"""
+        sound_keys = self._sound_keys[self._sounds_by_state[state]]
+        position = bisect.bisect_left(sound_keys, (self._capitals_by_state[state], state))
+        return [nearby_state for _, nearby_state in _find_nearby(sound_keys, position, CANDIDATES_PER_SOURCE)]
+
+    def _remove_state(self, state: str) -> list[str]:
+        """takes a state out of the copied structures and returns the states whose candidates it may have been part of"""
+        affected_states = self._states_bordering.get(state, [])[:]
+
+        rank_key = (self._population_ranks_by_state.pop(state), state)
+        position = bisect.bisect_left(self._rank_keys, rank_key)
+        affected_states.extend(nearby_state for _, nearby_state in _find_nearby(self._rank_keys, position, POPULATION_RANK_WINDOW))
+        del self._rank_keys[position]
+
+        capital = self._capitals_by_state.pop(state)
+        sound = self._sounds_by_state.pop(state)
+        sound_keys = self._sound_keys[sound]
+        position = bisect.bisect_left(sound_keys, (capital, state))
+        affected_states.extend(nearby_state for _, nearby_state in _find_nearby(sound_keys, position, CANDIDATES_PER_SOURCE))
+        if len(sound_keys) > 1:
+            self._sound_keys[sound] = sound_keys[:position] + sound_keys[position + 1:]
+        else:
+            del self._sound_keys[sound]
+
+        #a capital that no state has anymore stops being used to fill in choices; the last capital takes its place
+        number_of_states, position = self._capital_entries[capital]
+        if number_of_states > 1:
+            self._capital_entries[capital] = (number_of_states - 1, position)
+        else:
+            del self._capital_entries[capital]
+            last_capital = self.list_of_capitals.pop()
+            if last_capital != capital:
+                self.list_of_capitals[position] = last_capital
+                self._capital_entries[last_capital] = (self._capital_entries[last_capital][0], position)
+        self.candidates_by_state.pop(state, None)
+        return affected_states
+
+    def _add_state(self, state: str, capital: str, population_rank: int) -> list[str]:
+        """puts a state into the copied structures and returns the states whose candidates it may now be part of"""
+        affected_states = self._states_bordering.get(state, [])[:]
+        affected_states.append(state)
+
+        self._capitals_by_state[state] = capital
+        self._population_ranks_by_state[state] = population_rank
+        position = bisect.bisect_left(self._rank_keys, (population_rank, state))
+        self._rank_keys.insert(position, (population_rank, state))
+        affected_states.extend(nearby_state for _, nearby_state in _find_nearby(self._rank_keys, position, POPULATION_RANK_WINDOW))
+
+        self._sounds_by_state[state] = sound = calculate_soundex(capital)
+        sound_keys = self._sound_keys.get(sound, [])
+        position = bisect.bisect_left(sound_keys, (capital, state))
+        self._sound_keys[sound] = sound_keys = sound_keys[:position] + [(capital, state)] + sound_keys[position:]
+        affected_states.extend(nearby_state for _, nearby_state in _find_nearby(sound_keys, position, CANDIDATES_PER_SOURCE))
+
+        number_of_states, position = self._capital_entries.get(capital, (0, len(self.list_of_capitals)))
+        if number_of_states == 0:
+            self.list_of_capitals.append(capital)
+        self._capital_entries[capital] = (number_of_states + 1, position)
+        return affected_states
+
+    def create_choices(self, question, number_of_choices: int = DEFAULT_NUMBER_OF_CHOICES, random_generator: random.Random | None = None) -> list[str]:
+        """returns the question's capital and number_of_choices - 1 distractors in a random order
+
+        Arguments:
+            question: the Question instance to build choices for
+            number_of_choices: how many options to show, including the right one
+            random_generator: the source of randomness (the random module if None)
+        """
+        if random_generator is None:
+            random_generator = random
+
+        candidates = self.candidates_by_state.get(question.state, ())
+        number_of_distractors = min(number_of_choices - 1, len(self.list_of_capitals) - 1)
+        choices = random_generator.sample(candidates, min(number_of_distractors, len(candidates)))
+
+        #a state with too few candidates is filled in with random capitals (rarely needs more than one try each)
+        while len(choices) < number_of_distractors:
+            capital = random_generator.choice(self.list_of_capitals)
+            if capital != question.capital and capital not in choices:
+                choices.append(capital)
+
+        choices.insert(random_generator.randrange(len(choices) + 1), question.capital)
+        return choices
+
+
+#the index of the latest list of questions, rebuilt only when Questions.list_of_questions is replaced
+_cached_list_of_questions = None
+_cached_distractor_index = None
+_cache_lock = threading.Lock()
+
+
+def get_distractor_index(list_of_questions = None) -> DistractorIndex:
+    """returns the index for a list of questions, building it only the first time that list is seen
+
+    Arguments:
+        list_of_questions: the questions to build the index for (Questions.list_of_questions if None)
+    """
+    global _cached_list_of_questions, _cached_distractor_index
+
+    if list_of_questions is None:
+        import Questions
+        list_of_questions = Questions.list_of_questions
+
+    with _cache_lock:
+        if list_of_questions is not _cached_list_of_questions:
+            _cached_distractor_index = DistractorIndex(list_of_questions)
+            _cached_list_of_questions = list_of_questions
+        return _cached_distractor_index
+
+
+def cache_distractor_index(list_of_questions, distractor_index: DistractorIndex):
+    """makes get_distractor_index return an index that was built elsewhere for a list of questions
+
+    Arguments:
+        list_of_questions: the questions the index was built for
+        distractor_index: their index
+    """
+    global _cached_list_of_questions, _cached_distractor_index
+    with _cache_lock:
+        _cached_distractor_index = distractor_index
+        _cached_list_of_questions = list_of_questions
+
+
+if __name__ == "__main__":
+    import Questions
+    import Benchmark_Suite
+
+    argument_parser = argparse.ArgumentParser(description = "Time building the distractor index and the choices of a question.")
+    argument_parser.add_argument("--synthetic", type = int, help = "use this many generated states instead of the real ones")
+    argument_parser.add_argument("--choices", type = int, default = DEFAULT_NUMBER_OF_CHOICES, help = "how many choices each question has")
+    arguments = argument_parser.parse_args()
+
+    random_generator = random.Random(0)
+    if arguments.synthetic:
+        list_of_state_names, list_of_state_capitals, dictionary_of_population_ranks = Benchmark_Suite.create_synthetic_states(arguments.synthetic, random_generator)
+        list_of_questions = Questions.build_list_of_questions(dictionary_of_population_ranks, list_of_state_names, dict(zip(list_of_state_names, list_of_state_capitals)))
+    else:
+        list_of_questions = Questions.list_of_questions
+
+    start = time.perf_counter()
+    distractor_index = DistractorIndex(list_of_questions)
+    build_seconds = time.perf_counter() - start
+
+    sample_questions = [random_generator.choice(list_of_questions) for _ in range(100000)]
+    start = time.perf_counter()
+    for question in sample_questions:
+        distractor_index.create_choices(question, arguments.choices, random_generator)
+    choice_seconds = (time.perf_counter() - start) / len(sample_questions)
+
+    average_candidates = sum(map(len, distractor_index.candidates_by_state.values())) / len(distractor_index.candidates_by_state)
+    print(f"{len(list_of_questions)} states: built in {build_seconds * 1000:.1f} ms, {average_candidates:.1f} candidates per state, "
+        f"{choice_seconds * 1e6:.2f} us per question's choices")
+    if not arguments.synthetic:
+        for question in random_generator.sample(list_of_questions, 5):
+            print(f"  {question.state}: {', '.join(distractor_index.create_choices(question, arguments.choices, random_generator))}")
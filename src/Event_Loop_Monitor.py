@@ -0,0 +1,73 @@
+"""This file measures how late the tkinter event loop runs its callbacks, which shows if the window stays responsive.
+
+A callback is scheduled every interval; any time beyond the interval before it actually runs is event-loop lag,
+meaning the window could not repaint, move or respond to clicks during that time.
+
+Exports:
+    EventLoopLagMonitor: a class that samples event-loop lag and reports it to a hook
+
+Use Cases:
+    monitor = EventLoopLagMonitor(root, on_lag = lambda lag: print(f"{lag * 1000:.1f} ms late"))
+    monitor.start()
+    monitor.maximum_lag < 0.05
+"""
+
+import time
+
+
+class EventLoopLagMonitor:
+    """This class samples event-loop lag by scheduling a callback with root.after and timing when it actually runs.
+
+    Attributes:
+        root: the GUI window
+        interval: how often (in milliseconds) to take a sample
+        on_lag: called with every sample's lag (in seconds); this is the instrumentation hook
+        number_of_samples: how many samples have been taken
+        total_lag: the sum of every sample's lag (in seconds)
+        maximum_lag: the largest lag seen (in seconds)
+    """
+    def __init__(self, root, interval: int = 50, on_lag = None):
+        "initializes the EventLoopLagMonitor class"
+        self.root = root
+        self.interval = interval
+        self.on_lag = on_lag
+        self.number_of_samples = 0
+        self.total_lag = 0.0
+        self.maximum_lag = 0.0
+        self._expected_time = None
+        self._after_id = None
+
+    def start(self):
+        """begins sampling"""
+        if self._after_id is None:
+            self._schedule_sample()
+
+    def stop(self):
+        """stops sampling"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    @property
+    def average_lag(self) -> float:
+        """the mean lag (in seconds) over every sample"""
+        return self.total_lag / self.number_of_samples if self.number_of_samples else 0.0
+
+    def create_report_text(self) -> str:
+        """returns a one-line summary of the lag seen so far"""
+        return f"event-loop lag over {self.number_of_samples} samples: average {self.average_lag * 1000:.1f} ms, maximum {self.maximum_lag * 1000:.1f} ms"
+
+    def _schedule_sample(self):
+        """asks the event loop to take the next sample after one interval"""
+        self._expected_time = time.perf_counter() + self.interval / 1000
+        self._after_id = self.root.after(self.interval, self._take_sample)
+
+    def _take_sample(self):
+        """records how late this callback ran and schedules the next one"""
+        lag = max(0.0, time.perf_counter() - self._expected_time)
+        self.number_of_samples += 1
+        self.total_lag += lag
+        self.maximum_lag = max(self.maximum_lag, lag)
+        if self.on_lag is not None:
+            self.on_lag(lag)
+        self._schedule_sample()
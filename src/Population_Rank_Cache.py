@@ -0,0 +1,270 @@
+"""This file keeps the population ranks from WorldPopulationReview on disk so most launches never download the page.
+
+The cache file holds the parsed ranks, when they were fetched, the ETag/Last-Modified headers needed for a conditional
+request, and a checksum of the ranks so a corrupt or hand-edited file is ignored instead of trusted.
+
+Exports:
+    CacheEntry: a class that holds one snapshot of the population ranks
+    load_cache: reads the cache file, returning None if it is missing or corrupt
+    save_cache: writes a snapshot to the cache file
+    record_event: adds one to a cache counter in memory
+    save_statistics: adds the counted events to the statistics files (run once at exit)
+    statistics: a dictionary of cache counters that persists across launches (read from disk on first use)
+
+Use Cases:
+    entry = load_cache()
+    if entry is not None and entry.is_fresh():
+        entry.population_ranks["California"] == 1
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_FORMAT_VERSION = 1
+
+#where the cache lives; set US_STATE_CAPITALS_QUIZ_CACHE_DIR to move it
+CACHE_DIRECTORY = os.environ.get("US_STATE_CAPITALS_QUIZ_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "US_State_Capitals_Quiz_GUI"))
+CACHE_FILE_NAME = os.path.join(CACHE_DIRECTORY, "population_rank_cache.json")
+STATISTICS_FILE_NAME = os.path.join(CACHE_DIRECTORY, "population_rank_cache_statistics.json")
+
+#the ranks change about once a year, so a month-old snapshot is still served without asking the website
+TIME_TO_LIVE = 30 * 24 * 60 * 60
+
+#hit: fresh cache served with no network
+#revalidation: stale cache confirmed by a 304 response
+#miss: full download of the page
+#stale_served: stale cache used because the website could not be reached
+#corrupt: cache file present but unreadable or failing its checksum
+STATISTIC_NAMES = ("hit", "revalidation", "miss", "stale_served", "corrupt")
+
+_statistics_lock = threading.Lock()
+
+#how long (in seconds) a save waits for another process's save to finish; a lock file older than this was left behind by a crash
+STATISTICS_LOCK_TIMEOUT = 2.0
+
+#events counted since the last save, by statistics file name; they are added to the file once, at exit, instead of
+#rewriting it on every event, and adding (rather than overwriting) keeps the events of launches that ran at the same time
+_pending_events_by_file_name = {}
+
+
+class CacheEntry:
+    """This class holds one snapshot of the population ranks.
+
+    Attributes:
+        population_ranks: a dictionary that maps each U.S. state to its population rank
+        fetched_at: when (seconds since the epoch) the ranks were last downloaded or revalidated
+        etag: the ETag header from the response, if there was one
+        last_modified: the Last-Modified header from the response, if there was one
+    """
+    def __init__(self, population_ranks: dict[str, int], fetched_at: float, etag: str | None = None, last_modified: str | None = None):
+        "initializes the CacheEntry class"
+        self.population_ranks = population_ranks
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, time_to_live: float = TIME_TO_LIVE) -> bool:
+        """returns True if the snapshot is young enough to serve without asking the website
+
+        Arguments:
+            time_to_live: how long (in seconds) a snapshot stays fresh
+        """
+        return 0 <= time.time() - self.fetched_at < time_to_live
+
+    def conditional_headers(self) -> dict[str, str]:
+        """returns the headers that ask the website to answer 304 if the page has not changed"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def calculate_checksum(population_ranks: dict[str, int]) -> str:
+    """returns a SHA-256 checksum of the ranks that does not depend on key order
+
+    Arguments:
+        population_ranks: a dictionary that maps each U.S. state to its population rank
+    """
+    canonical_text = json.dumps(population_ranks, sort_keys = True, separators = (",", ":"))
+    return hashlib.sha256(canonical_text.encode("utf-8")).hexdigest()
+
+
+def load_cache(file_name: str = CACHE_FILE_NAME) -> CacheEntry | None:
+    """reads the cache file
+
+    Arguments:
+        file_name: the path of the cache file
+
+    Returns:
+        the cached snapshot, or None if the file is missing or corrupt (corrupt files are counted)
+    """
+    try:
+        with open(file_name, "r", encoding = "utf-8") as cache_file:
+            contents = json.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        record_event("corrupt")
+        return None
+
+    #check everything that could be wrong with the file before trusting it
+    try:
+        population_ranks = contents["population_ranks"]
+        valid = (contents["version"] == CACHE_FORMAT_VERSION
+            and isinstance(population_ranks, dict)
+            and all(isinstance(state, str) and type(rank) is int for state, rank in population_ranks.items())
+            and contents["checksum"] == calculate_checksum(population_ranks))
+        entry = CacheEntry(population_ranks, float(contents["fetched_at"]), contents.get("etag"), contents.get("last_modified"))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        valid = False
+
+    if not valid:
+        record_event("corrupt")
+        return None
+    return entry
+
+
+def save_cache(entry: CacheEntry, file_name: str = CACHE_FILE_NAME):
+    """writes a snapshot to the cache file
+
+    The file is written next to the old one and then renamed over it, so a crash never leaves half a file behind.
+
+    Arguments:
+        entry: the snapshot to write
+        file_name: the path of the cache file
+    """
+    contents = {
+        "version": CACHE_FORMAT_VERSION,
+        "fetched_at": entry.fetched_at,
+        "etag": entry.etag,
+        "last_modified": entry.last_modified,
+        "checksum": calculate_checksum(entry.population_ranks),
+        "population_ranks": entry.population_ranks,
+    }
+    _write_json_atomically(contents, file_name)
+
+
+def _write_json_atomically(contents: dict, file_name: str):
+    """writes a dictionary as json by renaming a temporary file over the destination
+
+    Arguments:
+        contents: the dictionary to write
+        file_name: the path of the destination file
+    """
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok = True)
+    temporary_file_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary_file_name, "w", encoding = "utf-8") as temporary_file:
+        json.dump(contents, temporary_file)
+    os.replace(temporary_file_name, file_name)
+
+
+def _load_statistics(file_name: str = STATISTICS_FILE_NAME) -> dict[str, int]:
+    """reads the cache counters, starting from zero if the file is missing or unreadable
+
+    Arguments:
+        file_name: the path of the statistics file
+    """
+    counters = dict.fromkeys(STATISTIC_NAMES, 0)
+    try:
+        with open(file_name, "r", encoding = "utf-8") as statistics_file:
+            stored_counters = json.load(statistics_file)
+        for name in STATISTIC_NAMES:
+            if type(stored_counters.get(name)) is int:
+                counters[name] = stored_counters[name]
+    except (OSError, ValueError, AttributeError):
+        pass
+    return counters
+
+
+def record_event(name: str, file_name: str = STATISTICS_FILE_NAME):
+    """adds one to a cache counter in memory; save_statistics adds it to the file at exit
+
+    Arguments:
+        name: one of STATISTIC_NAMES
+        file_name: the path of the statistics file
+    """
+    with _statistics_lock:
+        if not _pending_events_by_file_name:
+            atexit.register(save_statistics)
+        pending_events = _pending_events_by_file_name.setdefault(file_name, dict.fromkeys(STATISTIC_NAMES, 0))
+        pending_events[name] += 1
+
+        #statistics, once read, keeps counting along with the default file's events
+        if file_name == STATISTICS_FILE_NAME and "statistics" in globals():
+            globals()["statistics"][name] += 1
+
+
+def save_statistics():
+    """adds every event counted so far to what its statistics file holds now; failing to save them never stops the quiz
+
+    Launches that exit at the same time take turns through a lock file, so none of them overwrites another's events.
+    """
+    with _statistics_lock:
+        for file_name, pending_events in list(_pending_events_by_file_name.items()):
+            lock_file_name = _lock_statistics_file(file_name)
+            try:
+                counters = _load_statistics(file_name)
+                for name, count in pending_events.items():
+                    counters[name] += count
+                _write_json_atomically(counters, file_name)
+            except OSError:
+                continue
+            finally:
+                if lock_file_name is not None:
+                    _unlock_statistics_file(lock_file_name)
+            del _pending_events_by_file_name[file_name]
+
+
+def _lock_statistics_file(file_name: str) -> str | None:
+    """creates the statistics file's lock file, waiting for another process's save, and returns its path
+
+    Returns:
+        the lock file's path, or None if it could not be taken in time (the save then goes ahead without it)
+    """
+    lock_file_name = f"{file_name}.lock"
+    deadline = time.monotonic() + STATISTICS_LOCK_TIMEOUT
+    while True:
+        try:
+            os.makedirs(os.path.dirname(lock_file_name) or ".", exist_ok = True)
+            os.close(os.open(lock_file_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return lock_file_name
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_file_name) > STATISTICS_LOCK_TIMEOUT:
+                    os.remove(lock_file_name)
+                    continue
+            except OSError:
+                pass
+        except OSError:
+            return None
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.005)
+
+
+def _unlock_statistics_file(lock_file_name: str):
+    """removes a lock file taken by _lock_statistics_file"""
+    try:
+        os.remove(lock_file_name)
+    except OSError:
+        pass
+
+
+def __getattr__(name: str):
+    """reads the counters from disk the first time statistics is used, so importing this file touches no files"""
+    if name == "statistics":
+        with _statistics_lock:
+            #counters from every launch so far (a launch that was served from the cache adds one hit and no misses)
+            if "statistics" not in globals():
+                counters = _load_statistics()
+                for name, count in _pending_events_by_file_name.get(STATISTICS_FILE_NAME, {}).items():
+                    counters[name] += count
+                globals()["statistics"] = counters
+            return globals()["statistics"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,96 @@
+"""This file compares the BeautifulSoup and streaming population rank parsers on a saved copy of the WorldPopulationReview page.
+
+Both parsers must produce the same dictionary_of_population_ranks; the benchmark stops if they do not.
+
+Usage (from the repository root):
+    python src/Population_Rank_Parser_Benchmark.py [--fixture PATH] [--repeats N]
+"""
+
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+import Population_Rank_Web_Scraper
+
+FIXTURE_FILE_NAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "fixtures", "worldpopulationreview_states.html")
+
+#the parsers that are compared, by the name shown in the report
+PARSERS = {
+    "beautifulsoup": Population_Rank_Web_Scraper.parse_population_ranks,
+    "streaming": Population_Rank_Web_Scraper.parse_population_ranks_streaming,
+}
+
+
+def measure_parse_time(parser, page_text: str, repeats: int) -> list[float]:
+    """returns how long (in seconds) each of several parses took
+
+    Arguments:
+        parser: a function that takes the page text and returns the population ranks
+        page_text: the html of the page
+        repeats: how many times to parse the page
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        parser(page_text)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def measure_peak_memory(parser, page_text: str) -> int:
+    """returns the most memory (in bytes) allocated at once during a single parse
+
+    Arguments:
+        parser: a function that takes the page text and returns the population ranks
+        page_text: the html of the page
+    """
+    tracemalloc.start()
+    try:
+        parser(page_text)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_memory
+
+
+def run_benchmark(fixture_file_name: str = FIXTURE_FILE_NAME, repeats: int = 20) -> dict[str, dict[str, float]]:
+    """parses the fixture with every parser and returns the timings and peak memory of each
+
+    Arguments:
+        fixture_file_name: the path of the saved html page
+        repeats: how many timed parses to run per parser
+
+    Returns:
+        a dictionary that maps each parser's name to its median time, best time (both in seconds) and peak memory (in bytes)
+    """
+    with open(fixture_file_name, "r", encoding = "utf-8") as fixture_file:
+        page_text = fixture_file.read()
+
+    #the parsers are only comparable if they agree
+    results = {name: parser(page_text) for name, parser in PARSERS.items()}
+    if len({tuple(sorted(population_ranks.items())) for population_ranks in results.values()}) != 1:
+        raise AssertionError("The parsers disagree on the population ranks.")
+
+    report = {}
+    for name, parser in PARSERS.items():
+        timings = measure_parse_time(parser, page_text, repeats)
+        report[name] = {
+            "median_seconds": statistics.median(timings),
+            "best_seconds": min(timings),
+            "peak_memory_bytes": measure_peak_memory(parser, page_text),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Compare the population rank parsers on a saved page.")
+    argument_parser.add_argument("--fixture", default = FIXTURE_FILE_NAME, help = "the saved html page to parse")
+    argument_parser.add_argument("--repeats", type = int, default = 20, help = "how many timed parses to run per parser")
+    arguments = argument_parser.parse_args()
+
+    report = run_benchmark(arguments.fixture, arguments.repeats)
+
+    print(f"{'parser':<15}{'median (ms)':>14}{'best (ms)':>12}{'peak memory (KiB)':>20}")
+    for name, measurements in report.items():
+        print(f"{name:<15}{measurements['median_seconds'] * 1000:>14.2f}{measurements['best_seconds'] * 1000:>12.2f}{measurements['peak_memory_bytes'] / 1024:>20.1f}")
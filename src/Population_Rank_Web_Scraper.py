@@ -1,42 +1,145 @@
 """This file uses a table from WorldPopulationReview to gather a state's population rank.
 
+Nothing is downloaded when this file is imported, and requests and bs4 are only imported once a download or a
+BeautifulSoup parse actually happens, so a launch served from the cache never loads them. Until a fetch succeeds, the backup dictionary is in use,
+so the GUI can open right away and swap in the fresh ranks once they arrive.
+Fetches go through Population_Rank_Cache, so fresh cached ranks need no network and stale ones only need a 304.
+If rank_sources is set, downloads go to every one of those sources at once through Rank_Source_Fetcher instead.
+
 Exports:
     dictionary_of_population_ranks: a dictionary that maps each U.S. state to its population rank
     backup_dictionary_used: a boolean that indicates if the backup dictionary is in use
+    fetch_in_progress: a boolean that indicates if a background fetch is still running
+    timing_hook: None, or called with ("rank_fetch" or "rank_parse", nanoseconds) after every fetch and parse
+    rank_sources: None, or a list of Rank_Source_Fetcher.RankSource to download from concurrently instead of URL
+    rank_source_strategy: how the ranks are picked from rank_sources ("first" or "quorum")
+    last_fetch_outcome: how the last multi-source download went (which source won, every source's timing), or None
+    last_fetch_error: why the last fetch fell back to stale or backup ranks, or None
+    parse_population_ranks_streaming: reads the ranks from the page without building a document tree
+    refresh_population_ranks: fetches the ranks on the calling thread
+    start_background_fetch: fetches the ranks on a worker thread with a hard timeout
 
 Use Cases:
     dictionary_of_population_ranks["California"] == 1
 """
 
-import requests
-import bs4
+import codecs
+import html.parser
+import threading
+import time
 import States_and_State_Capitals_Reader
+import Population_Rank_Cache
+
+URL = "https://worldpopulationreview.com/states"
+
+#the longest a fetch may take (in seconds) before the backup dictionary is kept for this run
+FETCH_TIMEOUT = 5
+
+#the table's information from 9:04 p.m. Central Time on January 21st, 2021
+BACKUP_DICTIONARY_OF_POPULATION_RANKS = {'California': 1, 'Texas': 2, 'Florida': 3, 'New York': 4, 'Pennsylvania': 5,
+    'Illinois': 6, 'Ohio': 7, 'Georgia': 8, 'North Carolina': 9, 'Michigan': 10,
+    'New Jersey': 11, 'Virginia': 12, 'Washington': 13, 'Arizona': 14, 'Tennessee': 15,
+    'Massachusetts': 16, 'Indiana': 17, 'Missouri': 18, 'Maryland': 19, 'Colorado': 20,
+    'Wisconsin': 21, 'Minnesota': 22, 'South Carolina': 23, 'Alabama': 24, 'Louisiana': 25,
+    'Kentucky': 26, 'Oregon': 27, 'Oklahoma': 28, 'Connecticut': 29, 'Utah': 30,
+    'Nevada': 31, 'Iowa': 32, 'Arkansas': 33, 'Mississippi': 34, 'Kansas': 35,
+    'New Mexico': 36, 'Nebraska': 37, 'Idaho': 38, 'West Virginia': 39, 'Hawaii': 40,
+    'New Hampshire': 41, 'Maine': 42, 'Montana': 43, 'Rhode Island': 44, 'Delaware': 45,
+    'South Dakota': 46, 'North Dakota': 47, 'Alaska': 48, 'Vermont': 49, 'Wyoming': 50
+}
 
 #this dictionary maps a state to its population
-dictionary_of_population_ranks = {}
+dictionary_of_population_ranks = dict(BACKUP_DICTIONARY_OF_POPULATION_RANKS)
 
-#intialize request
-URL = "https://worldpopulationreview.com/states"
-URL_page_request = requests.get(URL)
-URL_page_text = URL_page_request.text
+#indicate that the backup dictionary is used until a fetch succeeds (used for the GUI)
+backup_dictionary_used = True
+fetch_in_progress = False
 
-soup = bs4.BeautifulSoup(URL_page_text, "html.parser")
+#guards the exports above, since a worker thread and a watchdog timer can both try to finish a fetch
+_fetch_lock = threading.Lock()
+_fetch_generation = 0
+
+#the instrumentation hook (such as QuizTelemetry.record); it may be called from the fetch thread
+timing_hook = None
+
+#several sources fetched at once instead of URL alone, and what the last fetch did
+rank_sources = None
+rank_source_strategy = "first"
+last_fetch_outcome = None
+last_fetch_error = None
+
+
+class _TableFinished(Exception):
+    """raised inside PopulationRankTableParser to stop reading once the first table closes"""
 
-#attempt to find the data on the website
-try: 
-    #locate the desired table using its html tag and class
-    #this returns a list, so access the first element
-    desired_table = soup.find_all("table")[0]
 
-    table_rows = desired_table.find_all("tr")
+class PopulationRankTableParser(html.parser.HTMLParser):
+    """This class reads the cells of the first table on a page from a stream of html, without building a document tree.
 
+    Attributes:
+        rows: a list with one list of cleaned cell texts for every row of the first table
+        finished: if the first table has been closed, after which nothing else is read
+    """
+    def __init__(self):
+        "initializes the PopulationRankTableParser class"
+        super().__init__(convert_charrefs = True)
+        self.rows = []
+        self.finished = False
+        self._table_depth = 0
+        self._current_row = None
+        self._current_cell = None
+
+    def feed(self, data: str):
+        """reads more of the page, ignoring everything after the first table closes"""
+        if self.finished:
+            return
+        try:
+            super().feed(data)
+        except _TableFinished:
+            self.finished = True
+
+    def handle_starttag(self, tag, attrs):
+        "tracks when the first table, its rows and its data cells open"
+        if tag == "table":
+            self._table_depth += 1
+        elif self._table_depth == 1 and tag == "tr":
+            self._current_row = []
+        elif self._table_depth == 1 and tag == "td" and self._current_row is not None:
+            self._current_cell = []
+
+    def handle_endtag(self, tag):
+        "tracks when the first table, its rows and its data cells close"
+        if tag == "table" and self._table_depth > 0:
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                raise _TableFinished
+        elif self._table_depth == 1 and tag == "td" and self._current_cell is not None:
+            self._current_row.append("".join(self._current_cell).strip())
+            self._current_cell = None
+        elif self._table_depth == 1 and tag == "tr" and self._current_row is not None:
+            self.rows.append(self._current_row)
+            self._current_row = None
+
+    def handle_data(self, data):
+        "collects the text inside a data cell, including text inside links"
+        if self._current_cell is not None:
+            self._current_cell.append(data)
+
+
+def _population_ranks_from_rows(rows) -> dict[str, int]:
+    """turns the rows of the WorldPopulationReview table into population ranks
+
+    Arguments:
+        rows: an iterable of lists of cleaned cell texts, one list per table row
+
+    Returns:
+        a dictionary that maps each U.S. state to its population rank
+    """
     #because the table includes Puerto Rico and DC, track if they have been parsed and manually adjust all ranks in response
     adjustment_factor = 0
+    population_ranks = {}
 
-    for row in table_rows:
-        table_cells = row.find_all("td")
-        list_of_table_cells = [cell.text.strip() for cell in table_cells] #convert a row's contents into a list after cleaning it with .strip()
-
+    for list_of_table_cells in rows:
         #ignore empty lists
         if len(list_of_table_cells) == 0:
             continue
@@ -49,24 +152,304 @@ try:
         #pull useful information from row
         state = list_of_table_cells[1]
         population_rank = int(list_of_table_cells[0]) - adjustment_factor
-        dictionary_of_population_ranks[state] = population_rank
-
-        #indicate that a backup dictionary was not used (used for the GUI)
-        backup_dictionary_used = False
-
-#if the table search fails for any reason, use a backup dictionary that contains the table's information from 9:04 p.m. Central Time on January 21st, 2021
-except:
-    dictionary_of_population_ranks = {'California': 1, 'Texas': 2, 'Florida': 3, 'New York': 4, 'Pennsylvania': 5,
-        'Illinois': 6, 'Ohio': 7, 'Georgia': 8, 'North Carolina': 9, 'Michigan': 10,
-        'New Jersey': 11, 'Virginia': 12, 'Washington': 13, 'Arizona': 14, 'Tennessee': 15,
-        'Massachusetts': 16, 'Indiana': 17, 'Missouri': 18, 'Maryland': 19, 'Colorado': 20,
-        'Wisconsin': 21, 'Minnesota': 22, 'South Carolina': 23, 'Alabama': 24, 'Louisiana': 25,
-        'Kentucky': 26, 'Oregon': 27, 'Oklahoma': 28, 'Connecticut': 29, 'Utah': 30,
-        'Nevada': 31, 'Iowa': 32, 'Arkansas': 33, 'Mississippi': 34, 'Kansas': 35,
-        'New Mexico': 36, 'Nebraska': 37, 'Idaho': 38, 'West Virginia': 39, 'Hawaii': 40,
-        'New Hampshire': 41, 'Maine': 42, 'Montana': 43, 'Rhode Island': 44, 'Delaware': 45,
-        'South Dakota': 46, 'North Dakota': 47, 'Alaska': 48, 'Vermont': 49, 'Wyoming': 50
-    }
-
-    #indicate that the backup dictionary was used (used for the GUI)
-    backup_dictionary_used = True
\ No newline at end of file
+        population_ranks[state] = population_rank
+
+    #a partial table would leave some questions without a rank
+    if len(population_ranks) != len(States_and_State_Capitals_Reader.list_of_state_names):
+        raise ValueError("The population rank table is missing states.")
+
+    return population_ranks
+
+
+def parse_population_ranks(page_text: str) -> dict[str, int]:
+    """reads the population ranks out of the WorldPopulationReview page by building a full BeautifulSoup tree
+
+    Arguments:
+        page_text: the html of the page
+
+    Returns:
+        a dictionary that maps each U.S. state to its population rank
+    """
+    import bs4
+
+    soup = bs4.BeautifulSoup(page_text, "html.parser")
+
+    #locate the desired table using its html tag and class
+    #this returns a list, so access the first element
+    desired_table = soup.find_all("table")[0]
+
+    #convert each row's contents into a list after cleaning it with .strip()
+    table_rows = ([cell.text.strip() for cell in row.find_all("td")] for row in desired_table.find_all("tr"))
+    return _population_ranks_from_rows(table_rows)
+
+
+def parse_population_ranks_streaming(page_chunks) -> dict[str, int]:
+    """reads the population ranks out of the WorldPopulationReview page, stopping as soon as the first table closes
+
+    This gives the same result as parse_population_ranks but never holds more than the table's cells in memory,
+    and when the chunks come straight from the network, the rest of the page is never downloaded.
+
+    Arguments:
+        page_chunks: the html of the page, either as one string or as an iterable of strings
+
+    Returns:
+        a dictionary that maps each U.S. state to its population rank
+    """
+    if isinstance(page_chunks, str):
+        page_chunks = (page_chunks,)
+
+    #only the time spent parsing is reported, not the time spent waiting on the chunks to download
+    parse_time = 0
+    table_parser = PopulationRankTableParser()
+    for chunk in page_chunks:
+        start = time.perf_counter_ns()
+        table_parser.feed(chunk)
+        parse_time += time.perf_counter_ns() - start
+        if table_parser.finished:
+            break
+
+    if timing_hook is not None:
+        timing_hook("rank_parse", parse_time)
+
+    if not table_parser.finished:
+        raise ValueError("The population rank table was not found.")
+    return _population_ranks_from_rows(table_parser.rows)
+
+
+def _iterate_page_text(URL_page_request: "requests.Response", chunk_size: int = 16384):
+    """yields the text of a streamed response a chunk at a time, decoding it incrementally
+
+    Arguments:
+        URL_page_request: a response requested with stream = True
+        chunk_size: how many bytes to read at a time
+    """
+    decoder = codecs.getincrementaldecoder(URL_page_request.encoding or "utf-8")(errors = "replace")
+    for chunk in URL_page_request.iter_content(chunk_size = chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final = True)
+
+
+def load_cached_population_ranks() -> Population_Rank_Cache.CacheEntry | None:
+    """reads the cached population ranks, returning None if there is no usable cache"""
+    cached_entry = Population_Rank_Cache.load_cache()
+
+    #a cache written for a different list of states is as useless as a corrupt one
+    if cached_entry is not None and set(cached_entry.population_ranks) != set(States_and_State_Capitals_Reader.list_of_state_names):
+        Population_Rank_Cache.record_event("corrupt")
+        return None
+    return cached_entry
+
+
+def fetch_population_ranks(timeout: float = FETCH_TIMEOUT, cached_entry: Population_Rank_Cache.CacheEntry | None = None) -> dict[str, int]:
+    """returns the population ranks from the cache or the website, raising an exception if neither has them
+
+    A fresh cache is returned without any network access. A stale cache is revalidated with a conditional request,
+    and is still used if the website cannot be reached. Otherwise the page is downloaded, parsed and cached.
+
+    Arguments:
+        timeout: how long (in seconds) to wait on the connection and on each read
+        cached_entry: an already loaded cache entry; the cache file is read if this is None
+    """
+    if cached_entry is None:
+        cached_entry = load_cached_population_ranks()
+
+    if cached_entry is not None and cached_entry.is_fresh():
+        Population_Rank_Cache.record_event("hit")
+        return cached_entry.population_ranks
+
+    if rank_sources:
+        return _fetch_from_rank_sources(cached_entry)
+
+    headers = cached_entry.conditional_headers() if cached_entry is not None else {}
+
+    try:
+        #imported here because it takes longer to import than the rest of the quiz put together
+        import requests
+
+        #stream the page so the download stops once the table has been read
+        with requests.get(URL, timeout = timeout, headers = headers, stream = True) as URL_page_request:
+            response_headers = URL_page_request.headers
+
+            #the page has not changed since the cached ranks were parsed
+            if URL_page_request.status_code == 304 and cached_entry is not None:
+                cached_entry.fetched_at = time.time()
+                cached_entry.etag = response_headers.get("ETag", cached_entry.etag)
+                cached_entry.last_modified = response_headers.get("Last-Modified", cached_entry.last_modified)
+                _save_cache(cached_entry)
+                Population_Rank_Cache.record_event("revalidation")
+                return cached_entry.population_ranks
+
+            URL_page_request.raise_for_status()
+            population_ranks = parse_population_ranks_streaming(_iterate_page_text(URL_page_request))
+
+    #stale ranks are closer to the truth than the backup dictionary
+    except Exception as error:
+        if cached_entry is None:
+            raise
+        _record_fetch_error(error)
+        Population_Rank_Cache.record_event("stale_served")
+        return cached_entry.population_ranks
+
+    _save_cache(Population_Rank_Cache.CacheEntry(population_ranks, time.time(), response_headers.get("ETag"), response_headers.get("Last-Modified")))
+    Population_Rank_Cache.record_event("miss")
+    return population_ranks
+
+
+def _fetch_from_rank_sources(cached_entry: Population_Rank_Cache.CacheEntry | None) -> dict[str, int]:
+    """downloads the ranks from every one of rank_sources at once, falling back to stale cached ranks if none are picked
+
+    Arguments:
+        cached_entry: the (stale) cache entry, or None
+    """
+    global last_fetch_outcome
+    import Rank_Source_Fetcher
+
+    try:
+        outcome = Rank_Source_Fetcher.fetch_from_sources(rank_sources, rank_source_strategy)
+    except Rank_Source_Fetcher.RankFetchError as error:
+        if cached_entry is None:
+            raise
+        _record_fetch_error(error)
+        Population_Rank_Cache.record_event("stale_served")
+        return cached_entry.population_ranks
+
+    last_fetch_outcome = outcome
+    _save_cache(Population_Rank_Cache.CacheEntry(outcome.population_ranks, time.time()))
+    Population_Rank_Cache.record_event("miss")
+    return outcome.population_ranks
+
+
+def _record_fetch_error(error: Exception):
+    """keeps why a fetch fell back, so it can be reported instead of silently using older ranks
+
+    Arguments:
+        error: what went wrong
+    """
+    global last_fetch_error
+    last_fetch_error = f"{type(error).__name__}: {error}"
+
+
+def _fetch_and_time(timeout: float, cached_entry: Population_Rank_Cache.CacheEntry | None = None) -> dict[str, int]:
+    """calls fetch_population_ranks, reporting how long it took (even if it failed) to the timing hook
+
+    Arguments:
+        timeout: how long (in seconds) to wait on the connection and on each read
+        cached_entry: an already loaded cache entry; the cache file is read if this is None
+    """
+    start = time.perf_counter_ns()
+    try:
+        return fetch_population_ranks(timeout, cached_entry)
+    finally:
+        if timing_hook is not None:
+            timing_hook("rank_fetch", time.perf_counter_ns() - start)
+
+
+def _save_cache(cached_entry: Population_Rank_Cache.CacheEntry):
+    """writes the cache, ignoring failures since the ranks can always be downloaded again
+
+    Arguments:
+        cached_entry: the snapshot to write
+    """
+    try:
+        Population_Rank_Cache.save_cache(cached_entry)
+    except OSError:
+        pass
+
+
+def _finish_fetch(generation: int, population_ranks: dict[str, int] | None) -> bool:
+    """publishes the result of a fetch, returning False if the fetch was already finished or replaced
+
+    Arguments:
+        generation: which call to start_background_fetch the result belongs to
+        population_ranks: the fetched ranks, or None if the fetch failed or timed out
+    """
+    global dictionary_of_population_ranks, backup_dictionary_used, fetch_in_progress
+
+    with _fetch_lock:
+        if generation != _fetch_generation or not fetch_in_progress:
+            return False
+
+        fetch_in_progress = False
+        if population_ranks is not None:
+            dictionary_of_population_ranks = population_ranks
+            backup_dictionary_used = False
+        return True
+
+
+def refresh_population_ranks(timeout: float = FETCH_TIMEOUT) -> bool:
+    """fetches the population ranks on the calling thread, keeping the backup dictionary if the fetch fails
+
+    Arguments:
+        timeout: how long (in seconds) to wait on the connection and on each read
+
+    Returns:
+        True if the fetched ranks are now in use
+    """
+    global fetch_in_progress, _fetch_generation
+
+    with _fetch_lock:
+        _fetch_generation += 1
+        generation = _fetch_generation
+        fetch_in_progress = True
+
+    #if the table search fails for any reason, keep the backup dictionary
+    try:
+        population_ranks = _fetch_and_time(timeout)
+    except Exception as error:
+        _record_fetch_error(error)
+        population_ranks = None
+
+    _finish_fetch(generation, population_ranks)
+    return population_ranks is not None
+
+
+def start_background_fetch(on_complete = None, timeout: float = FETCH_TIMEOUT) -> threading.Thread | None:
+    """fetches the population ranks on a worker thread
+
+    The fetch is abandoned after timeout seconds even if the worker is still stuck (for example on DNS),
+    in which case the backup dictionary stays in use and the late result is ignored.
+
+    Arguments:
+        on_complete: called with True (fetched ranks in use) or False (backup kept) once the fetch finishes;
+            it runs on the worker or watchdog thread, so it must not touch tkinter widgets
+        timeout: the hard limit (in seconds) on the whole fetch
+
+    Returns:
+        the worker thread, or None if fresh cached ranks were used without starting one
+    """
+    global fetch_in_progress, _fetch_generation
+
+    with _fetch_lock:
+        _fetch_generation += 1
+        generation = _fetch_generation
+        fetch_in_progress = True
+
+    def finish(population_ranks):
+        if _finish_fetch(generation, population_ranks) and on_complete is not None:
+            on_complete(population_ranks is not None)
+
+    #fresh cached ranks are used right away, before the GUI shows the backup dictionary message
+    start = time.perf_counter_ns()
+    cached_entry = load_cached_population_ranks()
+    if cached_entry is not None and cached_entry.is_fresh():
+        Population_Rank_Cache.record_event("hit")
+        if timing_hook is not None:
+            timing_hook("rank_fetch", time.perf_counter_ns() - start)
+        finish(cached_entry.population_ranks)
+        return None
+
+    def work():
+        try:
+            population_ranks = _fetch_and_time(timeout, cached_entry)
+        except Exception as error:
+            _record_fetch_error(error)
+            population_ranks = None
+        watchdog.cancel()
+        finish(population_ranks)
+
+    watchdog = threading.Timer(timeout, finish, args = (None,))
+    watchdog.daemon = True
+    worker = threading.Thread(target = work, name = "population-rank-fetch", daemon = True)
+    watchdog.start()
+    worker.start()
+    return worker
@@ -0,0 +1,454 @@
+"""This file keeps the question bank as one object that can be reloaded while the quiz runs, so editing the .csv file or
+receiving new population ranks no longer needs a restart.
+
+A QuestionBank is one version of everything a quiz needs: the states and capitals, the population ranks, the questions,
+the answer index and the distractor index. Versions are never edited. A reload works out which states were added,
+removed or changed (a new capital or a new population rank), builds only those questions and index entries, and swaps
+the new version in with one assignment. A quiz that started on the old version keeps grading against it, since
+QuizSession holds on to the answer index and distractor index it started with.
+
+The sources are polled: the .csv file's modification time, size and inode (one os.stat), and whether
+Population_Rank_Web_Scraper.dictionary_of_population_ranks was replaced by a fetch. A changed .csv file still has to be
+read in full, and a replaced ranking is compared in full (at C speed, position by position when the order is unchanged),
+but everything after that scales with the number of changed states: only their questions are built, only their
+capitals are normalized, and only the distractor candidates around them are worked out again.
+
+Exports:
+    QuestionBank: a class that holds one version of the question bank
+    ReloadableQuestionBank: a class that holds the current version, reloads it when a source changes and publishes it
+    ReloadReport: a class that describes what one reload changed
+    build_question_bank: builds a version from scratch
+    capture_question_bank: wraps what the modules already loaded into a version, building nothing again
+
+Use Cases:
+    question_bank = ReloadableQuestionBank(capture_question_bank())
+    question_bank.start_watching()
+    session = Quiz_Session.QuizSession(10, question_bank = question_bank.current)
+
+Usage (from the repository root):
+    python src/Question_Bank.py --watch [--interval SECONDS]    (prints what every reload changed)
+    python src/Question_Bank.py --benchmark [--sizes 50 100000] [--changes 1 100]
+"""
+
+import argparse
+import itertools
+import operator
+import os
+import random
+import threading
+import time
+import Answer_Index
+import Distractor_Index
+import Population_Rank_Web_Scraper
+import Questions
+import States_and_State_Capitals_Reader
+
+#how often (in seconds) the sources are checked for changes
+DEFAULT_POLL_INTERVAL = 2.0
+
+#a reload that changes more than this fraction of the states builds the new version from scratch instead
+FULL_REBUILD_FRACTION = 0.25
+
+
+class ReloadReport:
+    """This class describes what one reload changed.
+
+    Attributes:
+        version: the version the reload created
+        added_states: the states that were not in the previous version
+        removed_states: the states that are no longer in the table
+        changed_states: the states whose capital or population rank changed
+        seconds: how long working out and building the new version took (reading the .csv file not included)
+    """
+    def __init__(self, version: int, added_states: tuple[str, ...], removed_states: tuple[str, ...], changed_states: tuple[str, ...], seconds: float):
+        "initializes the ReloadReport class"
+        self.version = version
+        self.added_states = added_states
+        self.removed_states = removed_states
+        self.changed_states = changed_states
+        self.seconds = seconds
+
+    @property
+    def changed(self) -> bool:
+        """True if any state was added, removed or changed"""
+        return bool(self.added_states or self.removed_states or self.changed_states)
+
+    def create_report_text(self, maximum_names: int = 5) -> str:
+        """returns one line that counts the changes and names the first few of each kind
+
+        Arguments:
+            maximum_names: how many states of each kind to name
+        """
+        parts = []
+        for description, states in (("added", self.added_states), ("removed", self.removed_states), ("changed", self.changed_states)):
+            names = ", ".join(states[:maximum_names]) + (", ..." if len(states) > maximum_names else "")
+            parts.append(f"{len(states)} {description}" + (f" ({names})" if states else ""))
+        return f"version {self.version}: {'; '.join(parts)} in {self.seconds * 1000:.2f} ms"
+
+
+class QuestionBank:
+    """This class holds one version of the question bank; nothing in it is edited once it is built.
+
+    Attributes:
+        version: which version this is (1 for the first, one more for every reload that changed something)
+        list_of_state_names: the states, in the table's order
+        list_of_state_capitals: each state's capital, in the same order
+        dictionary_of_states: a dict that maps each state capital to its state
+        dictionary_of_state_capitals: a dict that maps each state to its state capital
+        dictionary_of_population_ranks: the population ranks the questions were built from
+        list_of_questions: one Question per state, in the table's order
+        answer_index: an Answer_Index.AnswerIndex of the capitals
+        distractor_index: a Distractor_Index.DistractorIndex of the questions, built the first time it is used
+    """
+    def __init__(self, version: int, list_of_state_names: list[str], list_of_state_capitals: list[str], dictionary_of_states: dict[str, str],
+            dictionary_of_state_capitals: dict[str, str], dictionary_of_population_ranks: dict[str, int], list_of_questions: list[Questions.Question],
+            answer_index: Answer_Index.AnswerIndex, distractor_index: Distractor_Index.DistractorIndex | None = None, positions_by_state: dict[str, int] | None = None):
+        "initializes the QuestionBank class"
+        self.version = version
+        self.list_of_state_names = list_of_state_names
+        self.list_of_state_capitals = list_of_state_capitals
+        self.dictionary_of_states = dictionary_of_states
+        self.dictionary_of_state_capitals = dictionary_of_state_capitals
+        self.dictionary_of_population_ranks = dictionary_of_population_ranks
+        self.list_of_questions = list_of_questions
+        self.answer_index = answer_index
+        self._distractor_index = distractor_index
+        self._distractor_index_lock = threading.Lock()
+
+        #where each state's question is, so a reload that keeps the order replaces questions in place
+        if positions_by_state is None:
+            positions_by_state = {question.state: position for position, question in enumerate(list_of_questions)}
+        self._positions_by_state = positions_by_state
+
+    @property
+    def distractor_index(self) -> Distractor_Index.DistractorIndex:
+        """the distractor index of the questions; only versions that ask multiple-choice questions ever build one"""
+        with self._distractor_index_lock:
+            if self._distractor_index is None:
+                self._distractor_index = Distractor_Index.get_distractor_index(self.list_of_questions)
+            return self._distractor_index
+
+    def create_next_version(self, list_of_state_names: list[str], list_of_state_capitals: list[str], dictionary_of_population_ranks: dict[str, int]) -> tuple["QuestionBank", ReloadReport]:
+        """builds the version for new sources, rebuilding only the questions and index entries of states that changed
+
+        Arguments:
+            list_of_state_names: the states, in the table's order
+            list_of_state_capitals: each state's capital, in the same order
+            dictionary_of_population_ranks: a dictionary that maps each U.S. state to its population rank
+
+        Returns:
+            question_bank: the new version (this version itself if nothing changed)
+            report: what changed
+
+        Raises:
+            ValueError: if a state in the table has no population rank
+        """
+        start = time.perf_counter()
+        same_states = list_of_state_names == self.list_of_state_names
+        if same_states and list_of_state_capitals == self.list_of_state_capitals:
+            list_of_state_names, list_of_state_capitals = self.list_of_state_names, self.list_of_state_capitals
+            dictionary_of_state_capitals = self.dictionary_of_state_capitals
+            changed_capitals = {}
+            removed_states = set()
+        elif same_states:
+            #the same rows with some capitals edited: compared position by position, without building any sets
+            changed_positions = itertools.compress(itertools.count(), map(operator.ne, list_of_state_capitals, self.list_of_state_capitals))
+            changed_capitals = {list_of_state_names[position]: list_of_state_capitals[position] for position in changed_positions}
+            dictionary_of_state_capitals = self.dictionary_of_state_capitals | changed_capitals
+            removed_states = set()
+        else:
+            dictionary_of_state_capitals = dict(zip(list_of_state_names, list_of_state_capitals))
+            changed_capitals = dict(dictionary_of_state_capitals.items() - self.dictionary_of_state_capitals.items())
+            removed_states = self.dictionary_of_state_capitals.keys() - dictionary_of_state_capitals.keys()
+
+        #only ranks that changed for states still in the table need new questions
+        changed_ranks = set()
+        old_ranks = self.dictionary_of_population_ranks
+        if dictionary_of_population_ranks is not old_ranks and dictionary_of_population_ranks != old_ranks:
+            #a fetch usually lists the same states in the same order, so the ranks are compared position by position
+            if list(dictionary_of_population_ranks) == list(old_ranks):
+                changed_rank_states = itertools.compress(dictionary_of_population_ranks, map(operator.ne, dictionary_of_population_ranks.values(), old_ranks.values()))
+            else:
+                changed_rank_states = itertools.compress(dictionary_of_population_ranks, map(operator.ne, dictionary_of_population_ranks.values(),
+                    map(old_ranks.get, dictionary_of_population_ranks)))
+                lost_ranks = [state for state in old_ranks if state not in dictionary_of_population_ranks and state in dictionary_of_state_capitals]
+                if lost_ranks:
+                    raise ValueError(f"There is no population rank for {', '.join(sorted(lost_ranks))}.")
+            changed_ranks = {state for state in changed_rank_states if state in dictionary_of_state_capitals}
+
+        changed_states = changed_capitals.keys() | changed_ranks
+        states_without_ranks = [state for state in changed_states if state not in dictionary_of_population_ranks]
+        if states_without_ranks:
+            raise ValueError(f"There is no population rank for {', '.join(sorted(states_without_ranks))}.")
+
+        added_states = tuple(sorted(state for state in changed_capitals if state not in self.dictionary_of_state_capitals))
+        report = ReloadReport(self.version + 1, added_states, tuple(sorted(removed_states)), tuple(sorted(changed_states.difference(added_states))), 0.0)
+        if not report.changed and same_states:
+            report.version = self.version
+            report.seconds = time.perf_counter() - start
+            return self, report
+
+        #past a point, patching every index costs more than building them again
+        if len(changed_states) + len(removed_states) > FULL_REBUILD_FRACTION * len(list_of_state_names):
+            question_bank = build_question_bank(list_of_state_names, list_of_state_capitals, dictionary_of_population_ranks, self.version + 1)
+            if self._distractor_index is not None:
+                question_bank._distractor_index = Distractor_Index.DistractorIndex(question_bank.list_of_questions)
+            report.seconds = time.perf_counter() - start
+            return question_bank, report
+
+        rebuilt_questions = {}
+        for state in changed_states:
+            population_rank = dictionary_of_population_ranks[state]
+            rebuilt_questions[state] = Questions.Question(state, dictionary_of_state_capitals[state], population_rank, Questions.calculate_weight(population_rank))
+
+        #the same states in the same order keep their positions; otherwise the unchanged questions are only re-listed
+        if same_states:
+            positions_by_state = self._positions_by_state
+            list_of_questions = self.list_of_questions.copy()
+            for state, question in rebuilt_questions.items():
+                list_of_questions[positions_by_state[state]] = question
+        else:
+            positions_by_state = None
+            list_of_questions = [rebuilt_questions.get(state) or self.list_of_questions[self._positions_by_state[state]] for state in list_of_state_names]
+
+        dictionary_of_states = self.dictionary_of_states
+        answer_index = self.answer_index
+        if changed_capitals or removed_states:
+            dictionary_of_states = dict(dictionary_of_states)
+            for state in removed_states | changed_capitals.keys():
+                old_capital = self.dictionary_of_state_capitals.get(state)
+                if old_capital is not None and dictionary_of_states.get(old_capital) == state:
+                    del dictionary_of_states[old_capital]
+            for state, capital in changed_capitals.items():
+                dictionary_of_states[capital] = state
+            answer_index = answer_index.updated(changed_capitals, removed_states)
+
+        #a distractor index that was never built stays unbuilt; one that was is updated around the changes
+        distractor_index = self._distractor_index
+        if distractor_index is not None and (rebuilt_questions or removed_states):
+            distractor_index = distractor_index.updated(list(rebuilt_questions.values()), removed_states)
+
+        question_bank = QuestionBank(self.version + 1, list_of_state_names, list_of_state_capitals, dictionary_of_states, dictionary_of_state_capitals,
+            dictionary_of_population_ranks, list_of_questions, answer_index, distractor_index, positions_by_state)
+        report.seconds = time.perf_counter() - start
+        return question_bank, report
+
+
+def build_question_bank(list_of_state_names: list[str], list_of_state_capitals: list[str], dictionary_of_population_ranks: dict[str, int], version: int = 1) -> QuestionBank:
+    """builds a version of a question bank from scratch
+
+    Arguments:
+        list_of_state_names: the states, in the table's order
+        list_of_state_capitals: each state's capital, in the same order
+        dictionary_of_population_ranks: a dictionary that maps each U.S. state to its population rank
+        version: which version it is
+    """
+    dictionary_of_state_capitals = dict(zip(list_of_state_names, list_of_state_capitals))
+    return QuestionBank(version, list_of_state_names, list_of_state_capitals, dict(zip(list_of_state_capitals, list_of_state_names)), dictionary_of_state_capitals,
+        dictionary_of_population_ranks, Questions.build_list_of_questions(dictionary_of_population_ranks, list_of_state_names, dictionary_of_state_capitals),
+        Answer_Index.AnswerIndex(dictionary_of_state_capitals))
+
+
+def capture_question_bank() -> QuestionBank:
+    """returns the first version made of what States_and_State_Capitals_Reader and Questions already hold, building nothing again
+
+    The ranks are read back from the questions, since a fetch may have replaced the scraper's ranks after they were built.
+    """
+    list_of_questions = Questions.list_of_questions
+    return QuestionBank(1, States_and_State_Capitals_Reader.list_of_state_names, States_and_State_Capitals_Reader.list_of_state_capitals,
+        States_and_State_Capitals_Reader.dictionary_of_states, States_and_State_Capitals_Reader.dictionary_of_state_capitals,
+        {question.state: question.population_rank for question in list_of_questions}, list_of_questions, States_and_State_Capitals_Reader.answer_index)
+
+
+def _get_file_signature(file_name: str) -> tuple[int, int, int] | None:
+    """returns what changes when a file is edited or replaced (modification time, size and inode), or None if it is missing"""
+    try:
+        file_status = os.stat(file_name)
+    except OSError:
+        return None
+    return file_status.st_mtime_ns, file_status.st_size, file_status.st_ino
+
+
+class ReloadableQuestionBank:
+    """This class holds the current version of the question bank and swaps in a new one whenever a source changes.
+
+    Attributes:
+        current: the QuestionBank new quizzes should use; it is replaced by every reload, never edited
+        csv_file_name: the .csv file of states and capitals that is watched
+        publish: if every new version is also swapped into States_and_State_Capitals_Reader, Questions and Distractor_Index
+        on_reload: called with the ReloadReport after every new version is swapped in (on the thread that reloaded), or None
+        last_report: what the last reload that changed something did, or None
+        last_error: why the last reload was rejected (the current version stays in use), or None
+    """
+    def __init__(self, question_bank: QuestionBank, csv_file_name: str = States_and_State_Capitals_Reader.CSV_FILE_NAME, publish: bool = True, on_reload = None):
+        "initializes the ReloadableQuestionBank class"
+        self.current = question_bank
+        self.csv_file_name = csv_file_name
+        self.publish = publish
+        self.on_reload = on_reload
+        self.last_report = None
+        self.last_error = None
+        self._table_signature = _get_file_signature(csv_file_name)
+        self._population_ranks = question_bank.dictionary_of_population_ranks
+        self._reload_lock = threading.Lock()
+        self._stop_event = None
+
+    def has_changed(self) -> bool:
+        """returns True if the .csv file or the scraper's population ranks changed since they were last read (one os.stat)"""
+        return (_get_file_signature(self.csv_file_name) != self._table_signature
+            or Population_Rank_Web_Scraper.dictionary_of_population_ranks is not self._population_ranks)
+
+    def reload(self, force: bool = False) -> ReloadReport | None:
+        """reads the sources that changed and swaps in a version with only the changed states rebuilt
+
+        A .csv file that cannot be read (such as one caught half written) leaves the current version in use; the reason
+        is kept in last_error and the file is read again once it changes again.
+
+        Arguments:
+            force: read the .csv file even if it looks unchanged
+
+        Returns:
+            what changed, or None if no source changed or the reload was rejected
+        """
+        with self._reload_lock:
+            table_signature = _get_file_signature(self.csv_file_name)
+            population_ranks = Population_Rank_Web_Scraper.dictionary_of_population_ranks
+            table_changed = force or table_signature != self._table_signature
+            if not table_changed and population_ranks is self._population_ranks:
+                return None
+            self._table_signature = table_signature
+            self._population_ranks = population_ranks
+
+            current = self.current
+            try:
+                if table_changed:
+                    list_of_state_names, list_of_state_capitals = States_and_State_Capitals_Reader.read_state_table(self.csv_file_name)
+                else:
+                    list_of_state_names, list_of_state_capitals = current.list_of_state_names, current.list_of_state_capitals
+                question_bank, report = current.create_next_version(list_of_state_names, list_of_state_capitals, population_ranks)
+            except Exception as error:
+                self.last_error = f"{type(error).__name__}: {error}"
+                return None
+            self.last_error = None
+            if question_bank is current:
+                return report
+
+            #one assignment swaps the version in; quizzes that already started hold on to the old one
+            self.current = question_bank
+            self.last_report = report
+            if self.publish:
+                _publish(current, question_bank)
+
+        if self.on_reload is not None:
+            self.on_reload(report)
+        return report
+
+    def start_watching(self, interval: float = DEFAULT_POLL_INTERVAL) -> threading.Thread:
+        """checks the sources every interval seconds on a daemon thread and reloads when one changed
+
+        Arguments:
+            interval: how many seconds to wait between checks
+        """
+        self.stop_watching()
+        stop_event = self._stop_event = threading.Event()
+
+        def watch():
+            while not stop_event.wait(interval):
+                if self.has_changed():
+                    self.reload()
+
+        watcher = threading.Thread(target = watch, name = "question-bank-watcher", daemon = True)
+        watcher.start()
+        return watcher
+
+    def stop_watching(self):
+        """stops the thread started by start_watching, if there is one"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+            self._stop_event = None
+
+
+def _publish(old_question_bank: QuestionBank, question_bank: QuestionBank):
+    """swaps a new version into the modules that code outside this file reads the question bank from"""
+    if question_bank.answer_index is not old_question_bank.answer_index or question_bank.list_of_state_names is not old_question_bank.list_of_state_names:
+        States_and_State_Capitals_Reader.replace(question_bank.list_of_state_names, question_bank.list_of_state_capitals, question_bank.dictionary_of_states,
+            question_bank.dictionary_of_state_capitals, question_bank.answer_index)
+    Questions.replace_list_of_questions(question_bank.list_of_questions)
+
+    #an updated distractor index is handed over, so the first multiple-choice quiz does not build it again
+    if question_bank._distractor_index is not None:
+        Distractor_Index.cache_distractor_index(question_bank.list_of_questions, question_bank._distractor_index)
+
+
+def measure_reloads(size: int, numbers_of_changes: list[int], random_generator: random.Random, repeats: int = 3) -> dict:
+    """times a full build against reloads that change a few capitals and ranks, for a synthetic bank
+
+    Both include the answer index and the distractor index, the way a multiple-choice quiz uses them.
+
+    Arguments:
+        size: how many states the synthetic bank has
+        numbers_of_changes: how many states get a new capital and a new population rank, one reload for each
+        random_generator: the source of randomness
+        repeats: how many times each reload is timed (the fastest time is kept)
+
+    Returns:
+        build_seconds: how long the full build took
+        reload_seconds: a dictionary that maps each number of changes to how long its reload took
+    """
+    import Benchmark_Suite
+    list_of_state_names, list_of_state_capitals, dictionary_of_population_ranks = Benchmark_Suite.create_synthetic_states(size, random_generator)
+
+    start = time.perf_counter()
+    question_bank = build_question_bank(list_of_state_names, list_of_state_capitals, dictionary_of_population_ranks)
+    question_bank._distractor_index = Distractor_Index.DistractorIndex(question_bank.list_of_questions)
+    build_seconds = time.perf_counter() - start
+
+    reload_seconds = {}
+    for number_of_changes in numbers_of_changes:
+        timings = []
+        for repeat in range(repeats):
+            changed_positions = random_generator.sample(range(size), min(number_of_changes, size))
+            new_list_of_state_capitals = list(list_of_state_capitals)
+            new_dictionary_of_population_ranks = dict(dictionary_of_population_ranks)
+            for position in changed_positions:
+                new_list_of_state_capitals[position] = f"Renamed {repeat} {position}"
+                new_dictionary_of_population_ranks[list_of_state_names[position]] = random_generator.randint(1, Questions.LEAST_POPULOUS_RANK)
+
+            start = time.perf_counter()
+            question_bank.create_next_version(list_of_state_names, new_list_of_state_capitals, new_dictionary_of_population_ranks)
+            timings.append(time.perf_counter() - start)
+        reload_seconds[number_of_changes] = min(timings)
+
+    return {"build_seconds": build_seconds, "reload_seconds": reload_seconds}
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Watch the question bank's sources, or time reloads against full builds.")
+    argument_parser.add_argument("--watch", action = "store_true", help = "reload whenever the .csv file or the population ranks change, printing what changed")
+    argument_parser.add_argument("--interval", type = float, default = DEFAULT_POLL_INTERVAL, help = "seconds between checks of the sources")
+    argument_parser.add_argument("--benchmark", action = "store_true", help = "time reloads of a few changed states against full builds of synthetic banks")
+    argument_parser.add_argument("--sizes", type = int, nargs = "+", default = [50, 10000, 100000], help = "how many states each synthetic bank has")
+    argument_parser.add_argument("--changes", type = int, nargs = "+", default = [1, 10, 100], help = "how many states each reload changes")
+    arguments = argument_parser.parse_args()
+
+    if arguments.benchmark:
+        random_generator = random.Random(0)
+        print(f"{'size':>10}{'changes':>9}{'build (ms)':>12}{'reload (ms)':>13}{'speedup':>9}")
+        for size in arguments.sizes:
+            report = measure_reloads(size, arguments.changes, random_generator)
+            for number_of_changes, reload_seconds in report["reload_seconds"].items():
+                print(f"{size:>10}{number_of_changes:>9}{report['build_seconds'] * 1000:>12.2f}{reload_seconds * 1000:>13.3f}"
+                    f"{report['build_seconds'] / reload_seconds:>8.0f}x")
+
+    if arguments.watch:
+        reloadable_question_bank = ReloadableQuestionBank(capture_question_bank(), on_reload = lambda report: print(report.create_report_text(), flush = True))
+        reloadable_question_bank.start_watching(arguments.interval)
+        print(f"Watching {reloadable_question_bank.csv_file_name} (press Ctrl+C to stop)", flush = True)
+        try:
+            while True:
+                time.sleep(arguments.interval)
+                if reloadable_question_bank.last_error is not None:
+                    print(f"reload rejected: {reloadable_question_bank.last_error}", flush = True)
+                    reloadable_question_bank.last_error = None
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,94 @@
+"""This file measures the memory and build time of the question bank at the current size and at much larger synthetic sizes.
+
+Two layouts are compared on the same synthetic states and capitals:
+    dict: the previous Question layout, a plain object with a __dict__ whose display text is built every time it is read
+    slots: the current Questions.Question, a __slots__ record whose display text is built once when the bank is built
+
+Usage (from the repository root):
+    python src/Question_Bank_Benchmark.py [--sizes 50 10000 1000000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+import Questions
+
+
+class DictQuestion:
+    """the previous question layout, kept here only for comparison"""
+    def __init__(self, state: str, capital: str, population_rank: int, weight: int):
+        self.state = state
+        self.capital = capital
+        self.population_rank = population_rank
+        self.weight = weight
+
+    def create_population_rank_and_weight_text(self) -> str:
+        return Questions.create_population_rank_and_weight_text(self.state, self.population_rank, self.weight)
+
+
+def create_synthetic_dataset(size: int) -> tuple[list[str], dict[str, str], dict[str, int]]:
+    """returns made-up states, capitals and population ranks (ranks repeat 1-50 so every weight is valid)
+
+    Arguments:
+        size: how many states to make up
+    """
+    list_of_state_names = [f"State {index}" for index in range(size)]
+    dictionary_of_state_capitals = {state: f"Capital {index}" for index, state in enumerate(list_of_state_names)}
+    dictionary_of_population_ranks = {state: index % Questions.LEAST_POPULOUS_RANK + 1 for index, state in enumerate(list_of_state_names)}
+    return list_of_state_names, dictionary_of_state_capitals, dictionary_of_population_ranks
+
+
+def build_questions(question_class, list_of_state_names: list[str], dictionary_of_state_capitals: dict[str, str], dictionary_of_population_ranks: dict[str, int]) -> list:
+    """builds one question per state with the given layout"""
+    if question_class is Questions.Question:
+        return Questions.build_list_of_questions(dictionary_of_population_ranks, list_of_state_names, dictionary_of_state_capitals)
+
+    list_of_questions = []
+    for state in list_of_state_names:
+        population_rank = dictionary_of_population_ranks[state]
+        list_of_questions.append(question_class(state, dictionary_of_state_capitals[state], population_rank, Questions.calculate_weight(population_rank)))
+    return list_of_questions
+
+
+def measure_layout(question_class, size: int) -> dict[str, float]:
+    """builds a bank of the given size and returns its build time, memory per question and the time to read every display text
+
+    Arguments:
+        question_class: DictQuestion or Questions.Question
+        size: how many questions the bank holds
+    """
+    dataset = create_synthetic_dataset(size)
+    gc.collect()
+
+    #the dataset's own strings are allocated before tracing starts, so only the questions are counted
+    tracemalloc.start()
+    memory_before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    list_of_questions = build_questions(question_class, *dataset)
+    build_seconds = time.perf_counter() - start
+    memory_after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for question in list_of_questions:
+        question.create_population_rank_and_weight_text()
+    read_seconds = time.perf_counter() - start
+
+    return {
+        "build_seconds": build_seconds,
+        "bytes_per_question": (memory_after - memory_before) / size,
+        "read_all_texts_seconds": read_seconds,
+    }
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Measure the question bank's memory and build time.")
+    argument_parser.add_argument("--sizes", type = int, nargs = "+", default = [50, 10000, 1000000], help = "how many questions to build (one run per value)")
+    arguments = argument_parser.parse_args()
+
+    print(f"{'size':>10}{'layout':>8}{'build (ms)':>14}{'bytes/question':>16}{'read texts (ms)':>17}")
+    for size in arguments.sizes:
+        for name, question_class in (("dict", DictQuestion), ("slots", Questions.Question)):
+            report = measure_layout(question_class, size)
+            print(f"{size:>10}{name:>8}{report['build_seconds'] * 1000:>14.2f}{report['bytes_per_question']:>16.1f}{report['read_all_texts_seconds'] * 1000:>17.2f}")
@@ -0,0 +1,310 @@
+"""This file saves the finished question bank to a binary snapshot, so a launch can map it into memory instead of rebuilding it.
+
+The snapshot is checked against two content hashes before it is used:
+    table hash: the .csv file of states and capitals; if it matches, the states and capitals come from the snapshot
+        and the .csv file is never parsed
+    bank hash: the population ranks and the source of Questions.py; if it also matches, the questions come from the
+        snapshot too, otherwise they are rebuilt (which is cheap once the table is loaded) and the snapshot is rewritten
+Editing the .csv file, receiving new ranks or changing how questions are worded therefore invalidates the snapshot
+without any version to bump by hand.
+
+File layout (little-endian):
+    header: magic b"USQB", format version (uint16), number of questions (uint32), table hash (32 bytes),
+        bank hash (32 bytes), length of the text block (uint32)
+    numbers: a (population rank, weight) uint32 pair per question, 0 standing for a missing weight
+    text: UTF-8 of every state, then every capital, then every population rank text, separated by NUL characters
+
+Exports:
+    QuestionBankSnapshot: a class that holds what was read from a snapshot
+    read_snapshot, write_snapshot: read (through mmap) and write a snapshot file
+    load_state_table: fills in States_and_State_Capitals_Reader from the snapshot, or from the .csv file if it is stale
+    load_question_bank: returns the questions from the snapshot, or rebuilds them and saves a new snapshot
+
+Usage (from the repository root):
+    python src/Question_Bank_Snapshot.py --build
+    python src/Question_Bank_Snapshot.py --benchmark [--sizes 50 10000 1000000]
+"""
+
+import argparse
+import array
+import csv
+import gc
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import Population_Rank_Cache
+import Population_Rank_Web_Scraper
+import Questions
+import States_and_State_Capitals_Reader
+
+SNAPSHOT_FORMAT_VERSION = 2
+MAGIC = b"USQB"
+HEADER = struct.Struct("<4sHI32s32sI")
+
+#the array type code of an unsigned 32-bit number ("I" is 4 bytes on every common platform, "L" where it is not)
+NUMBER_TYPE_CODE = "I" if array.array("I").itemsize == 4 else "L"
+NUMBER_SIZE = 4
+
+#how many bytes of the .csv file are hashed at a time
+HASH_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_SNAPSHOT_FILE_NAME = os.path.join(Population_Rank_Cache.CACHE_DIRECTORY, "question_bank.snapshot")
+
+
+class QuestionBankSnapshot:
+    """This class holds what was read from a snapshot.
+
+    Attributes:
+        table_hash: the hash of the .csv file the snapshot was built from
+        bank_hash: the hash of the population ranks and Questions.py the snapshot was built from
+        list_of_state_names: the states, in the .csv file's order
+        list_of_state_capitals: each state's capital, in the same order
+        list_of_questions: one Question per state, in the same order
+    """
+    def __init__(self, table_hash: bytes, bank_hash: bytes, list_of_state_names: list[str], list_of_state_capitals: list[str], list_of_questions: list):
+        "initializes the QuestionBankSnapshot class"
+        self.table_hash = table_hash
+        self.bank_hash = bank_hash
+        self.list_of_state_names = list_of_state_names
+        self.list_of_state_capitals = list_of_state_capitals
+        self.list_of_questions = list_of_questions
+
+
+def calculate_table_hash(csv_file_name: str = States_and_State_Capitals_Reader.CSV_FILE_NAME) -> bytes:
+    """returns the SHA-256 of the .csv file's bytes
+
+    Arguments:
+        csv_file_name: the path of the .csv file
+    """
+    #read in chunks rather than with hashlib.file_digest, which needs Python 3.11
+    table_hash = hashlib.sha256()
+    with open(csv_file_name, "rb") as csv_file:
+        while chunk := csv_file.read(HASH_CHUNK_SIZE):
+            table_hash.update(chunk)
+    return table_hash.digest()
+
+
+def calculate_bank_hash(dictionary_of_population_ranks: dict[str, int], list_of_state_names: list[str]) -> bytes:
+    """returns the SHA-256 of the population ranks and of Questions.py, which decides how the questions are built
+
+    The ranks are hashed in the table's order, which the table hash already covers, so nothing has to be sorted.
+
+    Arguments:
+        dictionary_of_population_ranks: a dictionary that maps each U.S. state to its population rank
+        list_of_state_names: the states the questions are built for, in the table's order
+    """
+    population_ranks = array.array("q", [dictionary_of_population_ranks.get(state, -1) for state in list_of_state_names])
+    if sys.byteorder == "big":
+        population_ranks.byteswap()
+    bank_hash = hashlib.sha256(population_ranks.tobytes())
+    with open(Questions.__file__, "rb") as questions_file:
+        bank_hash.update(questions_file.read())
+    return bank_hash.digest()
+
+
+def write_snapshot(list_of_questions: list, table_hash: bytes, bank_hash: bytes, file_name: str = DEFAULT_SNAPSHOT_FILE_NAME):
+    """writes the question bank to a snapshot file, renaming it into place so a crash never leaves half a file behind
+
+    Arguments:
+        list_of_questions: the questions, in the .csv file's order
+        table_hash: the hash of the .csv file they were built from
+        bank_hash: the hash of the population ranks and Questions.py they were built from
+        file_name: the path of the snapshot file
+
+    Raises OverflowError if a population rank or weight does not fit in 32 bits (nothing is written then).
+    """
+    numbers = array.array(NUMBER_TYPE_CODE)
+    for question in list_of_questions:
+        numbers.append(question.population_rank)
+        numbers.append(question.weight or 0)
+    if sys.byteorder == "big":
+        numbers.byteswap()
+
+    text = "\0".join([question.state for question in list_of_questions]
+        + [question.capital for question in list_of_questions]
+        + [question.population_rank_and_weight_text for question in list_of_questions]).encode("utf-8")
+
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok = True)
+    temporary_file_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temporary_file_name, "wb") as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, SNAPSHOT_FORMAT_VERSION, len(list_of_questions), table_hash, bank_hash, len(text)))
+        snapshot_file.write(numbers.tobytes())
+        snapshot_file.write(text)
+    os.replace(temporary_file_name, file_name)
+
+
+def read_snapshot(file_name: str = DEFAULT_SNAPSHOT_FILE_NAME) -> QuestionBankSnapshot | None:
+    """maps a snapshot file into memory and rebuilds its questions
+
+    Arguments:
+        file_name: the path of the snapshot file
+
+    Returns:
+        the snapshot, or None if the file is missing, truncated, from another format version or not a snapshot at all
+    """
+    try:
+        with open(file_name, "rb") as snapshot_file, mmap.mmap(snapshot_file.fileno(), 0, access = mmap.ACCESS_READ) as snapshot_map:
+            magic, version, number_of_questions, table_hash, bank_hash, text_length = HEADER.unpack_from(snapshot_map, 0)
+            numbers_end = HEADER.size + 2 * NUMBER_SIZE * number_of_questions
+            if magic != MAGIC or version != SNAPSHOT_FORMAT_VERSION or numbers_end + text_length != len(snapshot_map):
+                return None
+
+            numbers = array.array(NUMBER_TYPE_CODE)
+            numbers.frombytes(snapshot_map[HEADER.size:numbers_end])
+            text = str(snapshot_map[numbers_end:], "utf-8")
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    texts = text.split("\0")
+    if len(texts) != 3 * number_of_questions:
+        return None
+
+    list_of_state_names = texts[:number_of_questions]
+    list_of_state_capitals = texts[number_of_questions:2 * number_of_questions]
+    population_rank_texts = texts[2 * number_of_questions:]
+    population_ranks = numbers[0::2]
+    weights = numbers[1::2]
+
+    #none of these objects can form a reference cycle, so the garbage collector is paused instead of scanning
+    #the growing list over and over (at a million questions that scanning costs more than building them)
+    garbage_collector_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        list_of_questions = list(map(Questions.Question.from_snapshot, list_of_state_names, list_of_state_capitals, population_ranks,
+            [weight or None for weight in weights], population_rank_texts))
+    finally:
+        if garbage_collector_was_enabled:
+            gc.enable()
+    return QuestionBankSnapshot(table_hash, bank_hash, list_of_state_names, list_of_state_capitals, list_of_questions)
+
+
+def load_state_table(csv_file_name: str = States_and_State_Capitals_Reader.CSV_FILE_NAME, file_name: str = DEFAULT_SNAPSHOT_FILE_NAME) -> QuestionBankSnapshot | None:
+    """fills in States_and_State_Capitals_Reader from the snapshot if it was built from this .csv file, otherwise from the .csv file
+
+    Arguments:
+        csv_file_name: the path of the .csv file
+        file_name: the path of the snapshot file
+
+    Returns:
+        the snapshot to hand to load_question_bank, or None if it was missing or stale
+    """
+    snapshot = read_snapshot(file_name)
+    if snapshot is not None and snapshot.table_hash == calculate_table_hash(csv_file_name):
+        States_and_State_Capitals_Reader.publish(snapshot.list_of_state_names, snapshot.list_of_state_capitals)
+        return snapshot
+
+    States_and_State_Capitals_Reader.load(csv_file_name)
+    return None
+
+
+def load_question_bank(dictionary_of_population_ranks: dict[str, int], snapshot: QuestionBankSnapshot | None, csv_file_name: str = States_and_State_Capitals_Reader.CSV_FILE_NAME, file_name: str = DEFAULT_SNAPSHOT_FILE_NAME) -> list:
+    """returns the snapshot's questions if they were built from these ranks, otherwise rebuilds them and saves a new snapshot
+
+    Arguments:
+        dictionary_of_population_ranks: a dictionary that maps each U.S. state to its population rank
+        snapshot: what load_state_table returned
+        csv_file_name: the path of the .csv file
+        file_name: the path of the snapshot file
+    """
+    bank_hash = calculate_bank_hash(dictionary_of_population_ranks, States_and_State_Capitals_Reader.list_of_state_names)
+    if snapshot is not None and snapshot.bank_hash == bank_hash:
+        return snapshot.list_of_questions
+
+    list_of_questions = Questions.build_list_of_questions(dictionary_of_population_ranks)
+
+    #a snapshot that cannot be saved (or whose numbers do not fit in it) only means the next launch rebuilds too
+    try:
+        write_snapshot(list_of_questions, snapshot.table_hash if snapshot is not None else calculate_table_hash(csv_file_name), bank_hash, file_name)
+    except (OSError, OverflowError):
+        pass
+    return list_of_questions
+
+
+def drop_from_page_cache(file_name: str):
+    """asks the OS to forget a file's cached pages, so the next read comes from disk (where supported)"""
+    if hasattr(os, "posix_fadvise"):
+        file_descriptor = os.open(file_name, os.O_RDONLY)
+        try:
+            os.fsync(file_descriptor)
+            os.posix_fadvise(file_descriptor, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(file_descriptor)
+
+
+def measure_cold_loads(size: int, directory: str, repeats: int = 5) -> dict[str, float]:
+    """times a full rebuild against a snapshot load for a synthetic bank, dropping both files from the page cache first
+
+    Arguments:
+        size: how many states the synthetic bank has
+        directory: where the synthetic .csv and snapshot files are written
+        repeats: how many times each is timed (the fastest time is kept)
+    """
+    list_of_state_names = [f"State {index}" for index in range(size)]
+    list_of_state_capitals = [f"Capital {index}" for index in range(size)]
+    dictionary_of_population_ranks = {state: index % Questions.LEAST_POPULOUS_RANK + 1 for index, state in enumerate(list_of_state_names)}
+
+    csv_file_name = os.path.join(directory, f"states_{size}.csv")
+    with open(csv_file_name, "w", newline = "") as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(["State", "State Capital"])
+        csv_writer.writerows(zip(list_of_state_names, list_of_state_capitals))
+
+    snapshot_file_name = os.path.join(directory, f"question_bank_{size}.snapshot")
+    list_of_questions = Questions.build_list_of_questions(dictionary_of_population_ranks, list_of_state_names, dict(zip(list_of_state_names, list_of_state_capitals)))
+    write_snapshot(list_of_questions, calculate_table_hash(csv_file_name), calculate_bank_hash(dictionary_of_population_ranks, list_of_state_names), snapshot_file_name)
+    del list_of_questions
+
+    rebuild_timings = []
+    snapshot_timings = []
+    for _ in range(repeats):
+        drop_from_page_cache(csv_file_name)
+        start = time.perf_counter()
+        state_names, state_capitals = States_and_State_Capitals_Reader.read_state_table(csv_file_name)
+        Questions.build_list_of_questions(dictionary_of_population_ranks, state_names, dict(zip(state_names, state_capitals)))
+        rebuild_timings.append(time.perf_counter() - start)
+
+        #the snapshot path also pays for hashing the .csv file and the ranks, as a launch would
+        drop_from_page_cache(csv_file_name)
+        drop_from_page_cache(snapshot_file_name)
+        start = time.perf_counter()
+        snapshot = read_snapshot(snapshot_file_name)
+        valid = snapshot.table_hash == calculate_table_hash(csv_file_name) and snapshot.bank_hash == calculate_bank_hash(dictionary_of_population_ranks, snapshot.list_of_state_names)
+        snapshot_timings.append(time.perf_counter() - start)
+        assert valid and len(snapshot.list_of_questions) == size
+        del snapshot
+
+    return {
+        "rebuild_seconds": min(rebuild_timings),
+        "snapshot_seconds": min(snapshot_timings),
+        "snapshot_bytes": os.path.getsize(snapshot_file_name),
+    }
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Build the question bank snapshot or compare its load time against a rebuild.")
+    argument_parser.add_argument("--build", action = "store_true", help = "write the snapshot for the current .csv file and population ranks")
+    argument_parser.add_argument("--benchmark", action = "store_true", help = "time snapshot loads against rebuilds for synthetic banks")
+    argument_parser.add_argument("--sizes", type = int, nargs = "+", default = [50, 10000, 1000000], help = "how many states each synthetic bank has (one run per value)")
+    argument_parser.add_argument("--file", default = DEFAULT_SNAPSHOT_FILE_NAME, help = "the snapshot file to build")
+    arguments = argument_parser.parse_args()
+
+    if arguments.build:
+        #the ranks a launch would use right now: cached ranks if there are any, otherwise the backup dictionary
+        cached_entry = Population_Rank_Web_Scraper.load_cached_population_ranks()
+        dictionary_of_population_ranks = cached_entry.population_ranks if cached_entry is not None else Population_Rank_Web_Scraper.BACKUP_DICTIONARY_OF_POPULATION_RANKS
+        load_question_bank(dictionary_of_population_ranks, None, file_name = arguments.file)
+        print(f"Wrote {arguments.file} ({os.path.getsize(arguments.file)} bytes)")
+
+    if arguments.benchmark:
+        print(f"{'size':>10}{'rebuild (ms)':>14}{'snapshot (ms)':>15}{'speedup':>9}{'snapshot bytes':>16}")
+        with tempfile.TemporaryDirectory() as directory:
+            for size in arguments.sizes:
+                report = measure_cold_loads(size, directory)
+                print(f"{size:>10}{report['rebuild_seconds'] * 1000:>14.3f}{report['snapshot_seconds'] * 1000:>15.3f}"
+                    f"{report['rebuild_seconds'] / report['snapshot_seconds']:>8.1f}x{report['snapshot_bytes']:>16}")
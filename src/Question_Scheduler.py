@@ -0,0 +1,298 @@
+"""This file decides which questions a quiz asks, either uniformly at random or adaptively from what each user got wrong.
+
+The adaptive mode is a small spaced-repetition scheduler. Every state a user has answered gets an entry in a heap,
+ordered by when it is due to be asked again: misses come back after a few answers, and each correct answer pushes a
+state further out. Picking a question and recording an answer are O(log n) heap operations, and states the user has
+never seen are drawn at random without being stored, so a user costs memory only for the states they have answered.
+
+Exports:
+    UniformScheduler: picks questions uniformly at random (the original behaviour)
+    AdaptiveScheduler: keeps a UserSchedule for each of the most recently seen users
+    UserSchedule: the spaced-repetition state of one user
+    StateStatistics: what one user has done with one state
+    load_user_schedule, save_user_schedule: read and write a user's schedule as JSON
+
+Use Cases:
+    schedule = AdaptiveScheduler().for_user("student-1")
+    session = Quiz_Session.QuizSession(10, scheduler = schedule)
+"""
+
+import collections
+import heapq
+import json
+import os
+import random
+import re
+import Population_Rank_Cache
+
+#where each user's schedule is saved between runs of the GUI
+PROFILE_DIRECTORY = os.path.join(Population_Rank_Cache.CACHE_DIRECTORY, "profiles")
+
+#how many users an AdaptiveScheduler keeps schedules for; the least recently seen user is forgotten first
+DEFAULT_MAXIMUM_USERS = 10000
+
+#how many answers later a missed state is asked again
+RELEARN_INTERVAL = 3
+
+#how many answers later a state is asked again after its first correct answer
+FIRST_CORRECT_INTERVAL = 15
+
+#how quickly intervals grow after correct answers, and the bounds on that growth
+INITIAL_EASE = 2.5
+MINIMUM_EASE = 1.3
+EASE_BONUS = 0.1
+EASE_PENALTY = 0.2
+
+#how many random draws are tried before unseen states are found by scanning the bank
+UNSEEN_SAMPLING_ATTEMPTS = 32
+
+
+class UniformScheduler:
+    """This class picks questions uniformly at random, with no memory of earlier answers."""
+    def select_questions(self, number_of_questions: int, list_of_questions: list, random_generator = random) -> list:
+        """returns number_of_questions different questions
+
+        Arguments:
+            number_of_questions: how many questions to pick
+            list_of_questions: the questions to pick from
+            random_generator: the source of randomness
+        """
+        return random_generator.sample(list_of_questions, number_of_questions)
+
+    def record_answer(self, question, correct: bool):
+        """ignores the answer, since uniform picks do not depend on it"""
+
+
+class StateStatistics:
+    """This class holds what one user has done with one state.
+
+    Attributes:
+        misses: how many times the user answered it wrongly
+        correct_answers: how many times the user answered it correctly
+        last_seen: the user's answer count when it was last answered
+        ease: how quickly its interval grows after correct answers
+        interval: how many answers after last_seen it is due again
+        due: the user's answer count at which it is due again
+        sequence: which heap entry is current (older entries for the state are skipped)
+    """
+    __slots__ = ("misses", "correct_answers", "last_seen", "ease", "interval", "due", "sequence")
+
+    def __init__(self, misses: int = 0, correct_answers: int = 0, last_seen: int = 0, ease: float = INITIAL_EASE, interval: float = 0, due: float = 0, sequence: int = 0):
+        "initializes the StateStatistics class"
+        self.misses = misses
+        self.correct_answers = correct_answers
+        self.last_seen = last_seen
+        self.ease = ease
+        self.interval = interval
+        self.due = due
+        self.sequence = sequence
+
+
+class UserSchedule:
+    """This class is the spaced-repetition state of one user.
+
+    Attributes:
+        statistics: a dict that maps each answered state to its StateStatistics
+        answer_count: how many answers the user has given; due times are measured in answers, not wall time
+    """
+    def __init__(self):
+        "initializes the UserSchedule class"
+        self.statistics = {}
+        self.answer_count = 0
+        self._heap = []
+        self._next_sequence = 0
+        self._bank = None
+        self._questions_by_state = {}
+
+    def select_questions(self, number_of_questions: int, list_of_questions: list, random_generator = random) -> list:
+        """returns number_of_questions different questions: overdue states first, then unseen states, then the soonest due
+
+        Arguments:
+            number_of_questions: how many questions to pick
+            list_of_questions: the questions to pick from
+            random_generator: the source of randomness for unseen states
+        """
+        self._use_bank(list_of_questions)
+        number_of_questions = min(number_of_questions, len(list_of_questions))
+        selected_questions = []
+        selected_states = set()
+        number_of_unseen_selected = 0
+        popped_entries = []
+
+        while len(selected_questions) < number_of_questions:
+            entry = self._peek_current_entry()
+            if entry is not None and (entry[0] <= self.answer_count or len(self.statistics) >= len(self._questions_by_state)):
+                popped_entries.append(heapq.heappop(self._heap))
+                state = entry[2]
+            else:
+                state = self._draw_unseen_state(selected_states, number_of_unseen_selected, random_generator)
+                if state is not None:
+                    number_of_unseen_selected += 1
+                else:
+                    if entry is None:
+                        break
+                    popped_entries.append(heapq.heappop(self._heap))
+                    state = entry[2]
+
+            if state in selected_states or state not in self._questions_by_state:
+                continue
+            selected_states.add(state)
+            selected_questions.append(self._questions_by_state[state])
+
+        #the picked states stay scheduled until they are answered, in case the quiz is abandoned
+        for entry in popped_entries:
+            heapq.heappush(self._heap, entry)
+        return selected_questions
+
+    def record_answer(self, question, correct: bool):
+        """updates the state's statistics and reschedules it
+
+        Arguments:
+            question: the question that was answered
+            correct: if the answer was correct
+        """
+        self.answer_count += 1
+        state_statistics = self.statistics.get(question.state)
+        if state_statistics is None:
+            state_statistics = self.statistics[question.state] = StateStatistics()
+
+        if correct:
+            state_statistics.correct_answers += 1
+            state_statistics.interval = FIRST_CORRECT_INTERVAL if state_statistics.interval <= RELEARN_INTERVAL else state_statistics.interval * state_statistics.ease
+            state_statistics.ease += EASE_BONUS
+        else:
+            state_statistics.misses += 1
+            state_statistics.interval = RELEARN_INTERVAL
+            state_statistics.ease = max(MINIMUM_EASE, state_statistics.ease - EASE_PENALTY)
+
+        state_statistics.last_seen = self.answer_count
+        state_statistics.due = self.answer_count + state_statistics.interval
+        self._push(question.state, state_statistics)
+
+    def to_dict(self) -> dict:
+        """returns the schedule as plain data that can be saved as JSON"""
+        return {
+            "answer_count": self.answer_count,
+            "statistics": {state: [state_statistics.misses, state_statistics.correct_answers, state_statistics.last_seen,
+                state_statistics.ease, state_statistics.interval, state_statistics.due] for state, state_statistics in self.statistics.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserSchedule":
+        """rebuilds a schedule saved with to_dict
+
+        Arguments:
+            data: the saved schedule
+        """
+        user_schedule = cls()
+        user_schedule.answer_count = int(data.get("answer_count", 0))
+        for state, (misses, correct_answers, last_seen, ease, interval, due) in data.get("statistics", {}).items():
+            state_statistics = StateStatistics(misses, correct_answers, last_seen, ease, interval, due)
+            user_schedule.statistics[state] = state_statistics
+            user_schedule._push(state, state_statistics)
+        return user_schedule
+
+    def _push(self, state: str, state_statistics: StateStatistics):
+        """adds the state's current heap entry; its older entries become stale and are skipped when they surface"""
+        self._next_sequence += 1
+        state_statistics.sequence = self._next_sequence
+        heapq.heappush(self._heap, (state_statistics.due, self._next_sequence, state))
+
+        #rebuild the heap if stale entries make up most of it, so it stays proportional to the states answered
+        if len(self._heap) > 2 * len(self.statistics) + 64:
+            self._heap = [(state_statistics.due, state_statistics.sequence, state) for state, state_statistics in self.statistics.items()]
+            heapq.heapify(self._heap)
+
+    def _peek_current_entry(self):
+        """returns the earliest current heap entry without removing it, discarding stale entries on the way"""
+        while self._heap:
+            due, sequence, state = self._heap[0]
+            if self.statistics[state].sequence == sequence:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def _use_bank(self, list_of_questions: list):
+        """indexes the questions by state; only redone when the bank is replaced"""
+        if list_of_questions is not self._bank:
+            self._bank = list_of_questions
+            self._questions_by_state = {question.state: question for question in list_of_questions}
+
+    def _draw_unseen_state(self, selected_states: set, number_of_unseen_selected: int, random_generator) -> str | None:
+        """returns a random state the user has never answered and that is not already picked, or None if there is none"""
+        if len(self.statistics) + number_of_unseen_selected >= len(self._bank):
+            return None
+
+        for _ in range(UNSEEN_SAMPLING_ATTEMPTS):
+            state = self._bank[random_generator.randrange(len(self._bank))].state
+            if state not in self.statistics and state not in selected_states:
+                return state
+
+        #almost every state has been seen, so scanning is cheaper than more random draws
+        unseen_states = [question.state for question in self._bank if question.state not in self.statistics and question.state not in selected_states]
+        return random_generator.choice(unseen_states) if unseen_states else None
+
+
+class AdaptiveScheduler:
+    """This class keeps a UserSchedule for each of the most recently seen users, so new user ids cannot grow it without limit.
+
+    Attributes:
+        user_schedules: an OrderedDict that maps each user id to their UserSchedule, least recently seen first
+        maximum_users: how many schedules are kept; starting one more forgets the least recently seen user's
+    """
+    def __init__(self, maximum_users: int = DEFAULT_MAXIMUM_USERS):
+        "initializes the AdaptiveScheduler class"
+        self.user_schedules = collections.OrderedDict()
+        self.maximum_users = maximum_users
+
+    def for_user(self, user_id: str) -> UserSchedule:
+        """returns the user's schedule, starting an empty one for a new user (a quiz already using a forgotten schedule keeps it)
+
+        Arguments:
+            user_id: who the schedule belongs to
+        """
+        user_schedule = self.user_schedules.get(user_id)
+        if user_schedule is not None:
+            self.user_schedules.move_to_end(user_id)
+            return user_schedule
+
+        user_schedule = self.user_schedules[user_id] = UserSchedule()
+        while len(self.user_schedules) > self.maximum_users:
+            self.user_schedules.popitem(last = False)
+        return user_schedule
+
+
+def create_profile_file_name(user_id: str) -> str:
+    """returns where a user's schedule is saved, keeping only filename-safe characters of the user id
+
+    Arguments:
+        user_id: who the schedule belongs to
+    """
+    return os.path.join(PROFILE_DIRECTORY, re.sub(r"[^A-Za-z0-9_.-]", "_", user_id) + ".json")
+
+
+def load_user_schedule(file_name: str) -> UserSchedule:
+    """reads a user's schedule from a JSON file, starting an empty one if the file is missing or unreadable
+
+    Arguments:
+        file_name: the path of the file
+    """
+    try:
+        with open(file_name, "r", encoding = "utf-8") as schedule_file:
+            return UserSchedule.from_dict(json.load(schedule_file))
+    except (OSError, ValueError, TypeError, KeyError):
+        return UserSchedule()
+
+
+def save_user_schedule(user_schedule: UserSchedule, file_name: str):
+    """writes a user's schedule to a JSON file
+
+    Arguments:
+        user_schedule: the schedule to save
+        file_name: the path of the file
+    """
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok = True)
+    temporary_file_name = f"{file_name}.tmp"
+    with open(temporary_file_name, "w", encoding = "utf-8") as schedule_file:
+        json.dump(user_schedule.to_dict(), schedule_file)
+    os.replace(temporary_file_name, file_name)
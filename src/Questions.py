@@ -2,29 +2,66 @@
 
 Exports:
     Question: a class that every question for the test is an instance of.
+    calculate_weight: how many points a population rank is worth
     list_of_questions: a list that contains all possible questions that can be asked in the test
+    update_population_ranks: rebuilds list_of_questions once new population ranks arrive
+    replace_list_of_questions: swaps in a list of questions built elsewhere (such as a question bank snapshot)
+
+list_of_questions is built the first time it is used, not when this file is imported.
 """
 
+import threading
 import States_and_State_Capitals_Reader
 import Population_Rank_Web_Scraper
 
-list_of_questions = []
+#the rank whose question says "least populous" instead of an ordinal
+LEAST_POPULOUS_RANK = 50
+
+#weights by population rank, so calculate_weight is a lookup instead of a chain of comparisons
+#every 10 ranks are worth one more point: 1-10 award 1 point, 11-20 award 2 points, and so on up to 5
+WEIGHTS_BY_POPULATION_RANK = (None,) + tuple((population_rank - 1) // 10 + 1 for population_rank in range(1, LEAST_POPULOUS_RANK + 1))
+
+#ordinal suffixes by last digit (11-13 are handled separately)
+ORDINAL_SUFFIXES = ("th", "st", "nd", "rd", "th", "th", "th", "th", "th", "th")
+
 
 class Question:
     """This class introduces a template for quiz questions.
+
+    Questions are built once and never changed, so the population rank text is worked out when the question is built
+    and the instance uses __slots__ instead of a __dict__ to stay small when there are many of them.
     
     Attributes:
         state: the name of the state the question is about
         capital: the state's capital
         population_rank: what population rank the state holds in comparison to other states
         weight: how many points the state is worth
+        population_rank_and_weight_text: information about state's population rank and its point value
     """
+    __slots__ = ("state", "capital", "population_rank", "weight", "population_rank_and_weight_text")
+
     def __init__(self, state: str, capital: str, population_rank: int, weight: int):
         "initializes the Question class"
         self.state = state
         self.capital = capital
         self.population_rank = population_rank
         self.weight = weight
+        self.population_rank_and_weight_text = create_population_rank_and_weight_text(state, population_rank, weight)
+
+    @classmethod
+    def from_snapshot(cls, state: str, capital: str, population_rank: int, weight: int, population_rank_and_weight_text: str) -> "Question":
+        """rebuilds a question whose text was already worked out, skipping the formatting done by __init__
+
+        Arguments:
+            state, capital, population_rank, weight, population_rank_and_weight_text: the question's attributes
+        """
+        question = cls.__new__(cls)
+        question.state = state
+        question.capital = capital
+        question.population_rank = population_rank
+        question.weight = weight
+        question.population_rank_and_weight_text = population_rank_and_weight_text
+        return question
 
     def create_question_text(self, question_number: int) -> str:
         """returns the question text that the user sees during the quiz.
@@ -36,42 +73,39 @@ class Question:
 
     def create_population_rank_and_weight_text(self) -> str:
         """returns information about state's population rank and its point value."""
-        #there are different conditions for different grammars
-        #TODO replace with match-case when Python 3.10 releases to improve readability
-
-        #1-10 award a single point, and 1-3 have unique grammars
-        if self.population_rank == 1:
-            return f"{self.state} is the most populous state in the US and is worth {self.weight} point."
-        elif self.population_rank == 2:
-            return f"{self.state} is the {self.population_rank}nd most populous state in the US and is worth {self.weight} point."
-        elif self.population_rank == 3:
-            return f"{self.state} is the {self.population_rank}rd most populous state in the US and is worth {self.weight} point."
-        elif 4 <= self.population_rank <= 10:
-            return f"{self.state} is the {self.population_rank}th most populous state in the US and is worth {self.weight} point."
-
-        #11-20 all have consistent grammar
-        elif 11 <= self.population_rank <= 20:
-            return f"{self.state} is the {self.population_rank}th most populous state in the US and is worth {self.weight} points."
-
-        #21, 31, 41
-        elif self.population_rank % 10 == 1:
-            return f"{self.state} is the {self.population_rank}st most populous state in the US and is worth {self.weight} points."
-
-        #22, 32, 42
-        elif self.population_rank % 10 == 2:
-            return f"{self.state} is the {self.population_rank}nd most populous state in the US and is worth {self.weight} points."
-
-        #23, 33, 43
-        elif self.population_rank % 10 == 3:
-            return f"{self.state} is the {self.population_rank}rd most populous state in the US and is worth {self.weight} points."
-        
-        #all other numbers between 21-49 that are consistent
-        elif 21 <= self.population_rank <= 49:
-            return f"{self.state} is the {self.population_rank}th most populous state in the US and is worth {self.weight} points."
-        
-        #50 has unique grammar
-        else:
-            return f"{self.state} is the least populous state in the US and is worth {self.weight} points."
+        return self.population_rank_and_weight_text
+
+
+def create_ordinal(number: int) -> str:
+    """returns a number with its ordinal suffix, such as 1st, 12th or 23rd
+
+    Arguments:
+        number: a positive integer
+    """
+    #11-13 break the pattern that every other number follows
+    if 11 <= number % 100 <= 13:
+        return f"{number}th"
+    return f"{number}{ORDINAL_SUFFIXES[number % 10]}"
+
+
+def create_population_rank_and_weight_text(state: str, population_rank: int, weight: int) -> str:
+    """returns information about state's population rank and its point value.
+
+    Arguments:
+        state: the name of the state
+        population_rank: what population rank the state holds in comparison to other states
+        weight: how many points the state is worth
+    """
+    #the most and least populous states have unique grammar
+    if population_rank == 1:
+        description = "the most populous state"
+    elif population_rank == LEAST_POPULOUS_RANK:
+        description = "the least populous state"
+    else:
+        description = f"the {create_ordinal(population_rank)} most populous state"
+
+    unit = "point" if weight == 1 else "points"
+    return f"{state} is {description} in the US and is worth {weight} {unit}."
 
 
 def calculate_weight(population_rank: int) -> int:
@@ -83,23 +117,66 @@ def calculate_weight(population_rank: int) -> int:
     Returns:
         an integer 1 through 5 (inclusive)
     """
-    if 1 <= population_rank <= 10:
-        return 1
-    elif 11 <= population_rank <= 20:
-        return 2
-    elif 21 <= population_rank <= 30:
-        return 3
-    elif 31 <= population_rank <= 40:
-        return 4
-    elif 41 <= population_rank <= 50:
-        return 5
-
-
-#create the list of 50 Question instances, each about one state
-for i in States_and_State_Capitals_Reader.list_of_state_names:
-    state = i
-    capital = States_and_State_Capitals_Reader.dictionary_of_state_capitals[state]
-    population_rank = Population_Rank_Web_Scraper.dictionary_of_population_ranks[state]
-    weight = calculate_weight(population_rank)
-    temporary_instance = Question(state, capital, population_rank, weight)
-    list_of_questions.append(temporary_instance)
\ No newline at end of file
+    if 1 <= population_rank <= LEAST_POPULOUS_RANK:
+        return WEIGHTS_BY_POPULATION_RANK[population_rank]
+
+
+def build_list_of_questions(dictionary_of_population_ranks: dict[str, int], list_of_state_names: list[str] | None = None, dictionary_of_state_capitals: dict[str, str] | None = None) -> list[Question]:
+    """creates the list of 50 Question instances, each about one state
+
+    Arguments:
+        dictionary_of_population_ranks: a dictionary that maps each U.S. state to its population rank
+        list_of_state_names: the states to build questions for (States_and_State_Capitals_Reader's if None)
+        dictionary_of_state_capitals: a dict that maps each state to its capital (States_and_State_Capitals_Reader's if None)
+    """
+    if list_of_state_names is None:
+        list_of_state_names = States_and_State_Capitals_Reader.list_of_state_names
+    if dictionary_of_state_capitals is None:
+        dictionary_of_state_capitals = States_and_State_Capitals_Reader.dictionary_of_state_capitals
+
+    new_list_of_questions = []
+    for i in list_of_state_names:
+        state = i
+        capital = dictionary_of_state_capitals[state]
+        population_rank = dictionary_of_population_ranks[state]
+        weight = calculate_weight(population_rank)
+        temporary_instance = Question(state, capital, population_rank, weight)
+        new_list_of_questions.append(temporary_instance)
+    return new_list_of_questions
+
+
+def update_population_ranks(dictionary_of_population_ranks: dict[str, int]):
+    """swaps in a list of questions built from new population ranks
+
+    The list is replaced rather than edited, so a quiz that already sampled its questions keeps consistent weights.
+
+    Arguments:
+        dictionary_of_population_ranks: a dictionary that maps each U.S. state to its population rank
+    """
+    replace_list_of_questions(build_list_of_questions(dictionary_of_population_ranks))
+
+
+def replace_list_of_questions(new_list_of_questions: list[Question]):
+    """swaps in a list of questions built elsewhere; quizzes that already sampled their questions keep them
+
+    Arguments:
+        new_list_of_questions: the questions that every new quiz samples from
+    """
+    global list_of_questions
+    with _list_of_questions_lock:
+        list_of_questions = new_list_of_questions
+
+
+#the first use and a background fetch's update must not overwrite each other
+_list_of_questions_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    """builds list_of_questions the first time it is used; afterwards it is an ordinary module attribute"""
+    if name == "list_of_questions":
+        with _list_of_questions_lock:
+            if "list_of_questions" not in globals():
+                #start from whatever ranks are available now (the backup dictionary until a fetch succeeds)
+                globals()["list_of_questions"] = build_list_of_questions(Population_Rank_Web_Scraper.dictionary_of_population_ranks)
+            return globals()["list_of_questions"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,402 @@
+"""This file hosts the quiz for many users at once over HTTP, using asyncio so one process can serve thousands of sessions.
+
+Every session samples from the same read-only version of the question bank (Question_Bank); a session only keeps
+the questions it picked, the indexes that grade them and its score. Editing the .csv file or fetching new population
+ranks swaps in a new version for new sessions while the server runs, and sessions already started keep theirs. Idle sessions expire. Grading is a few dictionary lookups, so nothing on the
+event loop blocks.
+
+Endpoints (all bodies are JSON):
+    POST /sessions                      {"number_of_questions": 10, "user_id": "optional", "number_of_choices": 4 (optional)}
+                                        -> the session id and the first question
+                                        (with a user_id, questions are picked from what that user got wrong before;
+                                        with number_of_choices, every question lists its choices and answers must be one of them)
+    GET  /sessions/<session id>         -> the current question and the score so far
+    POST /sessions/<session id>/answer  {"answer": "Nashville"} -> how the answer was graded and the next question
+    GET  /health                        -> how many sessions are active and which question bank version new sessions get
+
+Usage (from the repository root):
+    python src/Quiz_Server.py [--host HOST] [--port PORT] [--session-ttl SECONDS] [--no-fetch] [--results-database PATH]
+                              [--rank-sources FILE [--rank-strategy first|quorum]] [--reload-interval SECONDS]
+"""
+
+import argparse
+import asyncio
+import json
+import secrets
+import time
+import traceback
+import Questions
+import Population_Rank_Web_Scraper
+import Quiz_Session
+import Question_Scheduler
+import Results_Store
+import Distractor_Index
+import Question_Bank
+
+#how long (in seconds) a session may sit idle before it is removed
+DEFAULT_SESSION_TIME_TO_LIVE = 15 * 60
+
+#how often (in seconds) expired sessions are removed
+EXPIRY_SWEEP_INTERVAL = 30
+
+#how long (in seconds) a keep-alive connection may sit idle before it is closed
+CONNECTION_IDLE_TIMEOUT = 60
+
+#limits that stop one client from using up the server's memory
+MAXIMUM_SESSIONS = 200000
+MAXIMUM_USER_SCHEDULES = 20000
+MAXIMUM_BODY_SIZE = 4096
+
+#the most choices a multiple-choice session may ask for (a state never has more distractors than its candidates)
+MAXIMUM_NUMBER_OF_CHOICES = Distractor_Index.MAXIMUM_CANDIDATES + 1
+
+STATUS_TEXTS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    """raised while handling a request to send an error response
+
+    Attributes:
+        status: the HTTP status code
+        message: the error message sent to the client
+    """
+    def __init__(self, status: int, message: str):
+        "initializes the HTTPError class"
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class QuizServer:
+    """This class keeps every active session and answers the HTTP requests for them.
+
+    Attributes:
+        session_time_to_live: how long (in seconds) a session may sit idle before it is removed
+        sessions: a dict that maps each session id to its QuizSession
+        expiry_times: a dict that maps each session id to when (in time.monotonic seconds) it expires
+        adaptive_scheduler: the spaced-repetition schedules of users who identify themselves
+        results_store: where every answer and finished session is saved, or None to not save them
+        user_ids: a dict that maps each session id to the user who started it ("" if anonymous)
+        question_bank: the Question_Bank.ReloadableQuestionBank whose current version new sessions use, or None for the module exports
+    """
+    def __init__(self, session_time_to_live: float = DEFAULT_SESSION_TIME_TO_LIVE, results_store: Results_Store.ResultsStore | None = None,
+            question_bank: Question_Bank.ReloadableQuestionBank | None = None):
+        "initializes the QuizServer class"
+        self.session_time_to_live = session_time_to_live
+        self.sessions = {}
+        self.expiry_times = {}
+        self.adaptive_scheduler = Question_Scheduler.AdaptiveScheduler(MAXIMUM_USER_SCHEDULES)
+        self.results_store = results_store
+        self.user_ids = {}
+        self.question_bank = question_bank
+
+    def create_session(self, body: dict) -> tuple[int, dict]:
+        """starts a quiz and returns its first question"""
+        if len(self.sessions) >= MAXIMUM_SESSIONS:
+            raise HTTPError(503, "Too many active sessions.")
+
+        #question bank versions are replaced, never edited, so each session keeps a consistent snapshot
+        #(its questions, the answer index that grades them and their distractor index)
+        question_bank = self.question_bank.current if self.question_bank is not None else None
+        list_of_questions = question_bank.list_of_questions if question_bank is not None else Questions.list_of_questions
+
+        try:
+            number_of_questions = Quiz_Session.parse_number_of_questions(str(body.get("number_of_questions", "")), len(list_of_questions))
+        except ValueError as error:
+            raise HTTPError(400, str(error))
+
+        user_id = body.get("user_id")
+        if user_id is not None and not isinstance(user_id, str):
+            raise HTTPError(400, "The user_id must be a string.")
+        scheduler = self.adaptive_scheduler.for_user(user_id) if user_id else None
+
+        number_of_choices = body.get("number_of_choices")
+        if number_of_choices is not None and (type(number_of_choices) is not int or not 2 <= number_of_choices <= MAXIMUM_NUMBER_OF_CHOICES):
+            raise HTTPError(400, f"The number_of_choices must be an integer from 2 to {MAXIMUM_NUMBER_OF_CHOICES}.")
+
+        session = Quiz_Session.QuizSession(number_of_questions, record_answers = False, scheduler = scheduler, number_of_choices = number_of_choices,
+            question_bank = question_bank)
+        session_id = secrets.token_urlsafe(12)
+        self.sessions[session_id] = session
+        self.user_ids[session_id] = user_id or ""
+        self._touch(session_id)
+
+        session.next_question()
+        return 201, {"session_id": session_id, **self._describe(session)}
+
+    def get_session(self, session_id: str) -> tuple[int, dict]:
+        """returns the current question and the score so far"""
+        session = self._find_session(session_id)
+        return 200, self._describe(session)
+
+    def answer_question(self, session_id: str, body: dict) -> tuple[int, dict]:
+        """grades the answer to the current question and returns the next question"""
+        session = self._find_session(session_id)
+        user_answer = body.get("answer")
+        if not isinstance(user_answer, str):
+            raise HTTPError(400, "The answer must be a string.")
+        if session.current_question is None:
+            raise HTTPError(409, "The quiz is already over.")
+        if session.current_choices is not None and user_answer not in session.current_choices:
+            raise HTTPError(400, "The answer must be one of the choices.")
+
+        answer_result = session.submit(user_answer)
+        if self.results_store is not None:
+            #only queued here; the store's own thread writes to disk, so the event loop never waits on it
+            self.results_store.record_answer(session_id, self.user_ids[session_id], answer_result)
+            if session.finished:
+                self.results_store.record_session(session_id, self.user_ids[session_id], session)
+        session.next_question()
+        return 200, {
+            "correct": answer_result.correct,
+            "points_awarded": answer_result.points_awarded,
+            "feedback": answer_result.create_feedback_text(),
+            **self._describe(session),
+        }
+
+    def get_health(self) -> tuple[int, dict]:
+        """returns how many sessions are active and which question bank version new sessions get"""
+        health = {"active_sessions": len(self.sessions)}
+        if self.question_bank is not None:
+            health["question_bank_version"] = self.question_bank.current.version
+        return 200, health
+
+    def remove_expired_sessions(self) -> int:
+        """removes every session that has sat idle too long and returns how many were removed"""
+        now = time.monotonic()
+        expired_session_ids = [session_id for session_id, expiry_time in self.expiry_times.items() if expiry_time <= now]
+        for session_id in expired_session_ids:
+            del self.sessions[session_id]
+            del self.expiry_times[session_id]
+            del self.user_ids[session_id]
+        return len(expired_session_ids)
+
+    def dispatch(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        """routes a request to the method that handles it
+
+        Arguments:
+            method: the HTTP method
+            path: the request path without the query string
+            body: the raw request body
+        """
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["health"]:
+            self._require_method(method, "GET")
+            return self.get_health()
+        if parts == ["sessions"]:
+            self._require_method(method, "POST")
+            return self.create_session(self._parse_body(body))
+        if len(parts) == 2 and parts[0] == "sessions":
+            self._require_method(method, "GET")
+            return self.get_session(parts[1])
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "answer":
+            self._require_method(method, "POST")
+            return self.answer_question(parts[1], self._parse_body(body))
+        raise HTTPError(404, "Not found.")
+
+    def _find_session(self, session_id: str) -> Quiz_Session.QuizSession:
+        """returns an active session and pushes back its expiry, or raises a 404"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, "The session does not exist or has expired.")
+        self._touch(session_id)
+        return session
+
+    def _touch(self, session_id: str):
+        """pushes back when a session expires"""
+        self.expiry_times[session_id] = time.monotonic() + self.session_time_to_live
+
+    @staticmethod
+    def _require_method(method: str, allowed_method: str):
+        """raises a 405 if the request used the wrong method"""
+        if method != allowed_method:
+            raise HTTPError(405, f"Use {allowed_method}.")
+
+    @staticmethod
+    def _parse_body(body: bytes) -> dict:
+        """decodes a JSON object body, treating an empty body as an empty object"""
+        if not body:
+            return {}
+        try:
+            parsed_body = json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "The body must be JSON.")
+        if not isinstance(parsed_body, dict):
+            raise HTTPError(400, "The body must be a JSON object.")
+        return parsed_body
+
+    @staticmethod
+    def _describe(session: Quiz_Session.QuizSession) -> dict:
+        """returns the current question (or null once the quiz is over) and the score so far"""
+        question = session.current_question
+        description = {"question": None, "score": session.summary()}
+        if question is not None:
+            description["question"] = {
+                "number": session.question_number,
+                "text": question.create_question_text(session.question_number),
+                "details": question.create_population_rank_and_weight_text(),
+            }
+            if session.current_choices is not None:
+                description["question"]["choices"] = session.current_choices
+        return description
+
+
+async def handle_connection(quiz_server: QuizServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """answers HTTP/1.1 requests on one connection until the client closes it or it sits idle
+
+    Arguments:
+        quiz_server: the server that handles the requests
+        reader: the connection's incoming stream
+        writer: the connection's outgoing stream
+    """
+    try:
+        while True:
+            request_line = await asyncio.wait_for(reader.readline(), CONNECTION_IDLE_TIMEOUT)
+            if not request_line:
+                break
+            #a malformed request line or Content-Length is answered with a 400 once the headers are read
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                method, target, version = None, None, None
+
+            headers = {}
+            while True:
+                header_line = await reader.readline()
+                if header_line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header_line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                content_length = int(headers.get("content-length", 0))
+            except ValueError:
+                content_length = None
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+            try:
+                if method is None or content_length is None or content_length < 0:
+                    keep_alive = False
+                    raise HTTPError(400, "The request is malformed.")
+                if content_length > MAXIMUM_BODY_SIZE:
+                    keep_alive = False
+                    raise HTTPError(413, "The body is too large.")
+                body = await reader.readexactly(content_length) if content_length else b""
+                status, payload = quiz_server.dispatch(method, target.split("?", 1)[0], body)
+            except HTTPError as error:
+                status, payload = error.status, {"error": error.message}
+            #a bug in a handler answers this request with a 500 instead of dropping the connection
+            except Exception:
+                traceback.print_exc()
+                status, payload = 500, {"error": "The server could not handle the request."}
+
+            response_body = json.dumps(payload).encode("utf-8")
+            writer.write((f"HTTP/1.1 {status} {STATUS_TEXTS[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(response_body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1") + response_body)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+
+    #idle clients and dropped connections just end the connection; cancellation (server shutdown) closes it and carries on
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def remove_expired_sessions_forever(quiz_server: QuizServer):
+    """removes expired sessions every EXPIRY_SWEEP_INTERVAL seconds
+
+    Arguments:
+        quiz_server: the server whose sessions expire
+    """
+    while True:
+        await asyncio.sleep(EXPIRY_SWEEP_INTERVAL)
+        quiz_server.remove_expired_sessions()
+
+
+async def serve(host: str, port: int, quiz_server: QuizServer, ready = None):
+    """runs the server until it is cancelled
+
+    Arguments:
+        host: the address to listen on
+        port: the port to listen on (0 picks a free port)
+        quiz_server: the server that handles the requests
+        ready: called with the port once the server is listening
+    """
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(quiz_server, reader, writer), host, port, backlog = 4096)
+    expiry_task = asyncio.create_task(remove_expired_sessions_forever(quiz_server))
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        expiry_task.cancel()
+
+
+#the question bank that is reloaded when the .csv file or the population ranks change, once it has been built
+reloadable_question_bank = None
+
+
+def use_fetched_population_ranks(fetch_succeeded: bool):
+    """swaps in questions built from the fetched population ranks; sessions that already started keep their questions
+
+    Arguments:
+        fetch_succeeded: if the fetched ranks replaced the backup dictionary
+    """
+    if fetch_succeeded:
+        #only the states whose rank changed get new questions and distractors, worked out here on the fetch thread
+        if reloadable_question_bank is not None:
+            reloadable_question_bank.reload()
+            return
+        Questions.update_population_ranks(Population_Rank_Web_Scraper.dictionary_of_population_ranks)
+
+        #the new questions' distractors are worked out here on the fetch thread, not by the first session on the event loop
+        Distractor_Index.get_distractor_index()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Host the U.S. State Capitals Quiz for many users over HTTP.")
+    argument_parser.add_argument("--host", default = "127.0.0.1", help = "the address to listen on")
+    argument_parser.add_argument("--port", type = int, default = 8080, help = "the port to listen on")
+    argument_parser.add_argument("--session-ttl", type = float, default = DEFAULT_SESSION_TIME_TO_LIVE, help = "seconds a session may sit idle before it expires")
+    argument_parser.add_argument("--no-fetch", action = "store_true", help = "only use the backup dictionary instead of fetching population ranks in the background")
+    argument_parser.add_argument("--results-database", help = "save every answer and finished session to this SQLite file")
+    argument_parser.add_argument("--rank-sources", help = "a JSON file of population rank sources to fetch from at once (see Rank_Source_Fetcher)")
+    argument_parser.add_argument("--rank-strategy", choices = ("first", "quorum"), default = "first", help = "with --rank-sources, take the first valid ranking or wait for a majority to agree")
+    argument_parser.add_argument("--reload-interval", type = float, default = Question_Bank.DEFAULT_POLL_INTERVAL, help = "seconds between checks of the .csv file and the ranks for changes (0 to never reload)")
+    arguments = argument_parser.parse_args()
+
+    #several rank sources are only used when configured; the fetcher is imported only then
+    if arguments.rank_sources:
+        import Rank_Source_Fetcher
+        Population_Rank_Web_Scraper.rank_sources = Rank_Source_Fetcher.load_rank_sources(arguments.rank_sources)
+        Population_Rank_Web_Scraper.rank_source_strategy = arguments.rank_strategy
+
+    if not arguments.no_fetch:
+        Population_Rank_Web_Scraper.start_background_fetch(on_complete = use_fetched_population_ranks)
+
+    #a fetch that finished while the questions were being built is picked up by the first reload
+    reloadable_question_bank = Question_Bank.ReloadableQuestionBank(Question_Bank.capture_question_bank())
+    reloadable_question_bank.reload()
+    if arguments.reload_interval > 0:
+        reloadable_question_bank.start_watching(arguments.reload_interval)
+
+    #work out the distractors before serving, so no multiple-choice session waits on them (reloads only update them)
+    reloadable_question_bank.current.distractor_index
+
+    results_store = Results_Store.ResultsStore(arguments.results_database) if arguments.results_database else None
+    try:
+        asyncio.run(serve(arguments.host, arguments.port, QuizServer(arguments.session_ttl, results_store, reloadable_question_bank),
+            ready = lambda port: print(f"Serving the quiz on http://{arguments.host}:{port}")))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if results_store is not None:
+            results_store.close()
@@ -0,0 +1,177 @@
+"""This file drives Quiz_Server with many simulated users at once and reports answer latency and sessions per second.
+
+Each simulated user starts a session, answers every question (mostly correctly) and finishes. The users share a
+pool of keep-alive connections, so thousands of concurrent sessions do not need thousands of sockets.
+By default the server is started in this process on a free port; use --url to test a server running elsewhere.
+
+Usage (from the repository root):
+    python src/Quiz_Server_Load_Generator.py [--concurrency 1000 10000] [--questions N] [--connections N] [--url URL]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import urllib.parse
+import Questions
+import Quiz_Server
+
+
+class HTTPConnectionPool:
+    """This class shares a fixed number of keep-alive HTTP/1.1 connections between many concurrent requests.
+
+    Attributes:
+        host: the server's address
+        port: the server's port
+        size: how many connections to open
+    """
+    def __init__(self, host: str, port: int, size: int):
+        "initializes the HTTPConnectionPool class"
+        self.host = host
+        self.port = port
+        self.size = size
+        self._idle_connections = asyncio.Queue()
+
+    async def open(self):
+        """opens every connection"""
+        for _ in range(self.size):
+            self._idle_connections.put_nowait(await asyncio.open_connection(self.host, self.port))
+
+    async def close(self):
+        """closes every connection"""
+        while not self._idle_connections.empty():
+            _, writer = self._idle_connections.get_nowait()
+            writer.close()
+
+    async def request(self, method: str, path: str, payload: dict | None = None) -> dict:
+        """sends one request on an idle connection and returns the decoded JSON response
+
+        Arguments:
+            method: the HTTP method
+            path: the request path
+            payload: the JSON body, if any
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        reader, writer = await self._idle_connections.get()
+        try:
+            writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            content_length = 0
+            while True:
+                header_line = await reader.readline()
+                if header_line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header_line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    content_length = int(value)
+            response_body = await reader.readexactly(content_length)
+        except BaseException:
+            #a connection in an unknown state is replaced rather than reused
+            writer.close()
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            raise
+        finally:
+            self._idle_connections.put_nowait((reader, writer))
+
+        status = int(status_line.split()[1])
+        if status >= 400:
+            raise RuntimeError(f"{method} {path} failed with {status}: {response_body.decode('utf-8', 'replace')}")
+        return json.loads(response_body)
+
+
+async def simulate_user(pool: HTTPConnectionPool, number_of_questions: int, answers: dict[str, str], answer_latencies: list[float], random_generator: random.Random):
+    """plays one whole quiz, recording how long each answer took to be graded
+
+    Arguments:
+        pool: the connections to send requests on
+        number_of_questions: how many questions the quiz asks
+        answers: what to answer for each question text
+        answer_latencies: where each answer's latency (in seconds) is appended
+        random_generator: decides when the user answers wrongly on purpose
+    """
+    response = await pool.request("POST", "/sessions", {"number_of_questions": number_of_questions})
+    session_path = f"/sessions/{response['session_id']}/answer"
+
+    while response["question"] is not None:
+        answer = answers[response["question"]["text"].split(" ", 2)[2]]
+        if random_generator.random() < 0.2:
+            answer = "I don't know"
+
+        start = time.perf_counter()
+        response = await pool.request("POST", session_path, {"answer": answer})
+        answer_latencies.append(time.perf_counter() - start)
+
+
+async def run_load(host: str, port: int, concurrency: int, number_of_questions: int, connections: int, seed: int = 0) -> dict[str, float]:
+    """runs concurrency users at the same time and returns the latency percentiles and throughput
+
+    Arguments:
+        host: the server's address
+        port: the server's port
+        concurrency: how many sessions run at the same time
+        number_of_questions: how many questions each session asks
+        connections: how many connections the users share
+        seed: the seed for the simulated users' mistakes
+    """
+    #the server's question text is "Question N: What is the capital of STATE?", so answers are keyed by the part after "Question N:"
+    answers = {f"What is the capital of {question.state}?": question.capital for question in Questions.list_of_questions}
+
+    pool = HTTPConnectionPool(host, port, min(connections, concurrency))
+    await pool.open()
+    answer_latencies = []
+    random_generator = random.Random(seed)
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(simulate_user(pool, number_of_questions, answers, answer_latencies, random_generator) for _ in range(concurrency)))
+        elapsed_seconds = time.perf_counter() - start
+    finally:
+        await pool.close()
+
+    latency_quantiles = statistics.quantiles(answer_latencies, n = 100)
+    return {
+        "concurrency": concurrency,
+        "answers": len(answer_latencies),
+        "elapsed_seconds": elapsed_seconds,
+        "sessions_per_second": concurrency / elapsed_seconds,
+        "p50_answer_latency_seconds": latency_quantiles[49],
+        "p99_answer_latency_seconds": latency_quantiles[98],
+    }
+
+
+async def run_all(arguments) -> list[dict[str, float]]:
+    """runs every requested concurrency level, starting a local server unless a URL was given"""
+    server_task = None
+    if arguments.url:
+        parsed_url = urllib.parse.urlsplit(arguments.url)
+        host, port = parsed_url.hostname, parsed_url.port or 80
+    else:
+        port_ready = asyncio.get_running_loop().create_future()
+        host = "127.0.0.1"
+        server_task = asyncio.create_task(Quiz_Server.serve(host, 0, Quiz_Server.QuizServer(), ready = port_ready.set_result))
+        port = await port_ready
+
+    try:
+        return [await run_load(host, port, concurrency, arguments.questions, arguments.connections, arguments.seed) for concurrency in arguments.concurrency]
+    finally:
+        if server_task is not None:
+            server_task.cancel()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Load test the quiz server.")
+    argument_parser.add_argument("--concurrency", type = int, nargs = "+", default = [1000, 10000], help = "how many sessions run at the same time (one run per value)")
+    argument_parser.add_argument("--questions", type = int, default = 10, help = "how many questions each session asks")
+    argument_parser.add_argument("--connections", type = int, default = 256, help = "how many keep-alive connections the users share")
+    argument_parser.add_argument("--url", help = "a running server to test, such as http://127.0.0.1:8080 (a local one is started if omitted)")
+    argument_parser.add_argument("--seed", type = int, default = 0, help = "the seed for the simulated users' mistakes")
+    arguments = argument_parser.parse_args()
+
+    print(f"{'sessions':>10}{'answers':>10}{'seconds':>10}{'sessions/sec':>14}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for report in asyncio.run(run_all(arguments)):
+        print(f"{report['concurrency']:>10}{report['answers']:>10}{report['elapsed_seconds']:>10.2f}{report['sessions_per_second']:>14.1f}"
+            f"{report['p50_answer_latency_seconds'] * 1000:>10.2f}{report['p99_answer_latency_seconds'] * 1000:>10.2f}")
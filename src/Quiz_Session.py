@@ -0,0 +1,281 @@
+"""This file runs a quiz without any GUI, so the quiz can be driven by tkinter, tests, servers or load generators alike.
+
+Exports:
+    QuizSession: a class that holds the state of one quiz and grades its answers
+    AnswerResult: a class that describes how one answer was graded
+    generate_random_questions: picks the questions for a quiz
+    parse_number_of_questions: checks the number of questions a user asked for
+    calculate_speed_bonus: the extra points a fast correct answer earns in blitz mode
+
+Use Cases:
+    session = QuizSession(5)
+    question = session.next_question()
+    result = session.submit("Nashville")
+    session.score() == (1, 3)
+"""
+
+import random
+import time
+import Questions
+import States_and_State_Capitals_Reader
+
+MINIMUM_NUMBER_OF_QUESTIONS = 1
+
+#the size of the full 50-state table; a reloaded question bank may hold fewer, so callers pass the bank's size when they have one
+MAXIMUM_NUMBER_OF_QUESTIONS = 50
+
+#in blitz mode, a correct answer earns up to its weight again as a bonus, shrinking to nothing over this many seconds
+DEFAULT_SPEED_BONUS_WINDOW = 10.0
+
+
+class AnswerResult:
+    """This class describes how one answer was graded.
+
+    Attributes:
+        question: the Question instance that was answered
+        user_answer: the user's answer to the question
+        correct: if the user got the answer correct or not
+        points_awarded: how many points the answer earned
+        other_state: the state whose capital the user gave instead, or None
+        edit_distance: how many typos were forgiven when matching the answer, or None if it matched no capital
+        response_time: how many seconds passed between the question being shown and the answer being submitted, or None if unknown
+        speed_bonus: how many of the points awarded were for answering quickly (always 0 outside of blitz mode)
+        other_capital: the capital the user gave instead (other_state's capital), or None
+    """
+    def __init__(self, question: Questions.Question, user_answer: str, correct: bool, points_awarded: int, other_state: str | None, edit_distance: int | None = 0, response_time: float | None = None,
+            speed_bonus: int = 0, other_capital: str | None = None):
+        "initializes the AnswerResult class"
+        self.question = question
+        self.user_answer = user_answer
+        self.correct = correct
+        self.points_awarded = points_awarded
+        self.other_state = other_state
+        self.edit_distance = edit_distance
+        self.response_time = response_time
+        self.speed_bonus = speed_bonus
+        self.other_capital = other_capital
+
+    def create_feedback_text(self) -> str:
+        """returns if the user got it right or not (and what state they were thinking of if they named a different capital)"""
+        bonus_text = f" +{self.speed_bonus} speed bonus" if self.speed_bonus else ""
+        if self.correct and self.edit_distance:
+            return f"Correct!{bonus_text} It is spelled {self.question.capital}."
+        if self.correct:
+            return f"Correct!{bonus_text}"
+        if self.other_state is not None:
+            other_capital = self.other_capital or States_and_State_Capitals_Reader.dictionary_of_state_capitals[self.other_state]
+            return f"Incorrect. The answer is {self.question.capital}. {other_capital} is actually the capital of {self.other_state}."
+        return f"Incorrect. The answer is {self.question.capital}."
+
+
+class QuizSession:
+    """This class holds the state of one quiz and grades its answers.
+
+    Attributes:
+        list_of_random_questions: the questions the quiz will run through, in order
+        number_of_questions: the number of questions that the quiz will contain
+        maximum_points: the maximum number of points that can be earned if all questions are answered correctly
+        number_correct: the number of questions answered correctly so far
+        points_earned: the number of points earned so far
+        question_number: the position (counting from 1) of the current question, or 0 before the first question
+        number_answered: how many questions have been answered so far
+        answer_results: an AnswerResult for every answer submitted so far (left empty if answers are not recorded)
+        question_shown_at: when (in time.perf_counter seconds) the current question was handed out
+        speed_bonus_window: in blitz mode, how many seconds a correct answer keeps earning a speed bonus; None for no bonus
+        number_of_choices: how many options each multiple-choice question has, or None for free-text answers
+        current_choices: the options for the current question (the capital and its distractors), or None
+        answer_index: grades the answers; it is the one that matched the questions when the quiz started, even if the question bank was reloaded since
+    """
+    #sessions are kept by the thousand in a server, so they do not carry a __dict__
+    __slots__ = ("number_of_questions", "list_of_random_questions", "maximum_points", "number_correct", "points_earned",
+        "question_number", "number_answered", "answer_results", "record_answers", "scheduler", "question_shown_at",
+        "speed_bonus_window", "number_of_choices", "current_choices", "distractor_index", "random_generator", "answer_index")
+
+    def __init__(self, number_of_questions: int, list_of_questions: list[Questions.Question] | None = None, random_generator: random.Random | None = None, record_answers: bool = True, scheduler = None,
+            speed_bonus_window: float | None = None, number_of_choices: int | None = None, question_bank = None):
+        """initializes the quiz
+
+        Arguments:
+            number_of_questions: the number of questions that the quiz will contain
+            list_of_questions: the questions to sample from (Questions.list_of_questions if None)
+            random_generator: the source of randomness used to pick the questions (the random module if None)
+            record_answers: if every AnswerResult is kept in answer_results; turning it off keeps the session small
+            scheduler: picks the questions and learns from the answers, such as a Question_Scheduler.UserSchedule (uniform if None)
+            speed_bonus_window: awards calculate_speed_bonus on top of the weight of every correct answer (blitz mode); None for no bonus
+            number_of_choices: asks multiple-choice questions with this many options; None for free-text answers
+            question_bank: a Question_Bank.QuestionBank to take the questions, answer index and distractor index from (the module exports if None)
+        """
+        if question_bank is not None and list_of_questions is None:
+            list_of_questions = question_bank.list_of_questions
+        self.scheduler = scheduler
+        self.list_of_random_questions, self.maximum_points = generate_random_questions(number_of_questions, list_of_questions, random_generator, scheduler)
+
+        #a scheduler picks at most the whole pool, so the quiz is as long as what it picked, not what was asked for
+        self.number_of_questions = len(self.list_of_random_questions)
+        self.number_correct = 0
+        self.points_earned = 0
+        self.question_number = 0
+        self.number_answered = 0
+        self.answer_results = []
+        self.record_answers = record_answers
+        self.question_shown_at = None
+        self.speed_bonus_window = speed_bonus_window
+        self.number_of_choices = number_of_choices
+        self.current_choices = None
+        self.random_generator = random_generator
+
+        #the session keeps the indexes it started with, so a question bank reload never grades it against other capitals
+        self.answer_index = question_bank.answer_index if question_bank is not None else States_and_State_Capitals_Reader.answer_index
+
+        #the index is built once per list of questions, so this is a lookup after the first session
+        self.distractor_index = None
+        if number_of_choices is not None:
+            if question_bank is not None:
+                self.distractor_index = question_bank.distractor_index
+            else:
+                #only multiple-choice quizzes need distractors, so only they import the index
+                import Distractor_Index
+                self.distractor_index = Distractor_Index.get_distractor_index(list_of_questions)
+
+        #an instant correct answer earns its weight twice, so that is the most a blitz quiz can earn
+        if speed_bonus_window is not None:
+            self.maximum_points *= 2
+
+    @property
+    def current_question(self) -> Questions.Question | None:
+        """the question waiting for an answer, or None if there is none"""
+        if self.question_number == 0 or self.number_answered == self.question_number:
+            return None
+        return self.list_of_random_questions[self.question_number - 1]
+
+    @property
+    def finished(self) -> bool:
+        """True once every question has been answered"""
+        return self.number_answered == self.number_of_questions
+
+    def next_question(self) -> Questions.Question | None:
+        """moves on to the next question and returns it, or returns None if the quiz is over
+
+        Calling this again before the current question is answered returns the same question.
+        """
+        if self.current_question is not None:
+            return self.current_question
+        if self.finished:
+            return None
+        self.question_number += 1
+        question = self.list_of_random_questions[self.question_number - 1]
+        if self.distractor_index is not None:
+            self.current_choices = self.distractor_index.create_choices(question, self.number_of_choices, self.random_generator)
+        self.question_shown_at = time.perf_counter()
+        return question
+
+    def submit(self, user_answer: str, response_time: float | None = None) -> AnswerResult:
+        """grades the answer to the current question and updates the score
+
+        Arguments:
+            user_answer: the user's answer to the question
+            response_time: how many seconds the answer took (measured from next_question if None); replays pass the recorded time
+        """
+        question = self.current_question
+        if question is None:
+            raise RuntimeError("There is no question waiting for an answer; call next_question first.")
+        if response_time is None:
+            response_time = time.perf_counter() - self.question_shown_at
+
+        #evaluate the user's answer with the answer index, which forgives case, spacing, abbreviations and small typos
+        answer_match = self.answer_index.check(question.state, user_answer)
+        correct = answer_match.accepted
+        points_awarded = question.weight if correct else 0
+        speed_bonus = calculate_speed_bonus(question.weight, response_time, self.speed_bonus_window) if correct and self.speed_bonus_window is not None else 0
+        points_awarded += speed_bonus
+        if correct:
+            self.number_correct += 1
+            self.points_earned += points_awarded
+
+        if self.scheduler is not None:
+            self.scheduler.record_answer(question, correct)
+
+        #if they got it wrong, the index also tells if their answer is a different state's capital
+        other_state = answer_match.matched_keys[0] if not correct and answer_match.matched_keys else None
+        other_capital = answer_match.matched_answer if other_state is not None else None
+
+        answer_result = AnswerResult(question, user_answer, correct, points_awarded, other_state, answer_match.edit_distance, response_time, speed_bonus, other_capital)
+        self.number_answered += 1
+        if self.record_answers:
+            self.answer_results.append(answer_result)
+        return answer_result
+
+    def score(self) -> tuple[int, int]:
+        """returns the number of questions correct and the points earned so far"""
+        return self.number_correct, self.points_earned
+
+    def summary(self) -> dict:
+        """returns the totals shown on the final screen"""
+        return {
+            "number_correct": self.number_correct,
+            "number_of_questions": self.number_of_questions,
+            "points_earned": self.points_earned,
+            "maximum_points": self.maximum_points,
+            "number_answered": self.number_answered,
+        }
+
+
+def generate_random_questions(number_of_questions: int, list_of_questions: list[Questions.Question] | None = None, random_generator: random.Random | None = None, scheduler = None) -> tuple[list[Questions.Question], int]:
+    """generates a list of random questions for the quiz
+
+    Arguments:
+        number_of_questions: the number of questions that the quiz will contain
+        list_of_questions: the questions to sample from (Questions.list_of_questions if None)
+        random_generator: the source of randomness (the random module if None)
+        scheduler: picks the questions instead of uniform sampling, such as a Question_Scheduler.UserSchedule
+
+    Returns:
+        list_of_random_questions: the list of questions that the quiz will run through
+        maximum_points: the maximum number of points that can be earned if all questions are answered correctly
+    """
+    if list_of_questions is None:
+        list_of_questions = Questions.list_of_questions
+    if random_generator is None:
+        random_generator = random
+
+    if scheduler is not None:
+        list_of_random_questions = scheduler.select_questions(number_of_questions, list_of_questions, random_generator)
+    else:
+        #a reload can shrink the bank below what was asked for, and a scheduler-less quiz cannot ask fewer questions
+        if number_of_questions > len(list_of_questions):
+            raise ValueError(f"There are only {len(list_of_questions)} questions to choose from!")
+        list_of_random_questions = random_generator.sample(list_of_questions, number_of_questions)
+    maximum_points = sum([question.weight for question in list_of_random_questions])
+    return list_of_random_questions, maximum_points
+
+
+def parse_number_of_questions(user_input: str, maximum_number_of_questions: int = MAXIMUM_NUMBER_OF_QUESTIONS) -> int:
+    """turns the user's input into a number of questions, raising ValueError with a message for the user if it is not valid
+
+    Arguments:
+        user_input: what the user typed
+        maximum_number_of_questions: the most questions that can be asked, such as the size of the current question bank
+    """
+    try:
+        question_amount = int(user_input)
+    except ValueError:
+        raise ValueError("The input must be an integer!") from None
+
+    if question_amount < MINIMUM_NUMBER_OF_QUESTIONS:
+        raise ValueError("The input is too low!")
+    if question_amount > maximum_number_of_questions:
+        raise ValueError("The input is too high!")
+    return question_amount
+
+
+def calculate_speed_bonus(weight: int, response_time: float, speed_bonus_window: float = DEFAULT_SPEED_BONUS_WINDOW) -> int:
+    """returns the extra points a correct answer earns for its speed: its weight for an instant answer, shrinking linearly to 0
+
+    Arguments:
+        weight: the question's point value
+        response_time: how many seconds the answer took
+        speed_bonus_window: how many seconds until the bonus runs out
+    """
+    if speed_bonus_window <= 0 or response_time >= speed_bonus_window:
+        return 0
+    return round(weight * (1 - max(0.0, response_time) / speed_bonus_window))
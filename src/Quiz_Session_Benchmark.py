@@ -0,0 +1,62 @@
+"""This file measures how many complete quiz sessions one core can run through the headless QuizSession.
+
+Each session asks every question, answering a mix of right capitals, other states' capitals and unknown answers,
+so all of the grading branches are exercised.
+
+Usage (from the repository root):
+    python src/Quiz_Session_Benchmark.py [--sessions N] [--questions N] [--seed N]
+"""
+
+import argparse
+import random
+import time
+import Questions
+import Quiz_Session
+
+
+def choose_answers(list_of_questions: list[Questions.Question], random_generator: random.Random) -> dict[str, str]:
+    """decides ahead of time what the simulated user answers for each state, so choosing answers is not timed
+
+    Arguments:
+        list_of_questions: every question that can be asked
+        random_generator: the source of randomness
+    """
+    list_of_capitals = [question.capital for question in list_of_questions]
+    answers = {}
+    for question in list_of_questions:
+        answers[question.state] = random_generator.choice([question.capital, question.capital, random_generator.choice(list_of_capitals), "I don't know"])
+    return answers
+
+
+def run_sessions(number_of_sessions: int, number_of_questions: int, seed: int = 0) -> float:
+    """runs complete quiz sessions back to back and returns how long (in seconds) they took
+
+    Arguments:
+        number_of_sessions: how many sessions to run
+        number_of_questions: how many questions each session asks
+        seed: the seed for picking questions and answers
+    """
+    random_generator = random.Random(seed)
+    answers = choose_answers(Questions.list_of_questions, random_generator)
+
+    start = time.perf_counter()
+    for _ in range(number_of_sessions):
+        session = Quiz_Session.QuizSession(number_of_questions, random_generator = random_generator)
+        question = session.next_question()
+        while question is not None:
+            session.submit(answers[question.state])
+            question = session.next_question()
+        session.summary()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Measure how many quiz sessions per second one core can run.")
+    argument_parser.add_argument("--sessions", type = int, default = 20000, help = "how many sessions to run")
+    argument_parser.add_argument("--questions", type = int, default = Quiz_Session.MAXIMUM_NUMBER_OF_QUESTIONS, help = "how many questions each session asks")
+    argument_parser.add_argument("--seed", type = int, default = 0, help = "the seed for picking questions and answers")
+    arguments = argument_parser.parse_args()
+
+    elapsed_seconds = run_sessions(arguments.sessions, arguments.questions, arguments.seed)
+    print(f"{arguments.sessions} sessions of {arguments.questions} questions in {elapsed_seconds:.3f} s")
+    print(f"{arguments.sessions / elapsed_seconds:,.0f} sessions/sec, {arguments.sessions * arguments.questions / elapsed_seconds:,.0f} answers/sec")
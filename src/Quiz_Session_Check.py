@@ -0,0 +1,93 @@
+"""This file checks Quiz_Session against question pools of unusual sizes, the way a reloaded question bank can leave them.
+
+Each check prints whether it went as expected, and the process exits with status 1 if any did not.
+
+Usage (from the repository root):
+    python src/Quiz_Session_Check.py
+"""
+
+import sys
+import Question_Scheduler
+import Questions
+import Quiz_Session
+import States_and_State_Capitals_Reader
+
+
+def create_small_pool(size: int) -> list[Questions.Question]:
+    """returns the first size questions of the bank, as a pool that has shrunk
+
+    Arguments:
+        size: how many questions to keep
+    """
+    return Questions.list_of_questions[:size]
+
+
+def run_whole_quiz(session: Quiz_Session.QuizSession) -> int:
+    """answers every question of a session correctly and returns how many were asked"""
+    number_asked = 0
+    while (question := session.next_question()) is not None:
+        session.submit(question.capital)
+        number_asked += 1
+    return number_asked
+
+
+def check(name: str, run) -> bool:
+    """runs one check and prints if it went as expected
+
+    Arguments:
+        name: what the check checks
+        run: returns a list of problems (empty if none)
+    """
+    try:
+        problems = run()
+    except Exception as error:
+        problems = [f"raised {type(error).__name__}: {error}"]
+    print(f"{'ok  ' if not problems else 'FAIL'} {name}")
+    for problem in problems:
+        print(f"       problem: {problem}")
+    return not problems
+
+
+def check_scheduler_with_small_pool() -> list[str]:
+    """a scheduled quiz asked for more questions than the pool holds runs through the pool and finishes"""
+    session = Quiz_Session.QuizSession(10, list_of_questions = create_small_pool(5), scheduler = Question_Scheduler.UserSchedule())
+    problems = []
+    if session.number_of_questions != 5:
+        problems.append(f"number_of_questions is {session.number_of_questions} instead of 5")
+    number_asked = run_whole_quiz(session)
+    if number_asked != 5 or not session.finished:
+        problems.append(f"asked {number_asked} questions and finished is {session.finished}")
+    return problems
+
+
+def check_uniform_quiz_with_small_pool() -> list[str]:
+    """a quiz without a scheduler asked for more questions than the pool holds is refused with a message, not a sampling error"""
+    try:
+        Quiz_Session.QuizSession(10, list_of_questions = create_small_pool(5))
+    except ValueError as error:
+        return [] if "only 5 questions" in str(error) else [f"the message was {str(error)!r}"]
+    return ["the quiz started"]
+
+
+def check_parse_against_pool_size() -> list[str]:
+    """the number of questions is checked against the pool's size, not the full table's"""
+    problems = []
+    if Quiz_Session.parse_number_of_questions("5", 5) != 5:
+        problems.append("5 of 5 was refused")
+    try:
+        Quiz_Session.parse_number_of_questions("6", 5)
+        problems.append("6 of 5 was accepted")
+    except ValueError:
+        pass
+    return problems
+
+
+if __name__ == "__main__":
+    States_and_State_Capitals_Reader.load()
+    results = [
+        check("a scheduler's smaller pool shortens the quiz instead of running past it", check_scheduler_with_small_pool),
+        check("a uniform quiz larger than the pool is refused with a message", check_uniform_quiz_with_small_pool),
+        check("the number of questions is bounded by the pool's size", check_parse_against_pool_size),
+    ]
+    print(f"{sum(results)}/{len(results)} checks went as expected")
+    sys.exit(0 if all(results) else 1)
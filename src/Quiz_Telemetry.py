@@ -0,0 +1,246 @@
+"""This file records how long each part of a quiz takes, so slow answers, slow repaints and slow fetches can be told apart.
+
+Every duration is taken with time.perf_counter_ns and added to a fixed-bucket histogram, so recording costs one
+bisect and a few integer additions, and memory does not grow with the number of answers.
+The histograms below are recorded by main.py:
+    answer: from a question being shown to its answer being submitted (how long the user thought)
+    feedback_render: from an answer being submitted to its feedback being drawn
+    question_render: from asking for the next question to it being drawn
+    event_loop_lag: how late the tkinter event loop ran a callback (from Event_Loop_Monitor)
+    rank_fetch: how long getting the population ranks took, from the cache or the website
+    rank_parse: how much of the fetch was spent parsing the page
+
+Telemetry is off unless main.py is given somewhere to write it; the only cost left then is a check for None.
+
+Exports:
+    LatencyHistogram: a class that counts durations into fixed buckets
+    QuizTelemetry: a class that holds one histogram per measurement and exports them as JSON or Prometheus text
+    measure_overhead: times recording with telemetry on and off
+
+Use Cases:
+    telemetry = QuizTelemetry()
+    telemetry.record("answer", 2_500_000_000)
+    telemetry.write_prometheus("quiz_metrics.prom")
+
+Usage (from the repository root):
+    python src/Quiz_Telemetry.py [--events N]    (prints the recording overhead per event)
+"""
+
+import argparse
+import bisect
+import json
+import os
+import threading
+import time
+
+#the upper bounds (in nanoseconds) of the buckets: doubling from 100 microseconds to about 105 seconds, then +Inf
+DEFAULT_BUCKET_BOUNDS = tuple(100_000 * 2 ** exponent for exponent in range(21))
+
+#the measurements main.py records, in the order they are reported, with the help text Prometheus shows for them
+MEASUREMENTS = {
+    "answer": "Time from a question being shown to its answer being submitted.",
+    "feedback_render": "Time from an answer being submitted to its feedback being drawn.",
+    "question_render": "Time from asking for the next question to it being drawn.",
+    "event_loop_lag": "How late the tkinter event loop ran a scheduled callback.",
+    "rank_fetch": "Time taken to get the population ranks from the cache or the website.",
+    "rank_parse": "Time spent parsing the population rank page.",
+}
+
+PROMETHEUS_PREFIX = "us_state_capitals_quiz"
+
+
+class LatencyHistogram:
+    """This class counts durations into fixed buckets; quantiles are estimated from the buckets.
+
+    Attributes:
+        bucket_bounds: the upper bound (in nanoseconds) of every bucket but the last, which has no bound
+        bucket_counts: how many durations fell into each bucket (one more than bucket_bounds)
+        count: how many durations were recorded
+        total: the sum (in nanoseconds) of every duration
+        maximum: the largest duration (in nanoseconds) recorded
+    """
+    __slots__ = ("bucket_bounds", "bucket_counts", "count", "total", "maximum")
+
+    def __init__(self, bucket_bounds: tuple[int, ...] = DEFAULT_BUCKET_BOUNDS):
+        "initializes the LatencyHistogram class"
+        self.bucket_bounds = bucket_bounds
+        self.bucket_counts = [0] * (len(bucket_bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def record(self, duration: int):
+        """adds one duration
+
+        Arguments:
+            duration: how long something took, in nanoseconds
+        """
+        self.bucket_counts[bisect.bisect_left(self.bucket_bounds, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.maximum:
+            self.maximum = duration
+
+    def quantile(self, fraction: float) -> int:
+        """returns the upper bound (in nanoseconds) of the bucket holding the given fraction of durations, or 0 if there are none
+
+        Durations in the last bucket have no upper bound, so the maximum is returned for them.
+
+        Arguments:
+            fraction: which quantile to estimate, such as 0.99
+        """
+        if self.count == 0:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self.bucket_bounds[index], self.maximum) if index < len(self.bucket_bounds) else self.maximum
+        return self.maximum
+
+    def to_dict(self) -> dict:
+        """returns the histogram in seconds, with its count, sum, mean, maximum, estimated quantiles and cumulative buckets"""
+        cumulative_buckets = []
+        seen = 0
+        for bound, bucket_count in zip(self.bucket_bounds, self.bucket_counts):
+            seen += bucket_count
+            cumulative_buckets.append([bound / 1e9, seen])
+        cumulative_buckets.append(["+Inf", self.count])
+
+        return {
+            "count": self.count,
+            "sum_seconds": self.total / 1e9,
+            "mean_seconds": self.total / self.count / 1e9 if self.count else 0.0,
+            "maximum_seconds": self.maximum / 1e9,
+            "p50_seconds": self.quantile(0.5) / 1e9,
+            "p90_seconds": self.quantile(0.9) / 1e9,
+            "p99_seconds": self.quantile(0.99) / 1e9,
+            "buckets": cumulative_buckets,
+        }
+
+
+class QuizTelemetry:
+    """This class holds one histogram per measurement; it is safe to record from the rank fetch thread.
+
+    Attributes:
+        histograms: a dictionary that maps each measurement's name to its LatencyHistogram
+        started_at: when (in time.time seconds) recording began
+    """
+    def __init__(self, measurements = MEASUREMENTS):
+        "initializes the QuizTelemetry class"
+        self.histograms = {name: LatencyHistogram() for name in measurements}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration: int):
+        """adds one duration to a measurement's histogram, creating the histogram if it is new
+
+        Arguments:
+            name: the measurement, such as "answer"
+            duration: how long it took, in nanoseconds
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(duration)
+
+    def record_since(self, name: str, started_at: int):
+        """adds the time from started_at until now to a measurement's histogram
+
+        Arguments:
+            name: the measurement, such as "feedback_render"
+            started_at: when (in time.perf_counter_ns nanoseconds) it began
+        """
+        self.record(name, time.perf_counter_ns() - started_at)
+
+    def to_dict(self) -> dict:
+        """returns every histogram, in seconds, as a JSON-ready dictionary"""
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "exported_at": time.time(),
+                "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+
+    def create_prometheus_text(self) -> str:
+        """returns every histogram in the Prometheus text exposition format, in seconds"""
+        lines = []
+        for name, histogram in self.to_dict()["histograms"].items():
+            metric_name = f"{PROMETHEUS_PREFIX}_{name}_seconds"
+            lines.append(f"# HELP {metric_name} {MEASUREMENTS.get(name, name.replace('_', ' ').capitalize() + '.')}")
+            lines.append(f"# TYPE {metric_name} histogram")
+            for bound, seen in histogram["buckets"]:
+                lines.append(f'{metric_name}_bucket{{le="{bound if bound == "+Inf" else format(bound, "g")}"}} {seen}')
+            lines.append(f"{metric_name}_sum {histogram['sum_seconds']:g}")
+            lines.append(f"{metric_name}_count {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, file_name: str):
+        """writes the JSON report, replacing the file atomically
+
+        Arguments:
+            file_name: where the report goes
+        """
+        _write_atomically(json.dumps(self.to_dict(), indent = 2), file_name)
+
+    def write_prometheus(self, file_name: str):
+        """writes the Prometheus text, replacing the file atomically so a scraper never reads half of it
+
+        Arguments:
+            file_name: where the metrics go (node_exporter's textfile collector reads *.prom files)
+        """
+        _write_atomically(self.create_prometheus_text(), file_name)
+
+
+def _write_atomically(text: str, file_name: str):
+    """writes text to a temporary file and moves it over file_name
+
+    Arguments:
+        text: what to write
+        file_name: the file to replace
+    """
+    temporary_file_name = f"{file_name}.tmp"
+    with open(temporary_file_name, "w", encoding = "utf-8") as temporary_file:
+        temporary_file.write(text)
+    os.replace(temporary_file_name, file_name)
+
+
+def measure_overhead(number_of_events: int = 1_000_000) -> dict[str, float]:
+    """returns the cost (in nanoseconds per event) of an instrumented call site with telemetry off and on
+
+    The call site is the one QuizScreen uses: a perf_counter_ns timestamp and a check for None, then recording.
+
+    Arguments:
+        number_of_events: how many events to time
+    """
+    def run(telemetry) -> float:
+        start = time.perf_counter_ns()
+        for _ in range(number_of_events):
+            if telemetry is not None:
+                telemetry.record_since("answer", time.perf_counter_ns())
+        return (time.perf_counter_ns() - start) / number_of_events
+
+    def run_bare() -> float:
+        start = time.perf_counter_ns()
+        for _ in range(number_of_events):
+            pass
+        return (time.perf_counter_ns() - start) / number_of_events
+
+    #the bare loop is subtracted so only the instrumentation is left
+    loop = min(run_bare() for _ in range(3))
+    return {
+        "disabled": max(0.0, min(run(None) for _ in range(3)) - loop),
+        "enabled": max(0.0, min(run(QuizTelemetry()) for _ in range(3)) - loop),
+    }
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Measure how much recording quiz telemetry costs.")
+    argument_parser.add_argument("--events", type = int, default = 1_000_000, help = "how many events to time")
+    arguments = argument_parser.parse_args()
+
+    overhead = measure_overhead(arguments.events)
+    print(f"telemetry off: {overhead['disabled']:.1f} ns per event")
+    print(f"telemetry on:  {overhead['enabled']:.1f} ns per event")
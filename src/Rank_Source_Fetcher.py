@@ -0,0 +1,426 @@
+"""This file fetches the population ranks from several sources at once, so one slow or broken site cannot hold them back.
+
+Every source is fetched on its own thread with its own timeout, and retried with exponential backoff (plus jitter)
+after a connection error, a timeout, a 429 or a 5xx. Connections are kept alive in a pool shared by every fetch, so a
+retry or the next refresh skips the TCP and TLS handshakes. A source's page is valid only if it parses into a rank
+for every state, with every rank from 1 to the number of states used exactly once.
+
+Two ways of picking the ranks:
+    first: the first valid ranking wins; slower sources are abandoned
+    quorum: a ranking wins once enough sources agree on it exactly (a majority of the sources unless told otherwise)
+
+Every fetch reports which source won, how long each source took, how many attempts it made and why it failed,
+so a fallback to the backup dictionary is never silent.
+
+http.client is used instead of requests (which the single-source scraper still uses) so importing this adds nothing
+to the quiz's startup time. The fetch threads are daemon threads, so a source that is still hanging never keeps the
+process from exiting.
+
+Exports:
+    RankSource: a class that describes one place the ranks can be fetched from
+    FetchOutcome: a class that describes how a fetch went, source by source
+    RankFetchError: raised when no ranking could be picked, carrying every source's result
+    ConnectionPool: a class that keeps idle keep-alive connections for reuse
+    fetch_from_sources: fetches every source concurrently and picks the ranks
+    load_rank_sources: reads the list of sources from a JSON file
+
+Use Cases:
+    outcome = fetch_from_sources([RankSource("primary", URL), RankSource("mirror", MIRROR_URL)], strategy = "quorum")
+    outcome.winning_source == "primary"
+    outcome.population_ranks["California"] == 1
+
+Usage (from the repository root):
+    python src/Rank_Source_Fetcher.py SOURCES.json [--strategy first|quorum] [--quorum N]
+"""
+
+import argparse
+import http.client
+import json
+import queue
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+import States_and_State_Capitals_Reader
+
+#how long (in seconds) each connection attempt and each read may take, and how often a source is retried
+DEFAULT_SOURCE_TIMEOUT = 5
+DEFAULT_RETRIES = 2
+
+#the first retry waits about this long (in seconds); every later retry waits twice as long as the one before
+BACKOFF_BASE = 0.2
+
+#the most idle connections kept for each host
+MAXIMUM_IDLE_CONNECTIONS_PER_HOST = 4
+
+#responses with these statuses are worth retrying
+RETRYABLE_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+STRATEGIES = ("first", "quorum")
+
+
+class RankSource:
+    """This class describes one place the population ranks can be fetched from.
+
+    Attributes:
+        name: what the source is called in reports
+        url: the page to download
+        timeout: how long (in seconds) connecting and each read may take
+        retries: how many times to try again after a retryable failure
+        parse: turns the page's text into population ranks (Population_Rank_Web_Scraper.parse_population_ranks_streaming if None)
+    """
+    def __init__(self, name: str, url: str, timeout: float = DEFAULT_SOURCE_TIMEOUT, retries: int = DEFAULT_RETRIES, parse = None):
+        "initializes the RankSource class"
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.parse = parse
+
+    def __repr__(self) -> str:
+        return f"RankSource({self.name!r}, {self.url!r})"
+
+
+class SourceResult:
+    """This class describes how fetching one source went.
+
+    Attributes:
+        source_name: which source it was
+        population_ranks: the valid ranks it returned, or None
+        error: why it failed (or "abandoned" if a ranking was picked before it finished), or None
+        attempts: how many requests were made
+        seconds: how long the source took from start to finish (or to being abandoned)
+    """
+    def __init__(self, source_name: str, population_ranks: dict[str, int] | None, error: str | None, attempts: int, seconds: float):
+        "initializes the SourceResult class"
+        self.source_name = source_name
+        self.population_ranks = population_ranks
+        self.error = error
+        self.attempts = attempts
+        self.seconds = seconds
+
+    def to_dict(self) -> dict:
+        """returns the result without the ranks, for reports and logs"""
+        return {"source": self.source_name, "valid": self.population_ranks is not None, "error": self.error,
+            "attempts": self.attempts, "seconds": self.seconds}
+
+
+class FetchOutcome:
+    """This class describes how a fetch from several sources went.
+
+    Attributes:
+        population_ranks: the ranks that were picked
+        winning_source: the source whose ranks were picked (the first to finish among those that agreed, for quorum)
+        agreeing_sources: every source that returned exactly the picked ranks
+        source_results: a SourceResult for every source, in the order the sources were given
+        seconds: how long the whole fetch took
+    """
+    def __init__(self, population_ranks: dict[str, int], winning_source: str, agreeing_sources: list[str], source_results: list[SourceResult], seconds: float):
+        "initializes the FetchOutcome class"
+        self.population_ranks = population_ranks
+        self.winning_source = winning_source
+        self.agreeing_sources = agreeing_sources
+        self.source_results = source_results
+        self.seconds = seconds
+
+    def to_dict(self) -> dict:
+        """returns the outcome without the ranks, for reports and logs"""
+        return {"winning_source": self.winning_source, "agreeing_sources": self.agreeing_sources, "seconds": self.seconds,
+            "sources": [source_result.to_dict() for source_result in self.source_results]}
+
+
+class RankFetchError(Exception):
+    """raised when no ranking could be picked
+
+    Attributes:
+        source_results: a SourceResult for every source, so the caller can tell why
+    """
+    def __init__(self, message: str, source_results: list[SourceResult]):
+        "initializes the RankFetchError class"
+        super().__init__(message)
+        self.source_results = source_results
+
+
+class _RetryableError(Exception):
+    """raised inside a fetch for failures that are worth another attempt"""
+
+
+class ConnectionPool:
+    """This class keeps idle keep-alive connections for reuse, one list per (scheme, host, port); it is thread-safe.
+
+    Attributes:
+        maximum_idle_connections: the most idle connections kept for each host
+        connections_opened: how many connections were opened, to show how many handshakes were saved
+    """
+    def __init__(self, maximum_idle_connections: int = MAXIMUM_IDLE_CONNECTIONS_PER_HOST):
+        "initializes the ConnectionPool class"
+        self.maximum_idle_connections = maximum_idle_connections
+        self.connections_opened = 0
+        self._idle_connections = {}
+        self._lock = threading.Lock()
+
+    def request(self, url: str, timeout: float, headers: dict[str, str] | None = None) -> tuple[int, dict[str, str], bytes]:
+        """sends a GET request on an idle connection (or a new one) and returns the status, headers and decoded body
+
+        A connection is only returned to the pool once its whole response was read.
+
+        Arguments:
+            url: the page to download
+            timeout: how long (in seconds) connecting and each read may take
+            headers: extra request headers
+        """
+        parsed_url = urllib.parse.urlsplit(url)
+        key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+        path = parsed_url.path or "/"
+        if parsed_url.query:
+            path += "?" + parsed_url.query
+
+        request_headers = {"Accept-Encoding": "gzip", "Connection": "keep-alive", **(headers or {})}
+
+        connection, reused = self._take_connection(key, timeout)
+        try:
+            response, body = self._send(connection, path, request_headers)
+        except (OSError, http.client.HTTPException):
+            #a kept-alive connection may have been closed by the server while it sat idle, so try once more on a new one
+            if not reused:
+                raise
+            connection, _ = self._take_connection(key, timeout, idle = False)
+            response, body = self._send(connection, path, request_headers)
+
+        response_headers = {name.lower(): value for name, value in response.getheaders()}
+        if response.will_close:
+            connection.close()
+        else:
+            self._give_back(key, connection)
+
+        if response_headers.get("content-encoding") == "gzip":
+            body = zlib.decompress(body, wbits = 31)
+        return response.status, response_headers, body
+
+    def close(self):
+        """closes every idle connection"""
+        with self._lock:
+            idle_connections, self._idle_connections = self._idle_connections, {}
+        for connections in idle_connections.values():
+            for connection in connections:
+                connection.close()
+
+    @staticmethod
+    def _send(connection: http.client.HTTPConnection, path: str, request_headers: dict[str, str]) -> tuple[http.client.HTTPResponse, bytes]:
+        """sends a GET request and reads the whole response, closing the connection if anything fails"""
+        try:
+            connection.request("GET", path, headers = request_headers)
+            response = connection.getresponse()
+            return response, response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+
+    def _take_connection(self, key: tuple, timeout: float, idle: bool = True) -> tuple[http.client.HTTPConnection, bool]:
+        """returns an idle connection for the host (and True), or a new one (and False)"""
+        if idle:
+            with self._lock:
+                connections = self._idle_connections.get(key)
+                if connections:
+                    connection = connections.pop()
+                    connection.timeout = timeout
+                    if connection.sock is not None:
+                        connection.sock.settimeout(timeout)
+                    return connection, True
+
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        with self._lock:
+            self.connections_opened += 1
+        return connection_class(host, port, timeout = timeout), False
+
+    def _give_back(self, key: tuple, connection: http.client.HTTPConnection):
+        """keeps a connection for reuse, closing it if the host already has enough idle ones"""
+        with self._lock:
+            connections = self._idle_connections.setdefault(key, [])
+            if len(connections) < self.maximum_idle_connections:
+                connections.append(connection)
+                return
+        connection.close()
+
+
+#shared by every fetch, so a refresh reuses the connections of the last one
+_default_connection_pool = ConnectionPool()
+
+
+def _decode_body(body: bytes, response_headers: dict[str, str]) -> str:
+    """returns the text of a response, using the charset it declares (utf-8 if none)"""
+    content_type = response_headers.get("content-type", "")
+    charset = "utf-8"
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.strip().partition("=")
+        if name.lower() == "charset" and value:
+            charset = value.strip('"')
+    try:
+        return body.decode(charset, errors = "replace")
+    except LookupError:
+        return body.decode("utf-8", errors = "replace")
+
+
+def validate_population_ranks(population_ranks: dict[str, int], list_of_state_names: list[str] | None = None):
+    """raises ValueError unless every state has a rank and the ranks are 1 to the number of states, each used once
+
+    Arguments:
+        population_ranks: the ranks to check
+        list_of_state_names: every state (States_and_State_Capitals_Reader's if None)
+    """
+    if list_of_state_names is None:
+        list_of_state_names = States_and_State_Capitals_Reader.list_of_state_names
+    if set(population_ranks) != set(list_of_state_names):
+        raise ValueError("The ranks do not cover exactly the known states.")
+    if sorted(population_ranks.values()) != list(range(1, len(list_of_state_names) + 1)):
+        raise ValueError("The ranks are not each rank from 1 to the number of states.")
+
+
+def fetch_source(source: RankSource, connection_pool: ConnectionPool | None = None, stop_event: threading.Event | None = None) -> SourceResult:
+    """fetches, parses and validates one source, retrying retryable failures with exponential backoff and jitter
+
+    Arguments:
+        source: the source to fetch
+        connection_pool: where connections are reused from (the shared pool if None)
+        stop_event: once set, no more attempts are made (a ranking was already picked)
+    """
+    import Population_Rank_Web_Scraper
+
+    if connection_pool is None:
+        connection_pool = _default_connection_pool
+    if stop_event is None:
+        stop_event = threading.Event()
+    parse = source.parse if source.parse is not None else Population_Rank_Web_Scraper.parse_population_ranks_streaming
+
+    start = time.perf_counter()
+    attempts = 0
+    error = None
+    for attempt in range(source.retries + 1):
+        if attempt > 0:
+            #full jitter keeps sources that failed together from retrying together
+            if stop_event.wait(random.uniform(0, BACKOFF_BASE * 2 ** (attempt - 1))):
+                break
+        if stop_event.is_set():
+            break
+
+        attempts += 1
+        try:
+            try:
+                status, response_headers, body = connection_pool.request(source.url, source.timeout)
+            except (OSError, http.client.HTTPException) as request_error:
+                raise _RetryableError(f"{type(request_error).__name__}: {request_error}")
+            if status in RETRYABLE_STATUSES:
+                raise _RetryableError(f"HTTP {status}")
+            if status != 200:
+                return SourceResult(source.name, None, f"HTTP {status}", attempts, time.perf_counter() - start)
+
+            #a page that does not parse will not parse any better on the next attempt
+            population_ranks = parse(_decode_body(body, response_headers))
+            validate_population_ranks(population_ranks)
+            return SourceResult(source.name, population_ranks, None, attempts, time.perf_counter() - start)
+        except _RetryableError as retryable_error:
+            error = str(retryable_error)
+        except Exception as parse_error:
+            return SourceResult(source.name, None, f"invalid page: {parse_error}", attempts, time.perf_counter() - start)
+
+    return SourceResult(source.name, None, error or "abandoned", attempts, time.perf_counter() - start)
+
+
+def fetch_from_sources(sources: list[RankSource], strategy: str = "first", quorum: int | None = None, connection_pool: ConnectionPool | None = None) -> FetchOutcome:
+    """fetches every source concurrently on daemon threads and picks the ranks, without waiting on sources it no longer needs
+
+    Arguments:
+        sources: where to fetch the ranks from (each with its own name)
+        strategy: "first" (the first valid ranking wins) or "quorum" (a ranking wins once enough sources agree on it)
+        quorum: how many sources must agree for "quorum" (a majority of the sources if None)
+
+    Returns:
+        the picked ranks and how every source did; raises RankFetchError if no ranking could be picked
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"The strategy must be one of {', '.join(STRATEGIES)}.")
+    if not sources:
+        raise ValueError("There must be at least one source.")
+    if len({source.name for source in sources}) != len(sources):
+        raise ValueError("Every source must have its own name.")
+    if quorum is None:
+        quorum = len(sources) // 2 + 1 if strategy == "quorum" else 1
+
+    start = time.perf_counter()
+    stop_event = threading.Event()
+    finished_results = queue.SimpleQueue()
+    source_results = {}
+    sources_by_ranking = {}
+    winner = None
+
+    #each result arrives with the source's position, and a fetch that raises still reports back, so nothing is waited on forever
+    def fetch_into_queue(position: int, source: RankSource):
+        try:
+            source_result = fetch_source(source, connection_pool, stop_event)
+        except Exception as error:
+            source_result = SourceResult(source.name, None, f"failed: {error}", 0, time.perf_counter() - start)
+        finished_results.put((position, source_result))
+
+    for position, source in enumerate(sources):
+        threading.Thread(target = fetch_into_queue, args = (position, source), name = f"rank-source-{position}", daemon = True).start()
+
+    try:
+        for _ in sources:
+            position, source_result = finished_results.get()
+            source_results[position] = source_result
+            if source_result.population_ranks is None:
+                continue
+
+            ranking = tuple(sorted(source_result.population_ranks.items()))
+            agreeing_sources = sources_by_ranking.setdefault(ranking, [])
+            agreeing_sources.append(source_result.source_name)
+            if len(agreeing_sources) >= quorum:
+                winner = (source_result.population_ranks, agreeing_sources[0])
+                break
+    finally:
+        #sources still running are told to stop retrying; their threads finish on their own
+        stop_event.set()
+
+    seconds = time.perf_counter() - start
+    ordered_results = [source_results.get(position) or SourceResult(source.name, None, "abandoned", 0, seconds) for position, source in enumerate(sources)]
+
+    if winner is None:
+        failures = "; ".join(f"{source_result.source_name}: {source_result.error or 'disagreed'}" for source_result in ordered_results)
+        raise RankFetchError(f"No ranking was agreed on by {quorum} source(s) ({failures}).", ordered_results)
+
+    population_ranks, winning_source = winner
+    ranking = tuple(sorted(population_ranks.items()))
+    return FetchOutcome(population_ranks, winning_source, sources_by_ranking[ranking], ordered_results, seconds)
+
+
+def load_rank_sources(file_name: str) -> list[RankSource]:
+    """reads sources from a JSON file holding a list of {"name", "url", "timeout" (optional), "retries" (optional)}
+
+    Arguments:
+        file_name: the JSON file
+    """
+    with open(file_name, "r", encoding = "utf-8") as sources_file:
+        source_descriptions = json.load(sources_file)
+
+    if not isinstance(source_descriptions, list):
+        raise ValueError("The rank sources file must hold a list of sources.")
+    return [RankSource(description["name"], description["url"], description.get("timeout", DEFAULT_SOURCE_TIMEOUT), description.get("retries", DEFAULT_RETRIES))
+        for description in source_descriptions]
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Fetch the population ranks from several sources and report how each did.")
+    argument_parser.add_argument("sources", help = "a JSON file listing the sources")
+    argument_parser.add_argument("--strategy", choices = STRATEGIES, default = "first", help = "take the first valid ranking, or wait for a quorum to agree")
+    argument_parser.add_argument("--quorum", type = int, help = "how many sources must agree (a majority if not given)")
+    arguments = argument_parser.parse_args()
+
+    States_and_State_Capitals_Reader.load()
+    try:
+        outcome = fetch_from_sources(load_rank_sources(arguments.sources), arguments.strategy, arguments.quorum)
+    except RankFetchError as error:
+        print(error)
+        raise SystemExit(1)
+    print(json.dumps(outcome.to_dict(), indent = 2))
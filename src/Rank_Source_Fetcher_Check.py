@@ -0,0 +1,261 @@
+"""This file checks Rank_Source_Fetcher against local stand-in HTTP servers that misbehave on purpose.
+
+Every stand-in server serves the saved WorldPopulationReview page (or a page with two ranks swapped, which is valid
+but disagrees), following a script of behaviors, one per request: answer at once, answer after a delay, fail with a
+status, hang, drop the connection or send a page that does not parse. Each scenario prints which source won and how
+long every source took, and the process exits with status 1 if any scenario did not end the way it should.
+
+Usage (from the repository root):
+    python src/Rank_Source_Fetcher_Check.py
+"""
+
+import gzip
+import http.server
+import os
+import subprocess
+import sys
+import threading
+import time
+import Benchmark_Suite
+import Population_Rank_Web_Scraper
+import Rank_Source_Fetcher
+import States_and_State_Capitals_Reader
+
+FIXTURE_FILE_NAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "fixtures", "worldpopulationreview_states.html")
+
+
+class StandInServer:
+    """This class serves rank pages on a free local port, following a script of behaviors (the last one repeats).
+
+    Behaviors:
+        "ok": the page at once
+        ("delay", seconds): the page after a delay
+        ("status", code): an empty response with that status
+        ("hang", seconds): nothing until the delay is over, then the connection is closed
+        "drop": the connection is closed without a response
+        "garbage": a page without the table
+        "gzip": the page, gzip compressed
+
+    Attributes:
+        url: where the server is listening
+        requests_served: how many requests arrived
+        connections_accepted: how many connections were opened to it
+    """
+    def __init__(self, page: bytes, behaviors: list):
+        "starts the server on a background thread"
+        self.page = page
+        self.behaviors = behaviors
+        self.requests_served = 0
+        self.connections_accepted = 0
+        stand_in_server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                stand_in_server.connections_accepted += 1
+                super().setup()
+
+            def do_GET(self):
+                behavior = stand_in_server.behaviors[min(stand_in_server.requests_served, len(stand_in_server.behaviors) - 1)]
+                stand_in_server.requests_served += 1
+                kind, argument = behavior if isinstance(behavior, tuple) else (behavior, None)
+
+                if kind == "delay":
+                    time.sleep(argument)
+                if kind == "hang":
+                    time.sleep(argument)
+                    self.close_connection = True
+                    return
+                if kind == "drop":
+                    self.close_connection = True
+                    return
+                if kind == "status":
+                    self.send_response(argument)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = b"<html><body><p>Nothing to see here</p></body></html>" if kind == "garbage" else stand_in_server.page
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                if kind == "gzip":
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *arguments):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/states"
+        threading.Thread(target = self._server.serve_forever, daemon = True).start()
+
+    def close(self):
+        """stops the server"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def create_disagreeing_page(population_ranks: dict[str, int]) -> bytes:
+    """returns a valid rank page whose two most populous states have swapped ranks"""
+    swapped_ranks = dict(population_ranks)
+    first, second = sorted(swapped_ranks, key = swapped_ranks.get)[:2]
+    swapped_ranks[first], swapped_ranks[second] = swapped_ranks[second], swapped_ranks[first]
+    return Benchmark_Suite.create_rank_page(list(swapped_ranks), swapped_ranks).encode("utf-8")
+
+
+def run_scenario(name: str, servers: list[tuple[bytes, list]], strategy: str = "first", timeout: float = 2, retries: int = 2,
+        expected_winner: str | None = None, expected_ranks: dict[str, int] | None = None, maximum_seconds: float | None = None,
+        expected_attempts: dict[str, int] | None = None, maximum_connections: int | None = None, repeat: int = 1) -> bool:
+    """runs one fetch (or several on one connection pool) against fresh stand-in servers and returns True if it went as expected
+
+    Arguments:
+        name: what the scenario checks
+        servers: (page, behaviors) for every source, named a, b, c and so on
+        strategy: "first" or "quorum"
+        timeout: every source's timeout (in seconds)
+        retries: how many times every source may retry
+        expected_winner: the source that should win, or None if the fetch should fail
+        expected_ranks: the ranks that should be picked
+        maximum_seconds: the longest the fetch may take
+        expected_attempts: how many requests some sources should have made
+        maximum_connections: the most connections all the fetches together may open
+        repeat: how many fetches to run on the same connection pool
+    """
+    stand_in_servers = [StandInServer(page, behaviors) for page, behaviors in servers]
+    sources = [Rank_Source_Fetcher.RankSource(source_name, stand_in_server.url, timeout, retries)
+        for source_name, stand_in_server in zip("abcdefgh", stand_in_servers)]
+    connection_pool = Rank_Source_Fetcher.ConnectionPool()
+    problems = []
+
+    try:
+        for _ in range(repeat):
+            try:
+                outcome = Rank_Source_Fetcher.fetch_from_sources(sources, strategy, connection_pool = connection_pool)
+            except Rank_Source_Fetcher.RankFetchError as error:
+                outcome = None
+                source_results = error.source_results
+                seconds = max(source_result.seconds for source_result in source_results)
+                if expected_winner is not None:
+                    problems.append(f"no ranking was picked: {error}")
+            else:
+                source_results = outcome.source_results
+                seconds = outcome.seconds
+                if expected_winner is None:
+                    problems.append(f"{outcome.winning_source} won, but the fetch should have failed")
+                elif outcome.winning_source != expected_winner:
+                    problems.append(f"{outcome.winning_source} won instead of {expected_winner}")
+                if expected_ranks is not None and outcome.population_ranks != expected_ranks:
+                    problems.append("the wrong ranks were picked")
+
+            if maximum_seconds is not None and seconds > maximum_seconds:
+                problems.append(f"took {seconds:.2f} s (at most {maximum_seconds:g} s)")
+            for source_result in source_results:
+                if expected_attempts is not None and source_result.source_name in expected_attempts and source_result.attempts != expected_attempts[source_result.source_name]:
+                    problems.append(f"{source_result.source_name} made {source_result.attempts} attempts instead of {expected_attempts[source_result.source_name]}")
+
+        connections_accepted = sum(stand_in_server.connections_accepted for stand_in_server in stand_in_servers)
+        if maximum_connections is not None and connections_accepted > maximum_connections:
+            problems.append(f"opened {connections_accepted} connections (at most {maximum_connections})")
+    finally:
+        connection_pool.close()
+        for stand_in_server in stand_in_servers:
+            stand_in_server.close()
+
+    print(f"{'ok  ' if not problems else 'FAIL'} {name}: " + (f"{outcome.winning_source} won in {seconds * 1000:.0f} ms" if outcome is not None else f"failed after {seconds * 1000:.0f} ms"))
+    for source_result in source_results:
+        print(f"       {source_result.source_name}: {source_result.seconds * 1000:7.0f} ms, {source_result.attempts} attempt(s), {source_result.error or 'valid'}")
+    for problem in problems:
+        print(f"       problem: {problem}")
+    return not problems
+
+
+def check_exit_with_hanging_source(name: str, page: bytes) -> bool:
+    """runs a fetch in a new process whose slower source hangs, and returns True if the process exits once a source wins
+
+    Arguments:
+        name: what the check checks
+        page: the page the faster source serves
+    """
+    stand_in_servers = [StandInServer(page, [("hang", 10)]), StandInServer(page, [("delay", 0.2)])]
+    fetch_code = ("import Rank_Source_Fetcher, States_and_State_Capitals_Reader; States_and_State_Capitals_Reader.load(); "
+        f"print(Rank_Source_Fetcher.fetch_from_sources([Rank_Source_Fetcher.RankSource('a', {stand_in_servers[0].url!r}, 10, 0), "
+        f"Rank_Source_Fetcher.RankSource('b', {stand_in_servers[1].url!r}, 10, 0)]).winning_source)")
+    problems = []
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run([sys.executable, "-c", fetch_code], cwd = os.path.dirname(os.path.abspath(__file__)), capture_output = True, text = True, timeout = 8)
+        if completed.stdout.strip() != "b":
+            problems.append(f"printed {completed.stdout.strip()!r} ({completed.stderr.strip().splitlines()[-1:] or 'no error'})")
+    except subprocess.TimeoutExpired:
+        problems.append("the process waited on the hanging source")
+    finally:
+        for stand_in_server in stand_in_servers:
+            stand_in_server.close()
+    seconds = time.perf_counter() - start
+    if seconds > 5:
+        problems.append(f"took {seconds:.2f} s to exit (at most 5 s)")
+
+    print(f"{'ok  ' if not problems else 'FAIL'} {name}: exited after {seconds * 1000:.0f} ms")
+    for problem in problems:
+        print(f"       problem: {problem}")
+    return not problems
+
+
+def check_duplicate_source_names(name: str) -> bool:
+    """returns True if sources sharing a name are refused, since their results could not be told apart"""
+    sources = [Rank_Source_Fetcher.RankSource("a", "http://127.0.0.1:1/"), Rank_Source_Fetcher.RankSource("a", "http://127.0.0.1:2/")]
+    try:
+        Rank_Source_Fetcher.fetch_from_sources(sources, "quorum")
+        problem = "the fetch ran"
+    except ValueError:
+        problem = None
+    except Rank_Source_Fetcher.RankFetchError as error:
+        problem = f"the fetch ran and failed: {error}"
+    print(f"{'ok  ' if problem is None else 'FAIL'} {name}")
+    if problem is not None:
+        print(f"       problem: {problem}")
+    return problem is None
+
+
+if __name__ == "__main__":
+    States_and_State_Capitals_Reader.load()
+    with open(FIXTURE_FILE_NAME, "rb") as fixture_file:
+        page = fixture_file.read()
+    fixture_ranks = Population_Rank_Web_Scraper.parse_population_ranks_streaming(page.decode("utf-8"))
+    disagreeing_page = create_disagreeing_page(fixture_ranks)
+
+    results = [
+        run_scenario("the first valid source wins without waiting on a slow one",
+            [(page, [("delay", 1.5)]), (page, ["ok"])], expected_winner = "b", expected_ranks = fixture_ranks, maximum_seconds = 1),
+        run_scenario("5xx responses are retried with backoff",
+            [(page, [("status", 503), ("status", 502), "ok"])], expected_winner = "a", expected_attempts = {"a": 3}),
+        run_scenario("a dropped connection is retried",
+            [(page, ["drop", "ok"])], expected_winner = "a", expected_attempts = {"a": 2}),
+        run_scenario("a 404 is not retried",
+            [(page, [("status", 404)]), (page, [("delay", 0.3)])], expected_winner = "b", expected_attempts = {"a": 1}),
+        run_scenario("a hung source times out while another wins",
+            [(page, [("hang", 3)]), (page, [("delay", 0.2)])], timeout = 0.5, retries = 0, expected_winner = "b", maximum_seconds = 1),
+        run_scenario("a page without the table is not picked",
+            [(page, ["garbage"]), (page, [("delay", 0.2)])], expected_winner = "b", expected_attempts = {"a": 1}),
+        run_scenario("a quorum ignores a valid source that disagrees",
+            [(disagreeing_page, ["ok"]), (page, [("delay", 0.1)]), (page, [("delay", 0.2)])], strategy = "quorum",
+            expected_winner = "b", expected_ranks = fixture_ranks),
+        run_scenario("no quorum means no ranking",
+            [(disagreeing_page, ["ok"]), (page, ["ok"]), (page, [("status", 500)])], strategy = "quorum", retries = 1),
+        run_scenario("every source failing means no ranking",
+            [(page, [("hang", 1)]), (page, ["garbage"])], timeout = 0.3, retries = 1, maximum_seconds = 2),
+        run_scenario("gzip pages are decompressed",
+            [(page, ["gzip"])], expected_winner = "a", expected_ranks = fixture_ranks),
+        run_scenario("ten fetches reuse one keep-alive connection",
+            [(page, ["ok"])], expected_winner = "a", repeat = 10, maximum_connections = 1),
+        check_exit_with_hanging_source("a hanging source does not keep the process from exiting", page),
+        check_duplicate_source_names("sources sharing a name are refused"),
+    ]
+
+    print(f"{sum(results)}/{len(results)} scenarios went as expected")
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,271 @@
+"""This file keeps every quiz result in a local SQLite database instead of throwing it away when the window closes.
+
+One row is stored per answered question and one row per finished session. Writes are queued and a background thread
+commits them in batches, so neither the GUI nor the server waits on the disk. The database runs in WAL mode with
+synchronous=NORMAL, so a commit does not fsync; a power loss can lose the last batch but never corrupts the file.
+A batch that cannot be committed (a locked or broken database) is tried again a few times and then dropped with a message
+on stderr; the writer thread keeps running either way, so flush and close never wait forever.
+
+Exports:
+    ResultsStore: a class that queues results for the writer thread and answers queries about them
+    DEFAULT_DATABASE_FILE_NAME: where results are kept unless another file is given
+
+Usage (from the repository root):
+    python src/Results_Store.py --leaderboard
+    python src/Results_Store.py --miss-rates
+    python src/Results_Store.py --personal-best NAME
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import Population_Rank_Cache
+
+DEFAULT_DATABASE_FILE_NAME = os.path.join(Population_Rank_Cache.CACHE_DIRECTORY, "results.sqlite3")
+
+#the writer commits once this many rows are queued, or once rows have waited this long (in seconds)
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+#how many times the writer tries to commit a batch before it drops the batch (one flush interval apart)
+MAXIMUM_COMMIT_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    number_of_questions INTEGER NOT NULL,
+    number_correct INTEGER NOT NULL,
+    points_earned INTEGER NOT NULL,
+    maximum_points INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    session_key TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    answered_at REAL NOT NULL,
+    state TEXT NOT NULL,
+    user_answer TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    weight INTEGER NOT NULL,
+    response_time REAL
+);
+CREATE INDEX IF NOT EXISTS answers_by_state ON answers (state, correct);
+CREATE INDEX IF NOT EXISTS sessions_by_points ON sessions (points_earned DESC, finished_at);
+CREATE INDEX IF NOT EXISTS sessions_by_user ON sessions (user_id, points_earned DESC);
+"""
+
+
+def connect(file_name: str) -> sqlite3.Connection:
+    """opens the database in WAL mode without an fsync on every commit
+
+    Arguments:
+        file_name: the path of the database
+    """
+    connection = sqlite3.connect(file_name, timeout = 30)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    return connection
+
+
+class ResultsStore:
+    """This class queues results for a background writer thread and answers queries about them.
+
+    Attributes:
+        file_name: the path of the database
+        batch_size: how many queued rows make the writer commit right away
+        flush_interval: how long (in seconds) a queued row may wait before it is committed
+        last_error: the sqlite3.Error of the last commit, or None if it succeeded
+        number_of_dropped_rows: how many queued rows were given up on because they could not be committed
+    """
+    def __init__(self, file_name: str = DEFAULT_DATABASE_FILE_NAME, batch_size: int = DEFAULT_BATCH_SIZE, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        "initializes the ResultsStore class, creating the database if needed and starting the writer thread"
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.last_error = None
+        self.number_of_dropped_rows = 0
+
+        if os.path.dirname(file_name):
+            os.makedirs(os.path.dirname(file_name), exist_ok = True)
+        with connect(file_name) as connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target = self._write_forever, name = "results-writer", daemon = True)
+        self._writer.start()
+
+    def record_answer(self, session_key: str, user_id: str, answer_result):
+        """queues one answered question
+
+        Arguments:
+            session_key: which session the answer belongs to
+            user_id: who answered ("" if anonymous)
+            answer_result: the Quiz_Session.AnswerResult of the answer
+        """
+        self._queue.put(("answer", (session_key, user_id, time.time(), answer_result.question.state, answer_result.user_answer,
+            int(answer_result.correct), answer_result.question.weight, answer_result.response_time)))
+
+    def record_session(self, session_key: str, user_id: str, session):
+        """queues one finished session
+
+        Arguments:
+            session_key: which session finished
+            user_id: who took it ("" if anonymous)
+            session: the finished Quiz_Session.QuizSession
+        """
+        self._queue.put(("session", (session_key, user_id, time.time(), session.number_of_questions, session.number_correct,
+            session.points_earned, session.maximum_points)))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """waits until the writer has tried to commit everything queued so far
+
+        Returns:
+            committed: False if the timeout ran out first or the commit failed (see last_error)
+        """
+        committed = threading.Event()
+        self._queue.put(("flush", committed))
+        return committed.wait(timeout) and self.last_error is None
+
+    def close(self):
+        """commits everything queued and stops the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(("close", None))
+            self._writer.join()
+
+    def get_state_miss_rates(self, limit: int = 50) -> list[tuple[str, int, float]]:
+        """returns (state, answers, miss rate) for the most missed states, highest miss rate first
+
+        Arguments:
+            limit: how many states to return
+        """
+        return self._query("""SELECT state, COUNT(*) AS answers, 1.0 - AVG(correct) AS miss_rate
+            FROM answers GROUP BY state ORDER BY miss_rate DESC, answers DESC LIMIT ?""", (limit,))
+
+    def get_state_answer_counts(self) -> list[tuple[str, int, int]]:
+        """returns (state, answers, correct answers) for every state that has been answered"""
+        return self._query("SELECT state, COUNT(*), SUM(correct) FROM answers GROUP BY state", ())
+
+    def get_personal_best(self, user_id: str) -> tuple[int, int, int, int] | None:
+        """returns the user's best session as (points earned, maximum points, number correct, number of questions), or None
+
+        Arguments:
+            user_id: whose best session to find
+        """
+        rows = self._query("""SELECT points_earned, maximum_points, number_correct, number_of_questions
+            FROM sessions WHERE user_id = ? ORDER BY points_earned DESC LIMIT 1""", (user_id,))
+        return rows[0] if rows else None
+
+    def get_leaderboard(self, limit: int = 10) -> list[tuple[str, int, int, int]]:
+        """returns (user, best points, maximum points of that session, sessions played) for the top users, best first
+
+        Arguments:
+            limit: how many users to return
+        """
+        return self._query("""SELECT user_id, MAX(points_earned) AS best_points, maximum_points, COUNT(*)
+            FROM sessions WHERE user_id != '' GROUP BY user_id ORDER BY best_points DESC LIMIT ?""", (limit,))
+
+    def _query(self, sql: str, parameters: tuple) -> list[tuple]:
+        """runs a read on its own connection, which WAL mode lets run alongside the writer"""
+        connection = connect(self.file_name)
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def _write_forever(self):
+        """commits queued rows in batches until the store is closed, retrying (and then dropping) batches that fail"""
+        connection = None
+        pending_answers = []
+        pending_sessions = []
+        waiting_flushes = []
+        commit_deadline = None
+        failed_attempts = 0
+        closing = False
+
+        while not closing:
+            #wait for work, but never leave rows uncommitted for longer than the flush interval
+            try:
+                kind, payload = self._queue.get(timeout = None if commit_deadline is None else max(0, commit_deadline - time.monotonic()))
+            except queue.Empty:
+                kind, payload = None, None
+
+            if kind == "answer":
+                pending_answers.append(payload)
+            elif kind == "session":
+                pending_sessions.append(payload)
+            elif kind == "flush":
+                waiting_flushes.append(payload)
+            elif kind == "close":
+                closing = True
+
+            number_pending = len(pending_answers) + len(pending_sessions)
+            if number_pending and commit_deadline is None:
+                commit_deadline = time.monotonic() + self.flush_interval
+
+            #a batch that failed waits for its retry deadline instead of being retried on every new row
+            full_batch = number_pending >= self.batch_size and not failed_attempts
+            if number_pending and (waiting_flushes or closing or full_batch or time.monotonic() >= commit_deadline):
+                try:
+                    if connection is None:
+                        connection = connect(self.file_name)
+                    with connection:
+                        connection.executemany("""INSERT INTO answers (session_key, user_id, answered_at, state, user_answer, correct, weight, response_time)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", pending_answers)
+                        connection.executemany("""INSERT OR REPLACE INTO sessions (session_key, user_id, finished_at, number_of_questions,
+                            number_correct, points_earned, maximum_points) VALUES (?, ?, ?, ?, ?, ?, ?)""", pending_sessions)
+                    self.last_error = None
+                except sqlite3.Error as error:
+                    self.last_error = error
+                    failed_attempts += 1
+
+                if self.last_error is None or failed_attempts >= MAXIMUM_COMMIT_ATTEMPTS or closing:
+                    if self.last_error is not None:
+                        self.number_of_dropped_rows += number_pending
+                        print(f"Could not save {number_pending} quiz results to {self.file_name} ({self.last_error}); they were dropped", file = sys.stderr)
+                    pending_answers.clear()
+                    pending_sessions.clear()
+                    commit_deadline = None
+                    failed_attempts = 0
+                else:
+                    commit_deadline = time.monotonic() + self.flush_interval
+
+            #waiters are released even if the commit failed; flush reports the failure through last_error
+            for committed in waiting_flushes:
+                committed.set()
+            waiting_flushes.clear()
+
+        if connection is not None:
+            connection.close()
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Show saved quiz results.")
+    argument_parser.add_argument("--database", default = DEFAULT_DATABASE_FILE_NAME, help = "the results database")
+    argument_parser.add_argument("--leaderboard", action = "store_true", help = "show the users with the best sessions")
+    argument_parser.add_argument("--miss-rates", action = "store_true", help = "show the most missed states")
+    argument_parser.add_argument("--personal-best", metavar = "USER", help = "show a user's best session")
+    arguments = argument_parser.parse_args()
+
+    results_store = ResultsStore(arguments.database)
+    try:
+        if arguments.leaderboard:
+            for place, (user_id, best_points, maximum_points, sessions_played) in enumerate(results_store.get_leaderboard(), 1):
+                print(f"{place:>3}. {user_id:<20} {best_points}/{maximum_points} points ({sessions_played} sessions)")
+        if arguments.miss_rates:
+            for state, answers, miss_rate in results_store.get_state_miss_rates():
+                print(f"{state:<16} missed {miss_rate:6.1%} of {answers} answers")
+        if arguments.personal_best:
+            personal_best = results_store.get_personal_best(arguments.personal_best)
+            if personal_best is None:
+                print(f"No finished sessions for {arguments.personal_best}.")
+            else:
+                points_earned, maximum_points, number_correct, number_of_questions = personal_best
+                print(f"{arguments.personal_best}: {points_earned}/{maximum_points} points, {number_correct}/{number_of_questions} correct")
+    finally:
+        results_store.close()
@@ -0,0 +1,545 @@
+"""This file simulates millions of quizzes with NumPy to show how fair the points from Questions.calculate_weight are.
+
+Each simulated quiz picks its questions the way Quiz_Session.generate_random_questions does: number_of_questions
+different states, chosen uniformly at random. Each question is answered correctly with that state's probability of
+being known. The probabilities come from one of two places:
+    the model: the most populous state is known with probability --easiest and the least populous with probability
+        --hardest, and the ranks in between are spread evenly between the two on the logit scale
+    the history: the answers saved by Results_Store, smoothed toward the model so that a state with few answers
+        stays close to it
+Each simulated player also gets an ability: a logit offset drawn from a normal distribution, so the results include
+strong players as well as weak ones.
+
+Quizzes are simulated in batches of arrays with one column per quiz and one row per question. There is no Python loop
+per quiz:
+    picking: Floyd's algorithm draws the states without replacement, one step per question for the whole batch
+        (so a batch costs number_of_questions steps over arrays, whatever its size)
+    answering: every asked question gets a uniform draw, and it counts as correct when the draw is below the player's
+        probability for that state
+    scoring: the asked states' weights are gathered and summed down each column, which gives every quiz's points
+        earned and maximum points
+Only counts are kept between batches, so memory stays the same however many quizzes are simulated.
+
+Weight tables are searched the same way. The quizzes are simulated once, spread into (quizzes x states) masks, and every
+candidate table is scored against them in a single matrix product. Comparing hundreds of tables costs about as much as
+scoring one, and every table faces exactly the same quizzes, so differences between tables are not random noise.
+
+Exports:
+    ScoreDistribution: a class that counts the scores of simulated quizzes
+    WeightTableScore: a class that holds how closely one weight table follows the target difficulty curve
+    create_model_probabilities: returns each state's probability of being answered correctly under the model
+    create_history_probabilities: blends saved answers with the model
+    create_weight_table: returns a table laid out like Questions.WEIGHTS_BY_POPULATION_RANK, built from bucket weights
+    calculate_maximum_points_moments: returns the exact mean and variance of a quiz's maximum points
+    simulate_sessions: simulates quizzes in batches and counts their scores
+    search_weight_tables: scores every monotonic weight table against a target difficulty curve
+
+Use Cases:
+    probabilities = create_model_probabilities(population_ranks, 0.95, 0.55)
+    distribution = simulate_sessions(probabilities, weights, 10, 10_000_000)
+    distribution.summarize()["points"]["standard_deviation"]
+
+Usage (from the repository root):
+    python src/Scoring_Simulator.py [--sessions 10000000] [--questions 10] [--history [DATABASE]] [--weights 1 2 3 4 5]
+    python src/Scoring_Simulator.py --search [--abilities -1 0 1] [--target 0.45 0.65 0.85] [--buckets 5] [--top 5]
+
+Only this tool needs NumPy (python -m pip install -r requirements.txt).
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError("Scoring_Simulator needs NumPy: python -m pip install -r requirements.txt") from error
+
+import Population_Rank_Web_Scraper
+import Questions
+import Results_Store
+import States_and_State_Capitals_Reader
+
+DEFAULT_NUMBER_OF_SESSIONS = 10_000_000
+DEFAULT_NUMBER_OF_QUESTIONS = 10
+DEFAULT_BATCH_SIZE = 100_000
+
+#the model's chances of knowing the most and the least populous state's capital, and how much players differ (in logits)
+DEFAULT_EASIEST_PROBABILITY = 0.95
+DEFAULT_HARDEST_PROBABILITY = 0.55
+DEFAULT_ABILITY_SPREAD = 0.5
+
+#saved answers are blended with the model as if the model had this many answers of its own for every state
+HISTORY_PRIOR_STRENGTH = 10
+
+#probabilities are kept away from 0 and 1 so their logits stay finite
+MINIMUM_PROBABILITY = 0.001
+MAXIMUM_PROBABILITY = 0.999
+
+#the target difficulty curve: the mean share of the maximum points players at each ability (a logit offset) should earn
+DEFAULT_ABILITIES = (-1.0, 0.0, 1.0)
+DEFAULT_TARGET_SHARES = (0.45, 0.65, 0.85)
+
+#the search splits the ranks into equal buckets, like calculate_weight's 5 buckets of 10, and tries every monotonic table
+DEFAULT_NUMBER_OF_BUCKETS = 5
+DEFAULT_MAXIMUM_WEIGHT = 5
+DEFAULT_SEARCH_SESSIONS = 200_000
+
+#the search batch shrinks as the number of tables grows, so its (quizzes x tables) arrays stay about this many cells
+SEARCH_CELLS_PER_BATCH = 10_000_000
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def calculate_logit(probabilities) -> "numpy.ndarray":
+    """returns the log odds of probabilities, clipped so they stay finite
+
+    Arguments:
+        probabilities: a probability or an array of them
+    """
+    probabilities = numpy.clip(numpy.asarray(probabilities, dtype = numpy.float64), MINIMUM_PROBABILITY, MAXIMUM_PROBABILITY)
+    return numpy.log(probabilities / (1 - probabilities))
+
+
+def create_model_probabilities(population_ranks, easiest: float = DEFAULT_EASIEST_PROBABILITY, hardest: float = DEFAULT_HARDEST_PROBABILITY) -> "numpy.ndarray":
+    """returns each state's probability of being answered correctly, falling evenly on the logit scale as the rank grows
+
+    Arguments:
+        population_ranks: every state's population rank
+        easiest: the probability for the most populous state
+        hardest: the probability for the least populous state
+    """
+    positions = (numpy.asarray(population_ranks, dtype = numpy.float64) - 1) / (Questions.LEAST_POPULOUS_RANK - 1)
+    logits = calculate_logit(easiest) + positions * (calculate_logit(hardest) - calculate_logit(easiest))
+    return 1 / (1 + numpy.exp(-logits))
+
+
+def create_history_probabilities(list_of_state_names: list[str], model_probabilities: "numpy.ndarray",
+        answer_counts: dict[str, tuple[int, int]], prior_strength: float = HISTORY_PRIOR_STRENGTH) -> "numpy.ndarray":
+    """returns each state's share of correct answers, smoothed toward the model (states never answered keep the model's probability)
+
+    Arguments:
+        list_of_state_names: the states, in the same order as model_probabilities
+        model_probabilities: each state's probability under the model
+        answer_counts: a dictionary that maps states to (answers, correct answers)
+        prior_strength: how many answers the model counts as
+    """
+    answers = numpy.array([answer_counts.get(state, (0, 0))[0] for state in list_of_state_names], dtype = numpy.float64)
+    correct_answers = numpy.array([answer_counts.get(state, (0, 0))[1] for state in list_of_state_names], dtype = numpy.float64)
+    return (correct_answers + prior_strength * model_probabilities) / (answers + prior_strength)
+
+
+def read_answer_counts(database_file_name: str) -> dict[str, tuple[int, int]]:
+    """returns a dictionary that maps every answered state to (answers, correct answers) from a results database
+
+    Arguments:
+        database_file_name: the database Results_Store saved to
+    """
+    results_store = Results_Store.ResultsStore(database_file_name)
+    try:
+        return {state: (answers, correct_answers or 0) for state, answers, correct_answers in results_store.get_state_answer_counts()}
+    finally:
+        results_store.close()
+
+
+def create_weight_table(bucket_weights: tuple[int, ...]) -> tuple:
+    """returns a table laid out like Questions.WEIGHTS_BY_POPULATION_RANK (None, then the weight of every rank)
+
+    Arguments:
+        bucket_weights: the weight of each equal bucket of ranks, from the most populous bucket to the least
+    """
+    number_of_buckets = len(bucket_weights)
+    return (None,) + tuple(bucket_weights[(population_rank - 1) * number_of_buckets // Questions.LEAST_POPULOUS_RANK]
+        for population_rank in range(1, Questions.LEAST_POPULOUS_RANK + 1))
+
+
+def get_state_weights(weight_table: tuple, population_ranks) -> "numpy.ndarray":
+    """returns every state's weight under a weight table
+
+    Arguments:
+        weight_table: a table laid out like Questions.WEIGHTS_BY_POPULATION_RANK
+        population_ranks: every state's population rank
+    """
+    return numpy.array([weight_table[population_rank] for population_rank in population_ranks], dtype = numpy.float32)
+
+
+def list_monotonic_bucket_weights(number_of_buckets: int, maximum_weight: int) -> list[tuple[int, ...]]:
+    """returns every table of bucket weights from 1 to maximum_weight that never gives a less populous bucket fewer points
+
+    Arguments:
+        number_of_buckets: how many equal buckets the ranks are split into
+        maximum_weight: the most points one question may be worth
+    """
+    return list(itertools.combinations_with_replacement(range(1, maximum_weight + 1), number_of_buckets))
+
+
+def calculate_maximum_points_moments(weights, number_of_questions: int) -> tuple[float, float]:
+    """returns the exact mean and variance of a quiz's maximum points when states are sampled without replacement
+
+    Arguments:
+        weights: every state's weight
+        number_of_questions: how many states each quiz asks
+    """
+    weights = numpy.asarray(weights, dtype = numpy.float64)
+    number_of_states = len(weights)
+    number_of_questions = min(number_of_questions, number_of_states)
+    mean = number_of_questions * weights.mean()
+    if number_of_states < 2:
+        return float(mean), 0.0
+    #sampling without replacement shrinks the variance by the finite population correction
+    variance = number_of_questions * weights.var() * (number_of_states - number_of_questions) / (number_of_states - 1)
+    return float(mean), float(variance)
+
+
+def simulate_batch(logits: "numpy.ndarray", number_of_questions: int, batch_size: int, ability_spread: float,
+        random_generator: "numpy.random.Generator") -> tuple["numpy.ndarray", "numpy.ndarray"]:
+    """simulates a batch of quizzes and returns the states each one asked and whether each was answered correctly
+
+    Arguments:
+        logits: every state's log odds of being answered correctly (as float32)
+        number_of_questions: how many different states each quiz asks
+        batch_size: how many quizzes to simulate
+        ability_spread: the standard deviation of the players' abilities, in logits (0 makes every player the same)
+        random_generator: where the randomness comes from
+
+    Returns:
+        asked_states: a (number_of_questions, batch_size) array of state positions, one column per quiz
+        answered_correctly: a boolean array of the same shape
+    """
+    number_of_states = logits.shape[0]
+    #Floyd's algorithm, one step for the whole batch at a time: draw from the first `upper + 1` states, and take
+    #state `upper` instead if the draw was already taken, which samples uniformly without replacement
+    #(every step's draw comes from one uniform array, which is much faster than integers with a bound per row)
+    sizes = numpy.arange(number_of_states - number_of_questions + 1, number_of_states + 1)
+    asked_states = (random_generator.random((number_of_questions, batch_size)) * sizes[:, None]).astype(numpy.intp)
+    if number_of_states <= 64:
+        #a bit per state in one integer per quiz is cheaper to test and set than a (quizzes x states) array
+        taken = numpy.zeros(batch_size, dtype = numpy.uint64)
+        one = numpy.uint64(1)
+        for step, size in enumerate(sizes):
+            draws = asked_states[step]
+            numpy.copyto(draws, size - 1, where = ((taken >> draws.astype(numpy.uint64)) & one).astype(bool))
+            taken |= one << draws.astype(numpy.uint64)
+    else:
+        rows = numpy.arange(batch_size)
+        taken = numpy.zeros((batch_size, number_of_states), dtype = bool)
+        for step, size in enumerate(sizes):
+            draws = asked_states[step]
+            numpy.copyto(draws, size - 1, where = taken[rows, draws])
+            taken[rows, draws] = True
+
+    asked_logits = logits[asked_states]
+    if ability_spread > 0:
+        asked_logits = asked_logits + random_generator.normal(0.0, ability_spread, size = batch_size).astype(numpy.float32)
+    probabilities = 1 / (1 + numpy.exp(-asked_logits))
+    answered_correctly = random_generator.random((number_of_questions, batch_size), dtype = numpy.float32) < probabilities
+    return asked_states, answered_correctly
+
+
+class ScoreDistribution:
+    """This class counts the scores of simulated quizzes batch by batch, keeping counts instead of one value per quiz.
+
+    Attributes:
+        number_of_sessions: how many quizzes were counted
+        points_counts: how many quizzes earned each number of points
+        maximum_points_counts: how many quizzes could have earned each number of points
+        number_correct_counts: how many quizzes got each number of questions right
+        share_counts: how many quizzes earned each whole percentage (0 to 100) of their maximum points
+    """
+    def __init__(self, highest_possible_points: int, number_of_questions: int):
+        "initializes the ScoreDistribution class"
+        self.number_of_sessions = 0
+        self.points_counts = numpy.zeros(highest_possible_points + 1, dtype = numpy.int64)
+        self.maximum_points_counts = numpy.zeros(highest_possible_points + 1, dtype = numpy.int64)
+        self.number_correct_counts = numpy.zeros(number_of_questions + 1, dtype = numpy.int64)
+        self.share_counts = numpy.zeros(101, dtype = numpy.int64)
+
+    def add(self, points: "numpy.ndarray", maximum_points: "numpy.ndarray", number_correct: "numpy.ndarray"):
+        """counts a batch of quizzes
+
+        Arguments:
+            points: the points every quiz earned (as integers)
+            maximum_points: the points every quiz could have earned (as integers)
+            number_correct: how many questions every quiz got right
+        """
+        #rounded to the nearest whole percentage, with halves rounded up
+        shares = (200 * points + maximum_points) // (2 * numpy.maximum(maximum_points, 1))
+
+        self.points_counts += numpy.bincount(points, minlength = len(self.points_counts))
+        self.maximum_points_counts += numpy.bincount(maximum_points, minlength = len(self.maximum_points_counts))
+        self.number_correct_counts += numpy.bincount(number_correct, minlength = len(self.number_correct_counts))
+        self.share_counts += numpy.bincount(shares, minlength = len(self.share_counts))
+        self.number_of_sessions += len(points)
+
+    @staticmethod
+    def summarize_counts(counts: "numpy.ndarray") -> dict:
+        """returns the mean, variance, standard deviation, range and percentiles of values counted by value
+
+        Arguments:
+            counts: how many times each value (the position in the array) occurred
+        """
+        total = counts.sum()
+        if total == 0:
+            return {}
+        values = numpy.arange(len(counts), dtype = numpy.float64)
+        mean = float((values * counts).sum() / total)
+        variance = float((((values - mean) ** 2) * counts).sum() / total)
+        cumulative_counts = numpy.cumsum(counts)
+        occurring_values = numpy.flatnonzero(counts)
+
+        summary = {
+            "mean": mean,
+            "variance": variance,
+            "standard_deviation": variance ** 0.5,
+            "minimum": int(occurring_values[0]),
+            "maximum": int(occurring_values[-1]),
+        }
+        for percentile in PERCENTILES:
+            summary[f"p{percentile}"] = int(numpy.searchsorted(cumulative_counts, percentile / 100 * total))
+        return summary
+
+    def summarize(self) -> dict:
+        """returns a summary of the points earned, the maximum points, the number correct and the share (in percent) earned"""
+        return {
+            "points": self.summarize_counts(self.points_counts),
+            "maximum_points": self.summarize_counts(self.maximum_points_counts),
+            "number_correct": self.summarize_counts(self.number_correct_counts),
+            "share_percent": self.summarize_counts(self.share_counts),
+        }
+
+    def to_dict(self) -> dict:
+        """returns the summary and every count as a JSON-ready dictionary"""
+        return {
+            "number_of_sessions": self.number_of_sessions,
+            "summary": self.summarize(),
+            "points_counts": self.points_counts.tolist(),
+            "maximum_points_counts": self.maximum_points_counts.tolist(),
+            "number_correct_counts": self.number_correct_counts.tolist(),
+            "share_counts": self.share_counts.tolist(),
+        }
+
+
+def simulate_sessions(probabilities, weights, number_of_questions: int = DEFAULT_NUMBER_OF_QUESTIONS,
+        number_of_sessions: int = DEFAULT_NUMBER_OF_SESSIONS, ability_spread: float = DEFAULT_ABILITY_SPREAD,
+        batch_size: int = DEFAULT_BATCH_SIZE, random_generator: "numpy.random.Generator | None" = None) -> ScoreDistribution:
+    """simulates quizzes in batches and returns the counts of their scores
+
+    Arguments:
+        probabilities: every state's probability of being answered correctly by a player of ability 0
+        weights: every state's weight (a whole number of points), in the same order
+        number_of_questions: how many different states each quiz asks
+        number_of_sessions: how many quizzes to simulate
+        ability_spread: the standard deviation of the players' abilities, in logits
+        batch_size: how many quizzes to simulate at once (memory grows with it)
+        random_generator: where the randomness comes from (a fresh one if None)
+    """
+    if random_generator is None:
+        random_generator = numpy.random.default_rng()
+    weights = numpy.asarray(weights).astype(numpy.int64)
+    number_of_questions = min(number_of_questions, len(weights))
+    highest_possible_points = int(numpy.sort(weights)[::-1][:number_of_questions].sum())
+    distribution = ScoreDistribution(highest_possible_points, number_of_questions)
+    logits = calculate_logit(probabilities).astype(numpy.float32)
+
+    remaining_sessions = number_of_sessions
+    while remaining_sessions > 0:
+        size = min(batch_size, remaining_sessions)
+        asked_states, answered_correctly = simulate_batch(logits, number_of_questions, size, ability_spread, random_generator)
+        asked_weights = weights[asked_states]
+        distribution.add((asked_weights * answered_correctly).sum(axis = 0), asked_weights.sum(axis = 0),
+            numpy.count_nonzero(answered_correctly, axis = 0))
+        remaining_sessions -= size
+
+    return distribution
+
+
+class WeightTableScore:
+    """This class holds how closely one weight table follows the target difficulty curve.
+
+    Attributes:
+        bucket_weights: the weight of each equal bucket of ranks
+        weight_table: the same weights laid out like Questions.WEIGHTS_BY_POPULATION_RANK
+        mean_shares: the mean share of the maximum points earned at each ability
+        error: the root mean square distance between mean_shares and the target shares
+        maximum_points_standard_deviation: how much a quiz's maximum points vary with the states it happens to ask
+    """
+    __slots__ = ("bucket_weights", "weight_table", "mean_shares", "error", "maximum_points_standard_deviation")
+
+    def __init__(self, bucket_weights: tuple[int, ...], weight_table: tuple, mean_shares: list[float], error: float, maximum_points_standard_deviation: float):
+        "initializes the WeightTableScore class"
+        self.bucket_weights = bucket_weights
+        self.weight_table = weight_table
+        self.mean_shares = mean_shares
+        self.error = error
+        self.maximum_points_standard_deviation = maximum_points_standard_deviation
+
+
+def search_weight_tables(probabilities, population_ranks, target_shares: tuple[float, ...], abilities: tuple[float, ...] = DEFAULT_ABILITIES,
+        number_of_questions: int = DEFAULT_NUMBER_OF_QUESTIONS, number_of_buckets: int = DEFAULT_NUMBER_OF_BUCKETS,
+        maximum_weight: int = DEFAULT_MAXIMUM_WEIGHT, sessions_per_ability: int = DEFAULT_SEARCH_SESSIONS,
+        batch_size: int = DEFAULT_BATCH_SIZE, random_generator: "numpy.random.Generator | None" = None) -> tuple[list[WeightTableScore], WeightTableScore]:
+    """scores every monotonic weight table against the target difficulty curve on the same simulated quizzes
+
+    Each ability is a single player strength (a logit offset from probabilities). The difficulty curve is the mean share
+    of the maximum points that a player of each ability earns.
+
+    Arguments:
+        probabilities: every state's probability of being answered correctly by a player of ability 0
+        population_ranks: every state's population rank, in the same order
+        target_shares: the mean share each ability should earn
+        abilities: the abilities the curve is measured at
+        number_of_questions: how many different states each quiz asks
+        number_of_buckets: how many equal buckets the ranks are split into
+        maximum_weight: the most points one question may be worth
+        sessions_per_ability: how many quizzes to simulate at each ability
+        batch_size: the most quizzes to simulate at once
+        random_generator: where the randomness comes from (a fresh one if None)
+
+    Returns:
+        scores: every candidate table, closest to the target first (ties go to the table whose maximum points vary least)
+        current_score: the score of Questions.WEIGHTS_BY_POPULATION_RANK on the same quizzes
+    """
+    if random_generator is None:
+        random_generator = numpy.random.default_rng()
+    candidates = list_monotonic_bucket_weights(number_of_buckets, maximum_weight)
+    weight_tables = [create_weight_table(bucket_weights) for bucket_weights in candidates] + [Questions.WEIGHTS_BY_POPULATION_RANK]
+    #one column per table, so one matrix product scores a batch against every table
+    weight_matrix = numpy.stack([get_state_weights(weight_table, population_ranks) for weight_table in weight_tables], axis = 1)
+    logits = calculate_logit(probabilities).astype(numpy.float32)
+    search_batch_size = max(1000, min(batch_size, SEARCH_CELLS_PER_BATCH // len(weight_tables)))
+
+    share_sums = numpy.zeros((len(abilities), len(weight_tables)))
+    maximum_points_sums = numpy.zeros(len(weight_tables))
+    maximum_points_square_sums = numpy.zeros(len(weight_tables))
+    for ability_position, ability in enumerate(abilities):
+        remaining_sessions = sessions_per_ability
+        while remaining_sessions > 0:
+            size = min(search_batch_size, remaining_sessions)
+            asked_states, answered_correctly = simulate_batch(logits + numpy.float32(ability), number_of_questions, size, 0.0, random_generator)
+            #spread the batch into (quizzes x states) masks so one matrix product scores it against every table
+            asked = numpy.zeros((size, len(logits)), dtype = numpy.float32)
+            correct = numpy.zeros((size, len(logits)), dtype = numpy.float32)
+            rows = numpy.broadcast_to(numpy.arange(size), asked_states.shape)
+            asked[rows, asked_states] = 1
+            correct[rows, asked_states] = answered_correctly
+            points = correct @ weight_matrix
+            maximum_points = asked @ weight_matrix
+            share_sums[ability_position] += (points / maximum_points).sum(axis = 0, dtype = numpy.float64)
+            maximum_points_sums += maximum_points.sum(axis = 0, dtype = numpy.float64)
+            maximum_points_square_sums += numpy.square(maximum_points, dtype = numpy.float64).sum(axis = 0)
+            remaining_sessions -= size
+
+    mean_shares = share_sums / sessions_per_ability
+    errors = numpy.sqrt(numpy.mean((mean_shares - numpy.asarray(target_shares)[:, None]) ** 2, axis = 0))
+    total_sessions = sessions_per_ability * len(abilities)
+    maximum_points_means = maximum_points_sums / total_sessions
+    maximum_points_deviations = numpy.sqrt(numpy.maximum(maximum_points_square_sums / total_sessions - maximum_points_means ** 2, 0))
+
+    scores = [WeightTableScore(bucket_weights, weight_table, mean_shares[:, position].tolist(), float(errors[position]), float(maximum_points_deviations[position]))
+        for position, (bucket_weights, weight_table) in enumerate(zip(candidates + [None], weight_tables))]
+    current_score = scores.pop()
+    scores.sort(key = lambda score: (round(score.error, 4), score.maximum_points_standard_deviation))
+    return scores, current_score
+
+
+def load_states_and_ranks() -> tuple[list[str], list[int]]:
+    """returns the states and their population ranks, from the rank cache if it holds a valid ranking and the backup ranks otherwise"""
+    cached_entry = Population_Rank_Web_Scraper.load_cached_population_ranks()
+    population_ranks = cached_entry.population_ranks if cached_entry is not None else Population_Rank_Web_Scraper.BACKUP_DICTIONARY_OF_POPULATION_RANKS
+    list_of_state_names = list(States_and_State_Capitals_Reader.list_of_state_names)
+    return list_of_state_names, [population_ranks[state] for state in list_of_state_names]
+
+
+def print_distribution(distribution: ScoreDistribution, weights, number_of_questions: int):
+    """prints the summary of a score distribution, the exact maximum points moments and a histogram of the shares earned
+
+    Arguments:
+        distribution: the counted quizzes
+        weights: every state's weight
+        number_of_questions: how many states each quiz asked
+    """
+    summary = distribution.summarize()
+    print(f"{'':<18}{'mean':>8}{'std':>8}" + "".join(f"{f'p{percentile}':>6}" for percentile in PERCENTILES))
+    for name, label in (("points", "points earned"), ("maximum_points", "maximum points"), ("number_correct", "number correct"), ("share_percent", "share earned (%)")):
+        statistics = summary[name]
+        print(f"{label:<18}{statistics['mean']:>8.2f}{statistics['standard_deviation']:>8.2f}" + "".join(f"{statistics[f'p{percentile}']:>6}" for percentile in PERCENTILES))
+
+    exact_mean, exact_variance = calculate_maximum_points_moments(weights, number_of_questions)
+    print(f"maximum points variance: {summary['maximum_points']['variance']:.3f} simulated, {exact_variance:.3f} exact "
+        f"(mean {summary['maximum_points']['mean']:.3f} simulated, {exact_mean:.3f} exact)")
+
+    print("share of the maximum points earned:")
+    decile_counts = [int(distribution.share_counts[decile * 10:decile * 10 + 10].sum()) for decile in range(10)]
+    decile_counts[-1] += int(distribution.share_counts[100])
+    largest_count = max(decile_counts) or 1
+    for decile, decile_count in enumerate(decile_counts):
+        upper = "100]" if decile == 9 else f"{decile * 10 + 10:>3})"
+        print(f"  [{decile * 10:>3}, {upper} {decile_count / distribution.number_of_sessions:7.2%} {'#' * round(40 * decile_count / largest_count)}")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Simulate quizzes to see how fair the question weights are.")
+    argument_parser.add_argument("--sessions", type = int, default = None,
+        help = f"how many quizzes to simulate (default {DEFAULT_NUMBER_OF_SESSIONS:,}, or {DEFAULT_SEARCH_SESSIONS:,} per ability with --search)")
+    argument_parser.add_argument("--questions", type = int, default = DEFAULT_NUMBER_OF_QUESTIONS, help = "how many questions each quiz asks")
+    argument_parser.add_argument("--batch-size", type = int, default = DEFAULT_BATCH_SIZE, help = "how many quizzes to simulate at once")
+    argument_parser.add_argument("--seed", type = int, default = None, help = "seed the simulation so it can be repeated")
+    argument_parser.add_argument("--history", nargs = "?", const = Results_Store.DEFAULT_DATABASE_FILE_NAME, default = None, metavar = "DATABASE",
+        help = "take the probabilities from saved answers (the default results database if no file is given)")
+    argument_parser.add_argument("--easiest", type = float, default = DEFAULT_EASIEST_PROBABILITY, help = "the model's probability for the most populous state")
+    argument_parser.add_argument("--hardest", type = float, default = DEFAULT_HARDEST_PROBABILITY, help = "the model's probability for the least populous state")
+    argument_parser.add_argument("--ability-spread", type = float, default = DEFAULT_ABILITY_SPREAD, help = "how much players differ, in logits")
+    argument_parser.add_argument("--weights", type = int, nargs = "+", default = None, metavar = "WEIGHT",
+        help = "simulate equal rank buckets worth these points instead of calculate_weight's table")
+    argument_parser.add_argument("--json", metavar = "FILE", help = "also write the full distribution to a JSON file")
+    argument_parser.add_argument("--search", action = "store_true", help = "search for weight tables that follow the target difficulty curve")
+    argument_parser.add_argument("--abilities", type = float, nargs = "+", default = list(DEFAULT_ABILITIES), help = "the abilities (logit offsets) the curve is measured at")
+    argument_parser.add_argument("--target", type = float, nargs = "+", default = list(DEFAULT_TARGET_SHARES), help = "the mean share to earn at each ability")
+    argument_parser.add_argument("--buckets", type = int, default = DEFAULT_NUMBER_OF_BUCKETS, help = "how many equal rank buckets a searched table has")
+    argument_parser.add_argument("--maximum-weight", type = int, default = DEFAULT_MAXIMUM_WEIGHT, help = "the most points a searched table may give")
+    argument_parser.add_argument("--top", type = int, default = 5, help = "how many searched tables to show")
+    arguments = argument_parser.parse_args()
+
+    list_of_state_names, population_ranks = load_states_and_ranks()
+    if not 1 <= arguments.questions <= len(list_of_state_names):
+        argument_parser.error(f"--questions must be between 1 and {len(list_of_state_names)}")
+    if arguments.search and len(arguments.target) != len(arguments.abilities):
+        argument_parser.error("--target needs one share for every ability")
+
+    probabilities = create_model_probabilities(population_ranks, arguments.easiest, arguments.hardest)
+    source = f"the model (easiest {arguments.easiest:g}, hardest {arguments.hardest:g})"
+    if arguments.history is not None:
+        if not os.path.exists(arguments.history):
+            argument_parser.error(f"there is no results database at {arguments.history}")
+        answer_counts = read_answer_counts(arguments.history)
+        probabilities = create_history_probabilities(list_of_state_names, probabilities, answer_counts)
+        source = f"{sum(answers for answers, _ in answer_counts.values()):,} saved answers, smoothed toward {source}"
+    random_generator = numpy.random.default_rng(arguments.seed)
+    print(f"probabilities from {source}")
+
+    if arguments.search:
+        sessions_per_ability = arguments.sessions or DEFAULT_SEARCH_SESSIONS
+        start = time.perf_counter()
+        scores, current_score = search_weight_tables(probabilities, population_ranks, tuple(arguments.target), tuple(arguments.abilities), arguments.questions,
+            arguments.buckets, arguments.maximum_weight, sessions_per_ability, arguments.batch_size, random_generator)
+        seconds = time.perf_counter() - start
+        print(f"scored {len(scores) + 1} weight tables on {sessions_per_ability * len(arguments.abilities):,} quizzes in {seconds:.2f} s")
+        print("target shares: " + ", ".join(f"{target:.1%} at {ability:+g}" for ability, target in zip(arguments.abilities, arguments.target)))
+        for label, score in [("current", current_score)] + [(f"#{place}", score) for place, score in enumerate(scores[:arguments.top], 1)]:
+            bucket_weights = "calculate_weight" if score.bucket_weights is None else " ".join(map(str, score.bucket_weights))
+            print(f"{label:>8} {bucket_weights:<20} error {score.error:.4f}, maximum points std {score.maximum_points_standard_deviation:.2f}, shares "
+                + ", ".join(f"{share:.1%}" for share in score.mean_shares))
+    else:
+        weight_table = Questions.WEIGHTS_BY_POPULATION_RANK if arguments.weights is None else create_weight_table(tuple(arguments.weights))
+        weights = get_state_weights(weight_table, population_ranks)
+        number_of_sessions = arguments.sessions or DEFAULT_NUMBER_OF_SESSIONS
+        start = time.perf_counter()
+        distribution = simulate_sessions(probabilities, weights, arguments.questions, number_of_sessions, arguments.ability_spread, arguments.batch_size, random_generator)
+        seconds = time.perf_counter() - start
+        print(f"simulated {number_of_sessions:,} quizzes of {arguments.questions} questions in {seconds:.2f} s ({number_of_sessions / seconds:,.0f} quizzes/s)")
+        print_distribution(distribution, weights, arguments.questions)
+        if arguments.json:
+            with open(arguments.json, "w", encoding = "utf-8") as json_file:
+                json.dump(distribution.to_dict(), json_file, indent = 2)
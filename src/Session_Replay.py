@@ -0,0 +1,615 @@
+"""This file records quizzes so they can be replayed exactly, and replays them across worker processes as a regression check or as load.
+
+Recording (main.py --record-sessions FILE): every quiz gets its own seeded random generator, so the seed alone decides
+its questions (and its multiple-choice options). The recorder appends a compact JSON-lines log:
+    a question pool line, written before the first quiz and again whenever the question bank changed:
+        {"pool": [["Alabama", "Montgomery", 24], ...]}    (state, capital and population rank, in the bank's order)
+    one line per quiz, written when it ends (or when the window closes mid-quiz, with "finished": false):
+        {"seed": 4113..., "number_of_questions": 10, "speed_bonus_window": null, "number_of_choices": null, "scheduled": false,
+         "started_at": 1760000000.0, "finished": true, "states": ["Ohio", ...], "answers": [["Columbus", 2.41, 2.41], ...],
+         "outcomes": [[1, 3], ...], "summary": [7, 19, 27]}
+    every answer is [what was submitted, its response time, seconds since the quiz started], every outcome is
+    [correct, points awarded] and the summary is [number correct, points earned, maximum points]
+
+Replaying: each quiz is rebuilt from its pool and seed by the same Quiz_Session.QuizSession the GUI uses, and its
+answers are submitted with their recorded response times, so grading and blitz speed bonuses come out the same at any
+replay speed. A replay is a regression check: it reports every quiz whose questions, outcomes or totals differ from the
+recording. Quizzes whose questions were picked by an adaptive user's schedule are replayed in their recorded order.
+Quizzes are spread across worker processes, either at full speed or at the original pace: every quiz starts at its
+recorded offset from the first one (scaled by --speed) and every answer arrives as long after the quiz's start as it
+did when it was recorded. At the original pace each worker interleaves its quizzes on one timeline, so thousands can be
+in progress at once. The report gives throughput, the latency of grading each answer and, at the original pace, how
+late answers were submitted compared to their schedule.
+
+Synthetic logs (--synthetic N) have no outcomes to check against; they are for load.
+
+Exports:
+    SessionRecorder: a class that appends quizzes to a session log
+    SessionRecording: a class that collects one quiz's answers for the log
+    ReplayReport: a class that holds what a replay measured and every mismatch it found
+    iterate_session_log: yields every quiz in a session log with its question pool, raising ValueError at a malformed line
+    find_record_problem: says what keeps a quiz's log line from being replayed, if anything
+    replay_all: replays a session log across worker processes
+    write_synthetic_session_log: writes made-up quizzes for load testing
+
+Use Cases:
+    session_recorder = SessionRecorder("sessions.jsonl")
+    seed, random_generator = session_recorder.create_random_generator()
+    replay_report = replay_all(iterate_session_log("sessions.jsonl"), workers = 8)
+
+Usage (from the repository root):
+    python src/main.py --record-sessions sessions.jsonl
+    python src/Session_Replay.py sessions.jsonl [--pace full|original] [--speed FACTOR] [--workers N] [--mismatches N]
+    python src/Session_Replay.py --synthetic 100000 [--arrival-rate SESSIONS_PER_SECOND] [--write-log FILE]
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import heapq
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import Batch_Grader
+import Question_Bank
+import Quiz_Session
+import Quiz_Telemetry
+import States_and_State_Capitals_Reader
+
+#a quiz's seed is a random 63-bit number, so it fits every JSON reader's integers
+SEED_BITS = 63
+
+#how many quizzes each task sent to a worker at full speed holds
+DEFAULT_CHUNK_SIZE = 500
+
+#at the original pace, how long (in seconds) the workers are given to start before the first quiz is due
+PACED_START_DELAY = 1.0
+
+#grading takes microseconds, so latencies are counted in buckets doubling from 1 microsecond (to about 2 minutes)
+REPLAY_BUCKET_BOUNDS = tuple(1000 * 2 ** exponent for exponent in range(28))
+
+#how many mismatches a report keeps the details of (every mismatch is still counted)
+MAXIMUM_MISMATCH_DETAILS = 100
+
+#synthetic quizzes: a made-up answer takes 1 to 8 seconds, and the GUI pauses this long after every answer
+SYNTHETIC_RESPONSE_TIMES = (1.0, 8.0)
+SYNTHETIC_PAUSE = 3.0
+DEFAULT_ARRIVAL_RATE = 100.0
+
+#the question bank for every pool this process has replayed, by pool number
+_question_banks = {}
+
+
+class SessionRecording:
+    """This class collects one quiz's answers for the log.
+
+    Attributes:
+        record: the quiz's log line, as a dictionary, filled in as answers arrive
+        session: the quiz being recorded
+        list_of_questions: the question pool the quiz was taken from
+        started_at: when (in time.perf_counter seconds) the quiz started
+    """
+    __slots__ = ("record", "session", "list_of_questions", "started_at")
+
+    def __init__(self, session: Quiz_Session.QuizSession, seed: int, list_of_questions: list, scheduled: bool):
+        "initializes the SessionRecording class"
+        self.session = session
+        self.list_of_questions = list_of_questions
+        self.started_at = time.perf_counter()
+        self.record = {
+            "seed": seed,
+            "number_of_questions": session.number_of_questions,
+            "speed_bonus_window": session.speed_bonus_window,
+            "number_of_choices": session.number_of_choices,
+            "scheduled": scheduled,
+            "started_at": round(time.time(), 3),
+            "finished": False,
+            "states": [question.state for question in session.list_of_random_questions],
+            "answers": [],
+            "outcomes": [],
+            "summary": None,
+        }
+
+    def record_answer(self, answer_result: Quiz_Session.AnswerResult):
+        """adds a graded answer
+
+        Arguments:
+            answer_result: what QuizSession.submit returned
+        """
+        #the response time is kept exactly, since the blitz speed bonus is rounded from it
+        self.record["answers"].append([answer_result.user_answer, answer_result.response_time, round(time.perf_counter() - self.started_at, 3)])
+        self.record["outcomes"].append([int(answer_result.correct), answer_result.points_awarded])
+
+
+class SessionRecorder:
+    """This class appends every quiz it is given to a session log, one line per quiz, written when the quiz ends.
+
+    Attributes:
+        file_name: the log
+        number_of_sessions: how many quizzes were written
+    """
+    def __init__(self, file_name: str):
+        "initializes the SessionRecorder class"
+        self.file_name = file_name
+        self.number_of_sessions = 0
+        self._log_file = open(file_name, "a", encoding = "utf-8")
+        self._written_pool = None
+        self._written_pool_line = None
+        self._recordings = []
+
+    def create_random_generator(self) -> tuple[int, random.Random]:
+        """returns a fresh seed and a random generator seeded with it, for one quiz"""
+        seed = random.SystemRandom().getrandbits(SEED_BITS)
+        return seed, random.Random(seed)
+
+    def start_session(self, session: Quiz_Session.QuizSession, seed: int, list_of_questions: list, scheduled: bool = False) -> SessionRecording:
+        """starts recording a quiz
+
+        Arguments:
+            session: the quiz, created with the random generator from create_random_generator
+            seed: that generator's seed
+            list_of_questions: the question pool the quiz was taken from
+            scheduled: if a scheduler picked the questions, so the seed alone cannot pick them again
+        """
+        recording = SessionRecording(session, seed, list_of_questions, scheduled)
+        self._recordings.append(recording)
+        return recording
+
+    def finish_session(self, recording: SessionRecording):
+        """writes a quiz to the log
+
+        Arguments:
+            recording: what start_session returned
+        """
+        self._recordings.remove(recording)
+        self._write(recording, True)
+
+    def close(self):
+        """writes the quizzes that never finished and closes the log"""
+        for recording in self._recordings:
+            self._write(recording, False)
+        self._recordings.clear()
+        self._log_file.close()
+
+    def _write(self, recording: SessionRecording, finished: bool):
+        """writes the quiz's line, after a pool line if its pool is not the last one written"""
+        if recording.list_of_questions is not self._written_pool:
+            #a reload that changed nothing the log holds (a new version with the same pool) does not need a new line
+            pool_line = json.dumps({"pool": [[question.state, question.capital, question.population_rank] for question in recording.list_of_questions]})
+            if pool_line != self._written_pool_line:
+                self._log_file.write(pool_line + "\n")
+                self._written_pool_line = pool_line
+            self._written_pool = recording.list_of_questions
+
+        session = recording.session
+        recording.record["finished"] = finished
+        recording.record["summary"] = [session.number_correct, session.points_earned, session.maximum_points]
+        self._log_file.write(json.dumps(recording.record, separators = (",", ":")) + "\n")
+        self._log_file.flush()
+        self.number_of_sessions += 1
+
+
+def find_record_problem(record, pool_states: set[str]) -> str | None:
+    """returns what keeps a quiz's log line from being replayed against its pool, or None if it can be
+
+    Arguments:
+        record: the quiz's log line
+        pool_states: every state in the quiz's pool
+    """
+    if not isinstance(record, dict):
+        return "is neither a question pool nor a quiz"
+    if type(record.get("seed")) is not int or type(record.get("number_of_questions")) is not int:
+        return "has no whole-number seed or number of questions"
+    answers = record.get("answers")
+    if not isinstance(answers, list) or not all(isinstance(answer, list) and len(answer) == 3 for answer in answers):
+        return "does not hold a list of [answer, response time, seconds since the start] answers"
+    if len(answers) > record["number_of_questions"]:
+        return f"has {len(answers)} answers for {record['number_of_questions']} questions"
+
+    #a scheduled quiz can only be replayed in its recorded order, and every recorded state must be in the pool to ask it again
+    recorded_states = record.get("states")
+    if recorded_states is None:
+        return "is scheduled, but its states were not recorded" if record.get("scheduled") else None
+    if not isinstance(recorded_states, list) or not all(isinstance(state, str) for state in recorded_states):
+        return "does not hold a list of states"
+    missing_states = [state for state in recorded_states if state not in pool_states]
+    if missing_states:
+        return f"asks about {', '.join(missing_states)}, which its question pool does not have"
+    if len(answers) > len(recorded_states):
+        return f"has {len(answers)} answers for {len(recorded_states)} recorded states"
+    return None
+
+
+def iterate_session_log(file_name: str):
+    """yields (session number, pool number, pool, record) for every quiz in a session log
+
+    Every line is checked before it is yielded, so a malformed log stops here with the line that is wrong
+    instead of crashing a worker partway through the replay.
+
+    Arguments:
+        file_name: the log
+    """
+    pool_number = -1
+    pool = None
+    pool_states = None
+    session_number = 0
+    with open(file_name, "r", encoding = "utf-8") as log_file:
+        for line_number, line in enumerate(log_file, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                raise ValueError(f"Line {line_number} of {file_name} is not valid JSON.") from None
+            if isinstance(entry, dict) and "pool" in entry:
+                pool = entry["pool"]
+                if not isinstance(pool, list) or not all(isinstance(question, list) and len(question) == 3 for question in pool):
+                    raise ValueError(f"Line {line_number} of {file_name} does not hold a pool of [state, capital, population rank] questions.")
+                pool_number += 1
+                pool_states = {state for state, _, _ in pool}
+                continue
+            if pool is None:
+                raise ValueError(f"Line {line_number} of {file_name} is a quiz, but no question pool came before it.")
+            record_problem = find_record_problem(entry, pool_states)
+            if record_problem is not None:
+                raise ValueError(f"Line {line_number} of {file_name} {record_problem}.")
+            session_number += 1
+            yield session_number, pool_number, pool, entry
+
+
+def get_question_bank(pool_number: int, pool: list) -> Question_Bank.QuestionBank:
+    """returns the question bank for a pool, building it the first time this process sees the pool
+
+    Arguments:
+        pool_number: which pool of the log it is
+        pool: (state, capital, population rank) for every question, in the bank's order
+    """
+    question_bank = _question_banks.get(pool_number)
+    if question_bank is None:
+        list_of_state_names = [state for state, _, _ in pool]
+        list_of_state_capitals = [capital for _, capital, _ in pool]
+        question_bank = Question_Bank.build_question_bank(list_of_state_names, list_of_state_capitals, {state: population_rank for state, _, population_rank in pool})
+        _question_banks[pool_number] = question_bank
+    return question_bank
+
+
+class ReplayReport:
+    """This class holds what a replay measured and every mismatch it found; reports from several workers are merged.
+
+    Attributes:
+        number_of_sessions: how many quizzes were replayed
+        number_of_answers: how many answers were submitted
+        number_checked: how many quizzes had recorded outcomes to compare against
+        number_of_mismatches: how many quizzes came out differently from their recording
+        mismatches: (session number, what differed) for the first MAXIMUM_MISMATCH_DETAILS mismatching quizzes
+        latency: a Quiz_Telemetry.LatencyHistogram of how long each answer took to grade (next_question and submit)
+        lateness: a histogram of how late each answer was submitted compared to its schedule (only at the original pace)
+    """
+    def __init__(self):
+        "initializes the ReplayReport class"
+        self.number_of_sessions = 0
+        self.number_of_answers = 0
+        self.number_checked = 0
+        self.number_of_mismatches = 0
+        self.mismatches = []
+        self.latency = Quiz_Telemetry.LatencyHistogram(REPLAY_BUCKET_BOUNDS)
+        self.lateness = Quiz_Telemetry.LatencyHistogram(REPLAY_BUCKET_BOUNDS)
+
+    def add_mismatch(self, session_number: int, problems: list[str]):
+        """counts a quiz that came out differently
+
+        Arguments:
+            session_number: which quiz of the log it is
+            problems: everything that differed
+        """
+        self.number_of_mismatches += 1
+        if len(self.mismatches) < MAXIMUM_MISMATCH_DETAILS:
+            self.mismatches.append((session_number, problems))
+
+    def merge(self, other: "ReplayReport"):
+        """adds another report's counts to this one
+
+        Arguments:
+            other: a worker's report
+        """
+        self.number_of_sessions += other.number_of_sessions
+        self.number_of_answers += other.number_of_answers
+        self.number_checked += other.number_checked
+        self.number_of_mismatches += other.number_of_mismatches
+        self.mismatches.extend(other.mismatches[:MAXIMUM_MISMATCH_DETAILS - len(self.mismatches)])
+        for histogram, other_histogram in ((self.latency, other.latency), (self.lateness, other.lateness)):
+            histogram.bucket_counts = [count + other_count for count, other_count in zip(histogram.bucket_counts, other_histogram.bucket_counts)]
+            histogram.count += other_histogram.count
+            histogram.total += other_histogram.total
+            histogram.maximum = max(histogram.maximum, other_histogram.maximum)
+
+
+class SessionReplay:
+    """This class replays one recorded quiz an answer at a time, so a worker can interleave many of them.
+
+    Attributes:
+        session_number: which quiz of the log it is
+        record: the quiz's log line
+        session: the rebuilt quiz
+        answer_number: how many answers have been submitted
+        problems: everything that differed from the recording so far
+    """
+    __slots__ = ("session_number", "record", "session", "answer_number", "problems")
+
+    def __init__(self, session_number: int, question_bank: Question_Bank.QuestionBank, record: dict):
+        "rebuilds the quiz from its seed, or in its recorded order if a scheduler picked its questions or the seed picks others"
+        self.session_number = session_number
+        self.record = record
+        self.answer_number = 0
+        self.problems = []
+        recorded_states = record.get("states")
+
+        self.session = None
+        if not record.get("scheduled"):
+            self.session = self._create_session(question_bank, None)
+            asked_states = [question.state for question in self.session.list_of_random_questions]
+            if recorded_states is not None and asked_states != recorded_states:
+                self.problems.append(f"the seed asked {', '.join(asked_states)} instead of {', '.join(recorded_states)}")
+                self.session = None
+
+        if self.session is None:
+            questions_by_state = {question.state: question for question in question_bank.list_of_questions}
+            self.session = self._create_session(question_bank, Batch_Grader.FixedOrderScheduler([questions_by_state[state] for state in recorded_states]))
+
+    def _create_session(self, question_bank: Question_Bank.QuestionBank, scheduler) -> Quiz_Session.QuizSession:
+        """returns the quiz rebuilt with the recorded seed and settings"""
+        record = self.record
+        return Quiz_Session.QuizSession(record["number_of_questions"], random_generator = random.Random(record["seed"]), record_answers = False,
+            scheduler = scheduler, speed_bonus_window = record.get("speed_bonus_window"), number_of_choices = record.get("number_of_choices"),
+            question_bank = question_bank)
+
+    @property
+    def finished(self) -> bool:
+        """True once every recorded answer has been submitted"""
+        return self.answer_number == len(self.record["answers"])
+
+    def submit_next_answer(self, replay_report: ReplayReport):
+        """shows the next question, submits the next recorded answer and compares the outcome
+
+        Arguments:
+            replay_report: where the latency is counted
+        """
+        user_answer, response_time, _ = self.record["answers"][self.answer_number]
+        started_at = time.perf_counter_ns()
+        self.session.next_question()
+        answer_result = self.session.submit(user_answer, response_time)
+        replay_report.latency.record(time.perf_counter_ns() - started_at)
+        replay_report.number_of_answers += 1
+
+        outcomes = self.record.get("outcomes")
+        if outcomes is not None:
+            outcome = [int(answer_result.correct), answer_result.points_awarded]
+            if outcome != outcomes[self.answer_number]:
+                self.problems.append(f"answer {self.answer_number + 1} ({answer_result.question.state}: {user_answer!r}) gave {outcome} instead of {outcomes[self.answer_number]}")
+        self.answer_number += 1
+
+    def finish(self, replay_report: ReplayReport):
+        """compares the totals and counts the quiz
+
+        Arguments:
+            replay_report: where the quiz is counted
+        """
+        summary = self.record.get("summary")
+        if summary is not None:
+            replay_report.number_checked += 1
+            replayed_summary = [self.session.number_correct, self.session.points_earned, self.session.maximum_points]
+            if replayed_summary != summary:
+                self.problems.append(f"the totals were {replayed_summary} instead of {summary}")
+        if self.problems:
+            replay_report.add_mismatch(self.session_number, self.problems)
+        replay_report.number_of_sessions += 1
+
+
+def initialize_replayer():
+    """loads what every replayed quiz needs; every worker runs this once when it starts"""
+    States_and_State_Capitals_Reader.load()
+
+
+def replay_chunk(chunk: list[tuple[int, int, list, dict]]) -> ReplayReport:
+    """replays quizzes one after another, as fast as possible; this is the task each worker runs at full speed
+
+    Arguments:
+        chunk: (session number, pool number, pool, record) for every quiz
+    """
+    replay_report = ReplayReport()
+    for session_number, pool_number, pool, record in chunk:
+        session_replay = SessionReplay(session_number, get_question_bank(pool_number, pool), record)
+        while not session_replay.finished:
+            session_replay.submit_next_answer(replay_report)
+        session_replay.finish(replay_report)
+    return replay_report
+
+
+def replay_paced(sessions: list[tuple[int, int, list, dict, float]], start_at: float, speed: float) -> ReplayReport:
+    """replays quizzes at their recorded pace, interleaving them on one timeline; this is the task each worker runs at the original pace
+
+    Arguments:
+        sessions: (session number, pool number, pool, record, seconds after the first quiz started) for every quiz
+        start_at: when (in time.time seconds) the first quiz of the log is due
+        speed: how much faster than recorded to go (2 halves every wait)
+    """
+    replay_report = ReplayReport()
+
+    #the timeline holds (when it is due, tie breaker, position in sessions, the replay or None before it starts)
+    timeline = [(start_at + offset / speed, position, position, None) for position, (_, _, _, _, offset) in enumerate(sessions)]
+    heapq.heapify(timeline)
+    tie_breaker = len(sessions)
+
+    while timeline:
+        due_at, _, position, session_replay = heapq.heappop(timeline)
+        waiting_time = due_at - time.time()
+        if waiting_time > 0:
+            time.sleep(waiting_time)
+
+        session_number, pool_number, pool, record, offset = sessions[position]
+        if session_replay is None:
+            session_replay = SessionReplay(session_number, get_question_bank(pool_number, pool), record)
+        else:
+            replay_report.lateness.record(max(0, round((time.time() - due_at) * 1e9)))
+            session_replay.submit_next_answer(replay_report)
+
+        if session_replay.finished:
+            session_replay.finish(replay_report)
+        else:
+            #every answer is due as long after the quiz started as it was when it was recorded
+            elapsed = session_replay.record["answers"][session_replay.answer_number][2]
+            tie_breaker += 1
+            heapq.heappush(timeline, (start_at + (offset + elapsed) / speed, tie_breaker, position, session_replay))
+
+    return replay_report
+
+
+def replay_all(sessions, workers: int, pace: str = "full", speed: float = 1.0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ReplayReport:
+    """replays every quiz on a pool of worker processes and returns the merged report
+
+    Arguments:
+        sessions: (session number, pool number, pool, record) for every quiz, such as from iterate_session_log
+        workers: how many worker processes to use (1 replays in this process)
+        pace: "full" to replay as fast as possible, or "original" to keep the recorded timing
+        speed: at the original pace, how much faster than recorded to go
+        chunk_size: at full speed, how many quizzes each task holds
+    """
+    replay_report = ReplayReport()
+
+    if pace == "original":
+        #every quiz keeps its offset from the first one, and the quizzes are dealt out in turn so every worker gets a share of every moment
+        sessions = list(sessions)
+        first_started_at = min((record.get("started_at", 0) for _, _, _, record in sessions), default = 0)
+        shares = [[] for _ in range(max(1, workers))]
+        for position, (session_number, pool_number, pool, record) in enumerate(sessions):
+            shares[position % len(shares)].append((session_number, pool_number, pool, record, record.get("started_at", 0) - first_started_at))
+        start_at = time.time() + PACED_START_DELAY
+
+        if workers <= 1:
+            initialize_replayer()
+            replay_report.merge(replay_paced(shares[0], start_at, speed))
+            return replay_report
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer = initialize_replayer) as executor:
+            for worker_report in executor.map(replay_paced, shares, [start_at] * len(shares), [speed] * len(shares)):
+                replay_report.merge(worker_report)
+        return replay_report
+
+    chunks = Batch_Grader.iterate_chunks(sessions, chunk_size)
+    if workers <= 1:
+        initialize_replayer()
+        for chunk in chunks:
+            replay_report.merge(replay_chunk(chunk))
+        return replay_report
+
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer = initialize_replayer) as executor:
+        #only a few chunks are queued at a time, so a huge log is never read into memory all at once
+        pending_reports = collections.deque()
+        for chunk in chunks:
+            pending_reports.append(executor.submit(replay_chunk, chunk))
+            if len(pending_reports) >= workers * Batch_Grader.CHUNKS_IN_FLIGHT_PER_WORKER:
+                replay_report.merge(pending_reports.popleft().result())
+        while pending_reports:
+            replay_report.merge(pending_reports.popleft().result())
+    return replay_report
+
+
+def write_synthetic_session_log(file_name: str, number_of_sessions: int, seed: int = 0, arrival_rate: float = DEFAULT_ARRIVAL_RATE):
+    """writes made-up quizzes mixing right answers, typos, other states' capitals and blanks, for load testing
+
+    The quizzes are normal (not blitz or multiple-choice) and have no outcomes, so a replay only measures them.
+
+    Arguments:
+        file_name: where to write them
+        number_of_sessions: how many quizzes to write
+        seed: the seed for the made-up quizzes
+        arrival_rate: how many quizzes start per second
+    """
+    States_and_State_Capitals_Reader.load()
+    list_of_questions = Question_Bank.capture_question_bank().list_of_questions
+    list_of_state_capitals = [question.capital for question in list_of_questions]
+    random_generator = random.Random(seed)
+
+    with open(file_name, "w", encoding = "utf-8") as log_file:
+        log_file.write(json.dumps({"pool": [[question.state, question.capital, question.population_rank] for question in list_of_questions]}) + "\n")
+        started_at = 0.0
+        for _ in range(number_of_sessions):
+            session_seed = random_generator.getrandbits(SEED_BITS)
+            number_of_questions = random_generator.randint(Quiz_Session.MINIMUM_NUMBER_OF_QUESTIONS, Quiz_Session.MAXIMUM_NUMBER_OF_QUESTIONS)
+            list_of_random_questions, _ = Quiz_Session.generate_random_questions(number_of_questions, list_of_questions, random.Random(session_seed))
+
+            answers = []
+            elapsed = 0.0
+            for question in list_of_random_questions:
+                response_time = random_generator.uniform(*SYNTHETIC_RESPONSE_TIMES)
+                elapsed += response_time
+                capital = question.capital
+                answers.append([random_generator.choice([capital, capital.lower(), capital[:-1], random_generator.choice(list_of_state_capitals), ""]), response_time, round(elapsed, 3)])
+                elapsed += SYNTHETIC_PAUSE
+
+            log_file.write(json.dumps({"seed": session_seed, "number_of_questions": number_of_questions, "started_at": round(started_at, 3),
+                "finished": True, "states": [question.state for question in list_of_random_questions], "answers": answers}, separators = (",", ":")) + "\n")
+            started_at += random_generator.expovariate(arrival_rate)
+
+
+def create_report_text(replay_report: ReplayReport, seconds: float, pace: str, workers: int) -> str:
+    """returns the throughput, latency and mismatches of a replay as text
+
+    Arguments:
+        replay_report: the merged report
+        seconds: how long the replay took
+        pace: "full" or "original"
+        workers: how many worker processes replayed
+    """
+    latency = replay_report.latency
+    lines = [
+        f"Replayed {replay_report.number_of_sessions:,} quizzes ({replay_report.number_of_answers:,} answers) in {seconds:.2f} s at {pace} pace with {workers} workers: "
+            f"{replay_report.number_of_sessions / seconds:,.0f} quizzes/s, {replay_report.number_of_answers / seconds:,.0f} answers/s",
+        f"grading latency per answer: mean {latency.total / max(1, latency.count) / 1000:.1f} us, p50 {latency.quantile(0.5) / 1000:.0f} us, "
+            f"p99 {latency.quantile(0.99) / 1000:.0f} us, max {latency.maximum / 1000:.0f} us",
+    ]
+    if replay_report.lateness.count:
+        lateness = replay_report.lateness
+        lines.append(f"lateness behind the recorded pace: p50 {lateness.quantile(0.5) / 1e6:.1f} ms, p99 {lateness.quantile(0.99) / 1e6:.1f} ms, max {lateness.maximum / 1e6:.1f} ms")
+    lines.append(f"{replay_report.number_checked:,} quizzes checked against their recording, {replay_report.number_of_mismatches:,} differed")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Replay recorded quizzes to check they grade the same, or to generate load.")
+    argument_parser.add_argument("log", nargs = "?", help = "a session log written by main.py --record-sessions")
+    argument_parser.add_argument("--pace", choices = ("full", "original"), default = "full", help = "replay as fast as possible or with the recorded timing")
+    argument_parser.add_argument("--speed", type = float, default = 1.0, help = "at the original pace, how many times faster than recorded to go")
+    argument_parser.add_argument("--workers", type = int, default = os.cpu_count() or 1, help = "how many worker processes to replay with (1 replays in this process)")
+    argument_parser.add_argument("--chunk-size", type = int, default = DEFAULT_CHUNK_SIZE, help = "at full speed, how many quizzes each worker task holds")
+    argument_parser.add_argument("--mismatches", type = int, default = 10, help = "how many mismatching quizzes to describe")
+    argument_parser.add_argument("--synthetic", type = int, metavar = "SESSIONS", help = "replay this many made-up quizzes instead of a log")
+    argument_parser.add_argument("--arrival-rate", type = float, default = DEFAULT_ARRIVAL_RATE, help = "how many made-up quizzes start per second")
+    argument_parser.add_argument("--seed", type = int, default = 0, help = "the seed for the made-up quizzes")
+    argument_parser.add_argument("--write-log", metavar = "FILE", help = "keep the made-up log here instead of in a temporary directory")
+    arguments = argument_parser.parse_args()
+    if not arguments.log and not arguments.synthetic:
+        argument_parser.error("give a session log or --synthetic")
+    if arguments.speed <= 0:
+        argument_parser.error("--speed must be more than 0")
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_file_name = arguments.log
+        if arguments.synthetic:
+            log_file_name = arguments.write_log or os.path.join(directory, "synthetic.jsonl")
+            write_synthetic_session_log(log_file_name, arguments.synthetic, arguments.seed, arguments.arrival_rate)
+
+        #a malformed log line stops the replay with the line's number
+        start = time.perf_counter()
+        try:
+            replay_report = replay_all(iterate_session_log(log_file_name), arguments.workers, arguments.pace, arguments.speed, arguments.chunk_size)
+        except ValueError as error:
+            sys.exit(str(error))
+        seconds = time.perf_counter() - start
+
+    print(create_report_text(replay_report, seconds, arguments.pace, arguments.workers))
+    for session_number, problems in replay_report.mismatches[:arguments.mismatches]:
+        print(f"  quiz {session_number}: " + "; ".join(problems))
+    sys.exit(1 if replay_report.number_of_mismatches else 0)
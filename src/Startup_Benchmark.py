@@ -0,0 +1,133 @@
+"""This file enforces a cold-start budget: every launch is a fresh python process, timed phase by phase.
+
+Two checks are run:
+    imports: a fresh process imports every module main.py uses; this must stay under --import-budget and must not
+        import requests or bs4, read the .csv file or build the questions (importing has no side effects), nor load
+        the modules only optional features use (OPTIONAL_MODULES), which main.py imports when a feature is switched on
+    launch: main.py --profile-startup json is run in a fresh process; the median time to first paint must stay under
+        --launch-budget (this needs a display or Xvfb, and is skipped without one)
+
+The process exits with status 1 if a check fails, so it can run in CI.
+
+Usage (from the repository root):
+    python src/Startup_Benchmark.py [--runs N] [--import-budget MS] [--launch-budget MS]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+#modules that only saving results, recording, telemetry, lag reports, adaptive quizzes, multiple choice, reloading or rank sources need
+OPTIONAL_MODULES = ("sqlite3", "uuid", "Results_Store", "Session_Replay", "Quiz_Telemetry", "Event_Loop_Monitor", "Question_Scheduler",
+    "Distractor_Index", "Question_Bank", "Rank_Source_Fetcher")
+
+#the modules main.py imports, checked after importing them in a fresh process
+IMPORT_CHECK_PROGRAM = """
+import json, sys, time
+sys.path.insert(0, {source_directory!r})
+start = time.perf_counter()
+import main
+elapsed_seconds = time.perf_counter() - start
+print(json.dumps({{
+    "import_seconds": elapsed_seconds,
+    "heavy_modules": sorted(name for name in ("requests", "bs4") if name in sys.modules),
+    "optional_modules": sorted(name for name in {optional_modules!r} if name in sys.modules),
+    "csv_read": "answer_index" in vars(sys.modules["States_and_State_Capitals_Reader"]),
+    "questions_built": "list_of_questions" in vars(sys.modules["Questions"]),
+}}))
+"""
+
+DEFAULT_IMPORT_BUDGET = 150
+DEFAULT_LAUNCH_BUDGET = 750
+
+
+def run_import_check(runs: int) -> dict:
+    """imports main.py's modules in fresh processes and returns the median import time and any side effects seen
+
+    Arguments:
+        runs: how many fresh processes to time
+    """
+    reports = []
+    for _ in range(runs):
+        completed_process = subprocess.run([sys.executable, "-c", IMPORT_CHECK_PROGRAM.format(source_directory = SOURCE_DIRECTORY, optional_modules = OPTIONAL_MODULES)],
+            capture_output = True, text = True, check = True)
+        reports.append(json.loads(completed_process.stdout))
+
+    return {
+        "median_import_seconds": statistics.median(report["import_seconds"] for report in reports),
+        "heavy_modules": sorted({name for report in reports for name in report["heavy_modules"]}),
+        "optional_modules": sorted({name for report in reports for name in report["optional_modules"]}),
+        "csv_read": any(report["csv_read"] for report in reports),
+        "questions_built": any(report["questions_built"] for report in reports),
+    }
+
+
+def run_launch_check(runs: int) -> dict | None:
+    """launches main.py --profile-startup json in fresh processes and returns the median of every phase, or None without a display
+
+    Arguments:
+        runs: how many fresh processes to time
+    """
+    phase_timings = {}
+    total_timings = []
+    for _ in range(runs):
+        completed_process = subprocess.run([sys.executable, os.path.join(SOURCE_DIRECTORY, "main.py"), "--profile-startup", "json"],
+            capture_output = True, text = True)
+        if completed_process.returncode != 0:
+            if "display" in completed_process.stderr.lower():
+                return None
+            raise RuntimeError(completed_process.stderr)
+
+        report = json.loads(completed_process.stdout.strip().splitlines()[-1])
+        for name, seconds in report["phases"].items():
+            phase_timings.setdefault(name, []).append(seconds)
+        total_timings.append(report["total_seconds"])
+
+    return {
+        "median_phase_seconds": {name: statistics.median(timings) for name, timings in phase_timings.items()},
+        "median_total_seconds": statistics.median(total_timings),
+    }
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Check the quiz's cold-start budget.")
+    argument_parser.add_argument("--runs", type = int, default = 5, help = "how many fresh processes to time for each check")
+    argument_parser.add_argument("--import-budget", type = float, default = DEFAULT_IMPORT_BUDGET, help = "the most milliseconds importing main.py's modules may take")
+    argument_parser.add_argument("--launch-budget", type = float, default = DEFAULT_LAUNCH_BUDGET, help = "the most milliseconds a launch may take to first paint")
+    arguments = argument_parser.parse_args()
+
+    failures = []
+
+    import_report = run_import_check(arguments.runs)
+    import_milliseconds = import_report["median_import_seconds"] * 1000
+    print(f"imports: {import_milliseconds:.2f} ms (budget {arguments.import_budget:g} ms)")
+    if import_milliseconds > arguments.import_budget:
+        failures.append("importing took longer than its budget")
+    if import_report["heavy_modules"]:
+        failures.append(f"importing loaded {', '.join(import_report['heavy_modules'])}")
+    if import_report["optional_modules"]:
+        failures.append(f"importing loaded optional modules: {', '.join(import_report['optional_modules'])}")
+    if import_report["csv_read"]:
+        failures.append("importing read the .csv file")
+    if import_report["questions_built"]:
+        failures.append("importing built the questions")
+
+    launch_report = run_launch_check(arguments.runs)
+    if launch_report is None:
+        print("launch: skipped (no display)")
+    else:
+        for name, seconds in launch_report["median_phase_seconds"].items():
+            print(f"  {name:<16}{seconds * 1000:>10.2f} ms")
+        launch_milliseconds = launch_report["median_total_seconds"] * 1000
+        print(f"launch: {launch_milliseconds:.2f} ms to first paint (budget {arguments.launch_budget:g} ms)")
+        if launch_milliseconds > arguments.launch_budget:
+            failures.append("launching took longer than its budget")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,77 @@
+"""This file times the phases of launching the quiz, so a slow start can be traced to the phase that caused it.
+
+Exports:
+    StartupProfiler: a class that records how long each startup phase took and reports it as text or JSON
+
+Use Cases:
+    profiler = StartupProfiler()
+    with profiler.phase("CSV load"):
+        States_and_State_Capitals_Reader.load()
+    print(profiler.create_report_text())
+"""
+
+import contextlib
+import json
+import time
+
+
+class StartupProfiler:
+    """This class records how long each startup phase took.
+
+    Attributes:
+        started_at: when (in time.perf_counter seconds) the launch began
+        phases: a list of (phase name, seconds) in the order the phases ran
+        finished_at: when (in time.perf_counter seconds) the last phase ended
+    """
+    def __init__(self, started_at: float | None = None):
+        "initializes the StartupProfiler class"
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.phases = []
+        self.finished_at = self.started_at
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """times the code inside the with block as one phase
+
+        Arguments:
+            name: what the phase is called in the report
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def record(self, name: str, start: float, end: float):
+        """adds a phase that was timed elsewhere
+
+        Arguments:
+            name: what the phase is called in the report
+            start: when (in time.perf_counter seconds) the phase began
+            end: when (in time.perf_counter seconds) the phase ended
+        """
+        self.phases.append((name, end - start))
+        self.finished_at = max(self.finished_at, end)
+
+    def total_seconds(self) -> float:
+        """returns the time from the start of the launch to the end of the last phase, including time between phases"""
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> dict:
+        """returns the phases (in seconds) as plain data that can be saved as JSON"""
+        return {"phases": dict(self.phases), "total_seconds": self.total_seconds()}
+
+    def create_report_text(self, output_format: str = "text") -> str:
+        """returns the phases as an aligned table, or as JSON
+
+        Arguments:
+            output_format: "text" or "json"
+        """
+        if output_format == "json":
+            return json.dumps(self.to_dict())
+
+        lines = [f"{'phase':<16}{'ms':>10}"]
+        for name, seconds in self.phases:
+            lines.append(f"{name:<16}{seconds * 1000:>10.2f}")
+        lines.append(f"{'total':<16}{self.total_seconds() * 1000:>10.2f}")
+        return "\n".join(lines)
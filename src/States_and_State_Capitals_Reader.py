@@ -1,37 +1,115 @@
 """This file reads a .csv file that lists each of the 50 U.S. states and their capital to create many useful data structures.
 
+The file is the "us-states" dataset of Dataset_Loader, which streams its rows and takes care of its encoding.
+
+Nothing is read when this file is imported: the file is read the first time one of the exports below is used
+(or when load is called), so importing the quiz's modules stays cheap and free of side effects.
+
 Exports:
     list_of_state_names: a list that contains each of the 50 U.S. states
     list_of_state_capitals: a list that contains each of the 50 U.S. state capitals
     dictionary_of_states: dict that maps each state capital to its state
     dictionary_of_state_capitals: a dict that maps each state to its state capital
+    answer_index: an Answer_Index.AnswerIndex that checks a user's capital for a state, tolerating typos and abbreviations
+    load: reads the file now instead of on first use
+    read_state_table: reads the states and capitals from any .csv file laid out like this one
+    publish: fills in the exports from states and capitals that were read elsewhere (such as a question bank snapshot)
+    replace: swaps in exports that were rebuilt while the quiz runs (such as by a Question_Bank reload)
 
 Use Cases:
     dictionary_of_states["Nashville"] == Tennessee
     dictionary_of_state_capitals["Tennessee"] == Nashville
+    answer_index.check("Minnesota", "saint paul").accepted == True
 """
 
-import csv
+import threading
+import Answer_Index
+import Dataset_Loader
+
+#the table sits next to this file, so the quiz can be started from any directory
+CSV_FILE_NAME = Dataset_Loader.DATASETS["us-states"].path
+
+#the names that are filled in by load
+LAZY_EXPORTS = ("list_of_state_names", "list_of_state_capitals", "dictionary_of_states", "dictionary_of_state_capitals", "answer_index")
+
+#the GUI and a background fetch can both reach for the table first
+_load_lock = threading.Lock()
+
+
+def read_state_table(csv_file_name: str) -> tuple[list[str], list[str]]:
+    """reads the states and their capitals, in file order
+
+    Arguments:
+        csv_file_name: the path of the .csv file
+
+    Returns:
+        list_of_state_names: the states
+        list_of_state_capitals: each state's capital, in the same order
+    """
+    #the rows are streamed, so the byte order mark is removed and columns are found by their headers
+    us_states = Dataset_Loader.DATASETS["us-states"]
+    table = Dataset_Loader.load_table(Dataset_Loader.Dataset(us_states.name, csv_file_name, us_states.place_column, us_states.answer_column), include_places_by_answer = False)
+    list_of_state_names = table.list_of_places
+    list_of_state_capitals = table.list_of_answers
+    return list_of_state_names, list_of_state_capitals
+
+
+def load(csv_file_name: str = CSV_FILE_NAME):
+    """reads the table and fills in the exports; later calls do nothing
+
+    Arguments:
+        csv_file_name: the path of the .csv file
+    """
+    with _load_lock:
+        if "answer_index" not in globals():
+            _publish(*read_state_table(csv_file_name))
+
+
+def publish(list_of_state_names: list[str], list_of_state_capitals: list[str]):
+    """fills in the exports from states and capitals that were read elsewhere; does nothing if they are already filled in
+
+    Arguments:
+        list_of_state_names: the states
+        list_of_state_capitals: each state's capital, in the same order
+    """
+    with _load_lock:
+        if "answer_index" not in globals():
+            _publish(list_of_state_names, list_of_state_capitals)
+
+
+def _publish(list_of_state_names: list[str], list_of_state_capitals: list[str]):
+    """builds the dictionaries and the answer index and makes them the exports (the caller holds _load_lock)"""
+    dictionary_of_state_capitals = dict(zip(list_of_state_names, list_of_state_capitals))
+    dictionary_of_states = dict(zip(list_of_state_capitals, list_of_state_names))
+
+    #index the capitals once so answers are checked with hash lookups instead of list scans
+    answer_index = Answer_Index.AnswerIndex(dictionary_of_state_capitals)
+
+    #answer_index is published last, since its presence is what marks the table as loaded
+    globals().update(list_of_state_names = list_of_state_names, list_of_state_capitals = list_of_state_capitals,
+        dictionary_of_states = dictionary_of_states, dictionary_of_state_capitals = dictionary_of_state_capitals)
+    globals()["answer_index"] = answer_index
 
-list_of_state_names = []
-list_of_state_capitals = []
-dictionary_of_states = {}
-dictionary_of_state_capitals = {}
 
-CSV_FILE_NAME = "src/States_and_State_Capitals_Table.csv"
+def replace(list_of_state_names: list[str], list_of_state_capitals: list[str], dictionary_of_states: dict[str, str], dictionary_of_state_capitals: dict[str, str],
+        answer_index: Answer_Index.AnswerIndex):
+    """swaps in exports that were rebuilt elsewhere; quizzes that already hold the old answer index keep grading with it
 
-#read file
-with open(CSV_FILE_NAME, "r") as csv_file:
-    csv_reader = csv.reader(csv_file)
+    Arguments:
+        list_of_state_names: the states
+        list_of_state_capitals: each state's capital, in the same order
+        dictionary_of_states: a dict that maps each state capital to its state
+        dictionary_of_state_capitals: a dict that maps each state to its state capital
+        answer_index: the answer index built for dictionary_of_state_capitals
+    """
+    with _load_lock:
+        globals().update(list_of_state_names = list_of_state_names, list_of_state_capitals = list_of_state_capitals,
+            dictionary_of_states = dictionary_of_states, dictionary_of_state_capitals = dictionary_of_state_capitals, answer_index = answer_index)
 
-    #skip first row because it contains headers
-    next(csv_reader)
 
-    #extract data from rows
-    for row in csv_reader:
-        state = row[0]
-        capital = row[1]
-        list_of_state_names.append(state)
-        list_of_state_capitals.append(capital)
-        dictionary_of_state_capitals[state] = capital
-        dictionary_of_states[capital] = state
\ No newline at end of file
+def __getattr__(name: str):
+    """reads the table the first time one of its exports is used; afterwards they are ordinary module attributes"""
+    if name in LAZY_EXPORTS:
+        load()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,143 @@
+"""This file times how long a quiz question takes to render when the quiz screen is rebuilt versus when its widgets are reused.
+
+Rebuilding is how QuizScreen used to work: eight widgets were created, packed and destroyed for every question.
+Reusing is how QuizScreen works now: the widgets are built once and every question only changes their text.
+Each widget creation is a round trip to the X server, so the Tk object counts matter as much as the timings on remote displays.
+
+This needs a display (or Xvfb) since it opens a real tkinter window.
+
+Usage (from the repository root):
+    python src/Widget_Render_Benchmark.py [--questions N]
+"""
+
+import argparse
+import statistics
+import time
+import tkinter as tk
+import Quiz_Session
+import main
+
+
+def count_widgets(widget) -> int:
+    """returns how many widgets are inside a widget, counting nested ones
+
+    Arguments:
+        widget: the widget to count the descendants of
+    """
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def count_tcl_commands(root) -> int:
+    """returns how many Tcl commands exist, which includes one per live widget and one per python callback
+
+    Arguments:
+        root: the GUI window
+    """
+    return len(root.tk.call("info", "commands"))
+
+
+def render_by_rebuilding(root, session: Quiz_Session.QuizSession) -> tuple[list[float], int]:
+    """renders every question by creating, packing and destroying the quiz widgets each time
+
+    Arguments:
+        root: the GUI window
+        session: the quiz to render
+
+    Returns:
+        the render time (in seconds) of each question and how many widgets were created
+    """
+    frame = tk.Frame(root)
+    frame.pack()
+    render_times = []
+    widgets_created = 0
+
+    question = session.next_question()
+    while question is not None:
+        start = time.perf_counter()
+        widgets = [
+            tk.Label(frame, text = question.create_question_text(session.question_number)),
+            tk.Label(frame, text = question.create_population_rank_and_weight_text()),
+            tk.Entry(frame),
+            tk.Button(frame, text = "Check Answer"),
+            tk.Label(frame, text = ""),
+            tk.Label(frame, text = ""),
+            tk.Label(frame, text = ""),
+            tk.Label(frame, text = ""),
+        ]
+        for widget in widgets:
+            widget.pack()
+        root.update_idletasks()
+        render_times.append(time.perf_counter() - start)
+        widgets_created += len(widgets)
+
+        session.submit(question.capital)
+        for widget in widgets:
+            widget.destroy()
+        question = session.next_question()
+
+    frame.destroy()
+    return render_times, widgets_created
+
+
+def render_by_reusing(root, session: Quiz_Session.QuizSession) -> tuple[list[float], int]:
+    """renders every question through QuizScreen, which only updates the widgets it built once
+
+    Arguments:
+        root: the GUI window
+        session: the quiz to render
+
+    Returns:
+        the render time (in seconds) of each question and how many widgets were created
+    """
+    widgets_before = count_widgets(root)
+    quiz_screen = main.QuizScreen(root, session.number_of_questions, on_finished = lambda quiz: None, delay = 0)
+    quiz_screen.session = session
+    widgets_created = count_widgets(root) - widgets_before
+    render_times = []
+
+    #the constructor already rendered a question from its own session, so every timed render uses the given session
+    while not session.finished:
+        start = time.perf_counter()
+        quiz_screen.show_next_question()
+        root.update_idletasks()
+        render_times.append(time.perf_counter() - start)
+        session.submit(session.current_question.capital)
+
+    quiz_screen.frame.destroy()
+    return render_times, widgets_created
+
+
+def run_benchmark(number_of_questions: int) -> dict[str, dict[str, float]]:
+    """renders the same quiz both ways and returns the render times and Tk object counts of each
+
+    Arguments:
+        number_of_questions: how many questions the quiz renders
+    """
+    root = tk.Tk()
+    report = {}
+    try:
+        for name, render in (("rebuild", render_by_rebuilding), ("reuse", render_by_reusing)):
+            session = Quiz_Session.QuizSession(number_of_questions)
+            commands_before = count_tcl_commands(root)
+            render_times, widgets_created = render(root, session)
+            report[name] = {
+                "median_render_seconds": statistics.median(render_times),
+                "maximum_render_seconds": max(render_times),
+                "widgets_created": widgets_created,
+                "leftover_tcl_commands": count_tcl_commands(root) - commands_before,
+            }
+    finally:
+        root.destroy()
+    return report
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "Compare rebuilding and reusing the quiz widgets.")
+    argument_parser.add_argument("--questions", type = int, default = Quiz_Session.MAXIMUM_NUMBER_OF_QUESTIONS, help = "how many questions to render")
+    arguments = argument_parser.parse_args()
+
+    report = run_benchmark(arguments.questions)
+
+    print(f"{'approach':<10}{'median (ms)':>14}{'max (ms)':>12}{'widgets created':>18}{'leftover Tcl commands':>24}")
+    for name, measurements in report.items():
+        print(f"{name:<10}{measurements['median_render_seconds'] * 1000:>14.3f}{measurements['maximum_render_seconds'] * 1000:>12.3f}{measurements['widgets_created']:>18}{measurements['leftover_tcl_commands']:>24}")
@@ -4,92 +4,193 @@ There are 3 stages to the quiz defined by 3 classes
 Stage 1: SetupScreen
 Stage 2: QuizScren
 Stage 3: Final Screen
+
+Nothing here blocks the tkinter event loop: each screen reacts to button presses, pauses are scheduled with
+root.after, and each screen hands over to the next through a callback.
+Each screen builds its widgets once inside its own frame; later updates only change their text and state.
+In blitz mode (--blitz) the quiz is played from the keyboard against one countdown: Enter submits, the next question
+is shown in the same callback, and fast correct answers earn a speed bonus on top of their weight.
+In multiple-choice mode (--multiple-choice) each answer is picked from buttons whose wrong options come from Distractor_Index.
+Editing the .csv file or fetching new population ranks reloads the question bank (Question_Bank) while the window is
+open; the next quiz uses the new version and a quiz in progress keeps the one it started with.
+With --record-sessions every quiz is seeded and logged with its answers and their timings, so Session_Replay can replay it exactly.
+
+Usage (from the repository root):
+    python src/main.py [--delay SECONDS] [--adaptive-user NAME] [--report-event-loop-lag] [--results-database [PATH]]
+                       [--telemetry-json PATH] [--telemetry-prometheus PATH] [--blitz [SECONDS]] [--multiple-choice [N]]
+                       [--rank-sources FILE [--rank-strategy first|quorum]] [--reload-interval SECONDS] [--record-sessions PATH]
+    python src/main.py --profile-startup [json]    (prints how long each startup phase took, then exits)
 """
+import time
+
+#taken before the other imports so --profile-startup can report how long they take
+STARTUP_STARTED_AT = time.perf_counter()
+
+#modules only an optional feature needs (saving results, recording, telemetry, multiple choice, reloading and so on)
+#are imported where that feature is switched on, so a plain quiz never loads them
+import argparse
+import functools
+import math
 import tkinter as tk
 import Questions
 import Population_Rank_Web_Scraper
-import States_and_State_Capitals_Reader
-import time
-import random
+import Quiz_Session
+import Startup_Profiler
+import Question_Bank_Snapshot
 
+IMPORTS_FINISHED_AT = time.perf_counter()
 
-class SetupScreen:
-    """the first stage of the quiz, where the user is asked for the amount of questions they want
+#the default pause (in milliseconds) after an answer or an invalid input
+DEFAULT_DELAY = 3000
+
+#how long (in seconds) a blitz quiz lasts unless --blitz is given a different time
+DEFAULT_BLITZ_TIME_LIMIT = 60
+
+#what --multiple-choice given without a number stands for; Distractor_Index's default is looked up once it is imported
+#(an object rather than a string, since argparse would pass a string through type = int)
+DEFAULT_CHOICES_PLACEHOLDER = object()
+
+
+def create_wait_text(delay: int, ending: str) -> str:
+    """returns the message shown during a pause, or nothing if there is no pause
+
+    Arguments:
+        delay: the length of the pause in milliseconds
+        ending: what the user is waiting for, such as "to try again"
+    """
+    if delay <= 0:
+        return ""
+    seconds = delay / 1000
+    unit = "second" if seconds == 1 else "seconds"
+    return f"Please wait {seconds:g} {unit}{ending}..."
+
+
+class Screen:
+    """a stage of the quiz whose widgets live in their own frame, so they are built once and the frame is swapped in and out
     
     Attributes:
         root: the GUI window
+        frame: the frame that holds every widget of the screen
     """
     def __init__(self, root):
+        """creates the screen's frame; subclasses build their widgets inside it once"""
+        self.root = root
+        self.frame = tk.Frame(self.root)
+
+
+    def show(self):
+        """swaps this screen's frame into the window"""
+        self.frame.pack(fill = tk.BOTH, expand = True)
+
+
+    def hide(self):
+        """takes this screen's frame out of the window without destroying its widgets"""
+        self.frame.pack_forget()
+
+
+class SetupScreen(Screen):
+    """the first stage of the quiz, where the user is asked for the amount of questions they want
+    
+    Attributes:
+        root: the GUI window
+        on_finished: called with the number of questions once a valid amount is entered; it raises ValueError if the quiz cannot start
+        delay: the pause (in milliseconds) after an invalid input
+        question_bank: the Question_Bank.ReloadableQuestionBank whose current size bounds the input, or None for the module exports
+    """
+    #how often (in milliseconds) to check if the background population rank fetch has finished
+    BACKUP_DICTIONARY_POLL_INTERVAL = 200
+
+    def __init__(self, root, on_finished, delay: int = DEFAULT_DELAY, question_bank = None):
         """initialize the setup screen"""
         #reference the GUI window
-        self.root = root
+        super().__init__(root)
+        self.on_finished = on_finished
+        self.delay = delay
+        self.question_bank = question_bank
+        self.finished = False
 
-        #track if the button in the GUI has been pressed
-        self.button_pressed = tk.BooleanVar(self.root)
-        self.button_pressed.set("False")
+        #build the widgets once; invalid input only changes their text and state
+        self.create_setup_widgets()
+        self.display_setup_widgets()
 
-        #ask the user for how many questions they want, storing the value as a variable
-        self.number_of_questions = self.prompt_number_of_questions()
+        #hide the backup dictionary message if the population ranks arrive while this screen is up
+        self.root.after(self.BACKUP_DICTIONARY_POLL_INTERVAL, self.refresh_backup_dictionary_message)
 
+        #ask the user for how many questions they want; the answer arrives through track_button_press
+        self.show()
 
-    def prompt_number_of_questions(self):
-        """asks the user for how many questions they want"""
-        #keep looping until an appropriate response is given
-        while True:
-            self.create_setup_widgets()
-            self.display_setup_widgets()
-
-            #wait until the button is pressed, as that changes the value of button_pressed from False to True
-            self.button_pressed.set(False)
-            self.root.wait_variable(self.button_pressed)
-            
-            #user input is a string, so convert to an int
-            #exceptions are handled by displaying a message and waiting 3 seconds before the screen is refreshed (a new loop)
-            #the GUI must update before sleeping or the error and wait labels will not appear
-            try:
-                question_amount = int(self.question_amount_entry.get())
-            except ValueError:
-                self.error_message_label.configure(text = "The input must be an integer!")
-                self.wait_message_label.configure(text = "Please wait 3 seconds to try again...")
-                self.root.update()
-                time.sleep(3)
-            except Exception:
-                self.error_message_label.configure(text = "An unexpected error occured.")
-                self.wait_message_label.configure(text = "Please wait 3 seconds to try again...")
-                self.root.update()
-                time.sleep(3)
-            
-            #if there is no exception, check if the input is a valid number 1-50
-            #if it is not, then display a manual error message with the procedure from before
-            #if the input is valid, then return the value for use in the next function
-            else:
-                if question_amount < 1:
-                    self.error_message_label.configure(text = "The input is too low!")
-                    self.wait_message_label.configure(text = "Please wait 3 seconds to try again...")
-                    self.root.update()
-                    time.sleep(3)
-                elif question_amount > 50:
-                    self.error_message_label.configure(text = "The input is too high!")
-                    self.wait_message_label.configure(text = "Please wait 3 seconds to try again...")
-                    self.root.update()
-                    time.sleep(3)
-                else:
-                    return question_amount
-            
-            #no matter what, delete all of the widgets on the screen so that they can be rebuilt in the next loop or QuizScreen
-            finally:
-                self.destroy_setup_widgets()
+
+    def track_button_press(self):
+        """accessed by buttons; checks the user's input and either moves on to the quiz or shows what was wrong"""
+        #user input is a string, so convert it with the quiz's own validation
+        #invalid input is handled by displaying a message and scheduling a reset of the screen after the delay
+        try:
+            question_amount = Quiz_Session.parse_number_of_questions(self.question_amount_entry.get(), self.count_available_questions())
+        except ValueError as error:
+            self.show_error_message(str(error))
+            return
+        except Exception:
+            self.show_error_message("An unexpected error occured.")
+            return
+
+        #if the input is valid, hand it to the next stage; the bank can still shrink before the quiz starts, which it reports
+        try:
+            self.on_finished(question_amount)
+        except ValueError as error:
+            self.show_error_message(str(error))
+            return
+        self.number_of_questions = question_amount
+        self.finished = True
+        self.hide()
+
+
+    def count_available_questions(self) -> int:
+        """returns how many questions the current question bank holds"""
+        if self.question_bank is not None:
+            return len(self.question_bank.current.list_of_questions)
+        return len(Questions.list_of_questions)
+
+
+    def create_instructions_text(self) -> str:
+        """returns the prompt, with the current question bank's size as the upper bound"""
+        return f"Enter a number {Quiz_Session.MINIMUM_NUMBER_OF_QUESTIONS}-{self.count_available_questions()} (inclusive):"
+
+
+    def show_error_message(self, error_message: str):
+        """tells the user what was wrong with their input, then asks again once the delay is over
+
+        Arguments:
+            error_message: the text explaining what was wrong
+        """
+        self.error_message_label.configure(text = error_message)
+        self.wait_message_label.configure(text = create_wait_text(self.delay, " to try again"))
+
+        #the button stays disabled during the delay so the input cannot be submitted twice
+        self.question_amount_entry_submit_button.configure(state = tk.DISABLED)
+        self.root.after(self.delay, self.reset_setup_widgets)
+
+
+    def reset_setup_widgets(self):
+        """clears the input and messages so the user can try again"""
+        self.question_amount_entry.delete(0, tk.END)
+        self.instructions_label.configure(text = self.create_instructions_text())
+        self.error_message_label.configure(text = "")
+        self.wait_message_label.configure(text = "")
+        self.question_amount_entry_submit_button.configure(state = tk.NORMAL)
 
 
     def create_setup_widgets(self):
         """defines the widgets used for the setup screen"""
-        self.question_amount_label = tk.Label(self.root, text = "How many questions would you like to be asked about US State Capitals?")
-        self.instructions_label = tk.Label(self.root, text = "Enter a number 1-50 (inclusive):")
-        self.question_amount_entry = tk.Entry(self.root)
-        self.question_amount_entry_submit_button = tk.Button(self.root, text = "Submit", command = self.track_button_press)
-        self.error_message_label = tk.Label(self.root, text = "")
-        self.wait_message_label = tk.Label(self.root, text = "")
-        self.backup_dictionary_message_label = tk.Label(self.root, text = "Could not retreive population rank data; backup dictionary in use")
+        self.question_amount_label = tk.Label(self.frame, text = "How many questions would you like to be asked about US State Capitals?")
+        self.instructions_label = tk.Label(self.frame, text = self.create_instructions_text())
+        self.question_amount_entry = tk.Entry(self.frame)
+        self.question_amount_entry_submit_button = tk.Button(self.frame, text = "Submit", command = self.track_button_press)
+
+        #Enter presses the button, so nothing is submitted while it is disabled
+        self.question_amount_entry.bind("<Return>", lambda event: self.question_amount_entry_submit_button.invoke())
+        self.error_message_label = tk.Label(self.frame, text = "")
+        self.wait_message_label = tk.Label(self.frame, text = "")
+        self.backup_dictionary_message_label = tk.Label(self.frame, text = "Could not retreive population rank data; backup dictionary in use")
 
 
     def display_setup_widgets(self):
@@ -101,100 +202,199 @@ class SetupScreen:
         self.error_message_label.pack()
         self.wait_message_label.pack()
         
-        #displays message indicating if backup dictionary is in use
+        #displays message indicating if backup dictionary is in use (while the fetch is running or after it failed)
         if Population_Rank_Web_Scraper.backup_dictionary_used:
             self.backup_dictionary_message_label.pack()
 
 
-    def destroy_setup_widgets(self):
-        """removes all of the widgets used for the setup screen"""
-        self.question_amount_label.destroy()
-        self.instructions_label.destroy()
-        self.question_amount_entry.destroy()
-        self.question_amount_entry_submit_button.destroy()
-        self.error_message_label.destroy()
-        self.wait_message_label.destroy()
-        self.backup_dictionary_message_label.destroy()
+    def refresh_backup_dictionary_message(self):
+        """hides the backup dictionary message once fetched population ranks are in use, polling until the fetch finishes"""
+        if not Population_Rank_Web_Scraper.backup_dictionary_used:
+            self.backup_dictionary_message_label.pack_forget()
 
-
-    def track_button_press(self):
-        """accessed by buttons; sets the button_pressed attribute to True"""
-        self.button_pressed.set("True")
+        #stop polling once the fetch is over or the setup screen is done
+        if Population_Rank_Web_Scraper.fetch_in_progress and not self.finished:
+            self.root.after(self.BACKUP_DICTIONARY_POLL_INTERVAL, self.refresh_backup_dictionary_message)
 
 
-class QuizScreen:
+class QuizScreen(Screen):
     """The second stage of the quiz, where the quiz is conducted
     
     Attributes:
         root: the GUI window
         number_of_questions: the number of questions that the quiz will contain
+        on_finished: called with this screen once every question has been answered
+        delay: the pause (in milliseconds) between an answer and the next question; 0 for a fast practice mode
+        scheduler: picks the questions from what the user got wrong before, or None for uniformly random questions
+        on_answer: called with every AnswerResult as soon as it is graded, or None
+        telemetry: records how long answering and drawing take (a Quiz_Telemetry.QuizTelemetry), or None to not record
+        question_shown_at: when (in time.perf_counter_ns nanoseconds) the current question was drawn, if telemetry is on
+        blitz_time_limit: in blitz mode, how many seconds the whole quiz may take; None for the normal quiz
+            (blitz answers are submitted with Enter, the next question follows at once and fast answers earn a speed bonus)
+        number_of_choices: how many buttons each multiple-choice question offers, or None to type the answer
+        question_bank: the Question_Bank.QuestionBank version the quiz is taken from, or None for the module exports
+        random_generator: picks the questions and the multiple-choice options (seeded when the quiz is recorded), or None for the random module
     """
-    def __init__(self, root, number_of_questions: int):
+    #how often (in milliseconds) the blitz countdown is redrawn
+    COUNTDOWN_INTERVAL = 100
+
+    def __init__(self, root, number_of_questions: int, on_finished, delay: int = DEFAULT_DELAY, scheduler = None, on_answer = None, telemetry = None,
+            blitz_time_limit: float | None = None, number_of_choices: int | None = None, question_bank = None, random_generator = None):
         """initializes the quiz"""
         #reference the GUI window
-        self.root = root
-
-        #track if the button in the GUI has been pressed
-        self.button_pressed = tk.BooleanVar(self.root)
-        self.button_pressed.set("False")
+        super().__init__(root)
+        self.on_finished = on_finished
+        self.delay = delay
+        self.on_answer = on_answer
+        self.telemetry = telemetry
+        self.question_shown_at = None
+        self.blitz_time_limit = blitz_time_limit
+        self.countdown_after_id = None
+        self.number_of_choices = number_of_choices
 
         #take in the number of questions the user wanted from SetupScreen
         self.number_of_questions = number_of_questions
 
-        #generate the number of random questions required
-        self.list_of_random_questions, self.maximum_points = self.generate_random_questions(self.number_of_questions)
+        #the session picks the questions and does all of the grading; this screen only displays it
+        speed_bonus_window = Quiz_Session.DEFAULT_SPEED_BONUS_WINDOW if blitz_time_limit is not None else None
+        self.session = Quiz_Session.QuizSession(self.number_of_questions, random_generator = random_generator, scheduler = scheduler,
+            speed_bonus_window = speed_bonus_window, number_of_choices = number_of_choices, question_bank = question_bank)
+        self.list_of_random_questions = self.session.list_of_random_questions
+        self.maximum_points = self.session.maximum_points
+
+        #set number_correct and points to 0
+        self.number_correct, self.points_earned = self.session.score()
 
-        #conduct the quiz, returning the number of questions correct and total points earned
-        self.number_correct, self.points_earned = self.US_State_Capitals_Quiz_GUI(self.list_of_random_questions)
+        #build the widgets once; every question only changes their text and state
+        self.create_quiz_widgets()
+        self.display_quiz_widgets()
+        self.show()
 
+        #conduct the quiz; each answer is handled by track_button_press (or track_choice_press for multiple choice)
+        self.show_next_question()
 
-    def US_State_Capitals_Quiz_GUI(self, list_of_random_questions: list[Questions.Question]) -> tuple[int, int]:
-        #set number_correct and points to 0
-        self.number_correct = 0
-        self.points_earned = 0
-        question_number = 1
-
-        #begin iterating through each question
-        for question in list_of_random_questions:
-            self.create_quiz_widgets()
-
-            #input the correct question information into the widgets
-            question_text = question.create_question_text(question_number)
-            population_rank_and_weight_text = question.create_population_rank_and_weight_text()
-            self.display_question_info(question_text, population_rank_and_weight_text)
-
-            self.display_quiz_widgets()
-
-            #wait for the button to be pressed
-            self.root.wait_variable(self.button_pressed)
-            self.button_pressed.set(False)
-            
-            #once the button is pressed, pull the text in the entry box
-            user_answer = self.user_entry.get()
-
-            #evaluate the user's answer and update number correct and points
-            if user_answer == question.capital:
-                correct = True
-                self.number_correct += 1
-                self.points_earned += question.weight
-            else:
-                correct = False
+        #the countdown is measured against a fixed deadline, so late after callbacks do not add time
+        if self.blitz_time_limit is not None:
+            self.countdown_deadline = time.perf_counter() + self.blitz_time_limit
+            self.update_countdown()
 
-            #display ongoing accuracy and points
-            self.display_number_correct_and_points(question, correct, user_answer, self.number_correct, self.points_earned)
 
-            #increase the question number
-            question_number += 1
+    def show_next_question(self):
+        """displays the next question, or hands over to the final screen once the quiz is over"""
+        if self.telemetry is not None:
+            requested_at = time.perf_counter_ns()
 
-            #wait 3 seconds for the next question, updating the GUI before the sleep command so that it shows up
-            self.wait_label.configure(text = "Please wait 3 seconds...")
-            self.root.update()
-            time.sleep(3)
+        question = self.session.next_question()
+        if question is None:
+            self.finish_quiz()
+            return
+
+        #input the correct question information into the widgets
+        question_text = question.create_question_text(self.session.question_number)
+        population_rank_and_weight_text = question.create_population_rank_and_weight_text()
+        self.display_question_info(question_text, population_rank_and_weight_text)
 
-            #remove all of the widgets on the screen so that they can be built again in the next loop
-            self.destroy_quiz_widgets()
+        #tkinter redraws the changed widgets in idle callbacks queued before this one, so this runs once they are drawn
+        if self.telemetry is not None:
+            self.root.after_idle(self.record_question_shown, requested_at)
 
-        return self.number_correct, self.points_earned
+
+    def record_question_shown(self, requested_at: int):
+        """records how long the question took to draw and starts timing the user's answer
+
+        Arguments:
+            requested_at: when (in time.perf_counter_ns nanoseconds) the question was asked for
+        """
+        self.question_shown_at = time.perf_counter_ns()
+        self.telemetry.record("question_render", self.question_shown_at - requested_at)
+
+
+    def finish_quiz(self):
+        """stops the countdown and hands over to the final screen"""
+        if self.countdown_after_id is not None:
+            self.root.after_cancel(self.countdown_after_id)
+            self.countdown_after_id = None
+        self.set_answer_buttons_state(tk.DISABLED)
+        self.hide()
+        self.on_finished(self)
+
+
+    def update_countdown(self):
+        """shows the time left in a blitz quiz, ending the quiz once it runs out"""
+        time_left = self.countdown_deadline - time.perf_counter()
+        if time_left <= 0:
+            self.countdown_after_id = None
+            self.finish_quiz()
+            return
+
+        self.countdown_label.configure(text = f"Time left: {time_left:.1f} s")
+        self.countdown_after_id = self.root.after(min(self.COUNTDOWN_INTERVAL, math.ceil(time_left * 1000)), self.update_countdown)
+
+
+    def submit_with_enter(self, event):
+        """accessed by the Enter key in blitz mode; presses the button, so nothing is submitted while it is disabled"""
+        self.check_answer_button.invoke()
+        return "break"
+
+
+    def track_button_press(self):
+        """accessed by the Check Answer button; submits the text in the entry box"""
+        self.submit_answer(self.user_entry.get())
+
+
+    def track_choice_press(self, position: int):
+        """accessed by the multiple-choice buttons; submits the chosen capital
+
+        Arguments:
+            position: which of the current choices was pressed
+        """
+        self.submit_answer(self.session.current_choices[position])
+
+
+    def set_answer_buttons_state(self, state: str):
+        """enables or disables every button that submits an answer
+
+        Arguments:
+            state: tk.NORMAL or tk.DISABLED
+        """
+        self.check_answer_button.configure(state = state)
+        for choice_button in self.choice_buttons:
+            choice_button.configure(state = state)
+
+
+    def submit_answer(self, user_answer: str):
+        """grades an answer, shows the outcome and schedules the next question (or shows it at once in blitz mode)
+
+        Arguments:
+            user_answer: what the user typed or chose
+        """
+        if self.telemetry is not None:
+            submitted_at = time.perf_counter_ns()
+            if self.question_shown_at is not None:
+                self.telemetry.record("answer", submitted_at - self.question_shown_at)
+
+        #a chosen capital is graded exactly like a typed one
+        answer_result = self.session.submit(user_answer)
+        self.number_correct, self.points_earned = self.session.score()
+        if self.on_answer is not None:
+            self.on_answer(answer_result)
+
+        #blitz mode moves straight on, and the feedback stays up while the next question is answered
+        #(both are drawn in the same redraw, so the next question appears within a frame of pressing Enter)
+        if self.blitz_time_limit is not None:
+            self.show_next_question()
+            self.display_number_correct_and_points(answer_result, self.number_correct, self.points_earned)
+        else:
+            #display ongoing accuracy and points
+            self.display_number_correct_and_points(answer_result, self.number_correct, self.points_earned)
+
+            #wait for the next question without blocking the event loop, so the window keeps repainting and responding
+            self.wait_label.configure(text = create_wait_text(self.delay, ""))
+            self.set_answer_buttons_state(tk.DISABLED)
+            self.root.after(self.delay, self.show_next_question)
+
+        if self.telemetry is not None:
+            self.root.after_idle(self.telemetry.record_since, "feedback_render", submitted_at)
 
 
     def generate_random_questions(self, number_of_questions: int) -> tuple[list[Questions.Question], int]:
@@ -207,13 +407,11 @@ class QuizScreen:
             list_of_random_questions: the list of questions that the quiz will run through
             maximum_points: the maximum number of points that can be earned if all questions are answered correctly
         """
-        list_of_random_questions = random.sample(Questions.list_of_questions, number_of_questions)
-        maximum_points = sum([question.weight for question in list_of_random_questions])
-        return list_of_random_questions, maximum_points
+        return Quiz_Session.generate_random_questions(number_of_questions)
 
 
     def display_question_info(self, question_text: str, population_rank_and_weight_text: str):
-        """shows the appropriate question information on the quiz screen
+        """shows the appropriate question information on the quiz screen, clearing everything left over from the last question
 
         Arguments:
             question_text: the text displaying the actual question
@@ -221,91 +419,85 @@ class QuizScreen:
         """
         self.question_label.configure(text = question_text)
         self.population_rank_and_weight_label.configure(text = population_rank_and_weight_text)
+        self.user_entry.delete(0, tk.END)
+        self.message_label.configure(text = "")
+        self.number_correct_label.configure(text = "")
+        self.points_label.configure(text = "")
+        self.wait_label.configure(text = "")
+        self.set_answer_buttons_state(tk.NORMAL)
+
+        #a small dataset can have fewer choices than buttons; the spare buttons stay blank and disabled
+        if self.session.current_choices is not None:
+            for position, choice_button in enumerate(self.choice_buttons):
+                if position < len(self.session.current_choices):
+                    choice_button.configure(text = self.session.current_choices[position])
+                else:
+                    choice_button.configure(text = "", state = tk.DISABLED)
 
 
-    def display_number_correct_and_points(self, question: Questions.Question, correct: bool, user_answer: str, ongoing_accuracy: int, ongoing_points: int):
+    def display_number_correct_and_points(self, answer_result: Quiz_Session.AnswerResult, ongoing_accuracy: int, ongoing_points: int):
         """after a question is answered, show if they got it right or not (and if they were thinking of a different state) and the ongoing accuracy and points
         
         Arguments:
-            question: the Question instance
-            correct: if the user got the answer correct or not
-            user_answer: the user's answer to the question
+            answer_result: how the session graded the answer
             ongoing_accuracy: the number of questions the user has answered so far
             ongoing_points: the number of points the user has earned so far
         """
-        #if they got the question right, congratulate them
-        if correct:
-            self.message_label.configure(text = "Correct!")
-
-            #display ongoing accuracy and points
-            self.number_correct_label.configure(text = f"Number Correct: {ongoing_accuracy}/{self.number_of_questions}")
-            self.points_label.configure(text = f"Points Earned: {ongoing_points}/{self.maximum_points}")
-            return
+        #display question outcome, teaching the correct capital (and the state they were thinking of) if they got it wrong
+        #(in blitz mode the next question is already up, so the feedback names the state it is about)
+        feedback_text = answer_result.create_feedback_text()
+        if self.blitz_time_limit is not None:
+            feedback_text = f"{answer_result.question.state}: {feedback_text}"
+        self.message_label.configure(text = feedback_text)
 
-        #if they got it wrong, check if their answer is a different state's capital
-        list_of_other_state_capitals = [i for i in States_and_State_Capitals_Reader.list_of_state_capitals if i != question.capital]
-        if user_answer in list_of_other_state_capitals:
-            #if it is a different state capital, tell them what the capital is and teach say what state they were thinking of
-            self.message_label.configure(text = f"Incorrect. The answer is {question.capital}. {user_answer} is actually the capital of {States_and_State_Capitals_Reader.dictionary_of_states[user_answer]}.")
-
-            #display ongoing accuracy and points
-            self.number_correct_label.configure(text = f"Number Correct: {ongoing_accuracy}/{self.number_of_questions}")
-            self.points_label.configure(text = f"Points Earned: {ongoing_points}/{self.maximum_points}")
-            return
-        
-        #if they got it wrong and it is not a different capital, teach them the correct state
-        else:
-            #display question outcome and teach correct capital
-            self.message_label.configure(text = f"Incorrect. The answer is {question.capital}.")
-
-            #display ongoing accuracy and points
-            self.number_correct_label.configure(text = f"Number Correct: {ongoing_accuracy}/{self.number_of_questions}")
-            self.points_label.configure(text = f"Points Earned: {ongoing_points}/{self.maximum_points}")
-            return
+        #display ongoing accuracy and points
+        self.number_correct_label.configure(text = f"Number Correct: {ongoing_accuracy}/{self.number_of_questions}")
+        self.points_label.configure(text = f"Points Earned: {ongoing_points}/{self.maximum_points}")
 
         
     def create_quiz_widgets(self):
         """defines the widgets used for the quiz screen"""
-        self.question_label = tk.Label(self.root, text = "")
-        self.population_rank_and_weight_label = tk.Label(self.root, text = "")
-        self.user_entry = tk.Entry(self.root)
-        self.check_answer_button = tk.Button(self.root, text = "Check Answer", command = self.track_button_press)
-        self.message_label = tk.Label(self.root, text = "")
-        self.number_correct_label = tk.Label(self.root, text = "")
-        self.points_label = tk.Label(self.root, text = "")
-        self.wait_label = tk.Label(self.root, text = "")
+        self.question_label = tk.Label(self.frame, text = "")
+        self.population_rank_and_weight_label = tk.Label(self.frame, text = "")
+        self.user_entry = tk.Entry(self.frame)
+        self.check_answer_button = tk.Button(self.frame, text = "Check Answer", command = self.track_button_press)
+        self.message_label = tk.Label(self.frame, text = "")
+        self.number_correct_label = tk.Label(self.frame, text = "")
+        self.points_label = tk.Label(self.frame, text = "")
+        self.wait_label = tk.Label(self.frame, text = "")
+        self.countdown_label = tk.Label(self.frame, text = "")
+
+        #multiple choice replaces the entry box and Check Answer button with one button per choice
+        self.choices_frame = tk.Frame(self.frame)
+        self.choice_buttons = [tk.Button(self.choices_frame, text = "", command = functools.partial(self.track_choice_press, position))
+            for position in range(self.number_of_choices or 0)]
+
+        #blitz mode is played from the keyboard alone
+        if self.blitz_time_limit is not None:
+            self.user_entry.bind("<Return>", self.submit_with_enter)
 
 
     def display_quiz_widgets(self):
         """displays the widgets used for the quiz screen"""
         self.question_label.pack()
         self.population_rank_and_weight_label.pack()
-        self.user_entry.pack()
-        self.check_answer_button.pack()
+        if self.number_of_choices is not None:
+            self.choices_frame.pack()
+            for choice_button in self.choice_buttons:
+                choice_button.pack(side = tk.LEFT)
+        else:
+            self.user_entry.pack()
+            self.check_answer_button.pack()
         self.message_label.pack()
         self.number_correct_label.pack()
         self.points_label.pack()
         self.wait_label.pack()
-    
-
-    def destroy_quiz_widgets(self):
-        """removes all of the widgets used for the quiz screen"""
-        self.question_label.destroy()
-        self.population_rank_and_weight_label.destroy()
-        self.user_entry.destroy()
-        self.check_answer_button.destroy()
-        self.message_label.destroy()
-        self.number_correct_label.destroy()
-        self.points_label.destroy()
-        self.wait_label.destroy()
-
-
-    def track_button_press(self):
-        """accessed by buttons; sets the button_pressed attribute to True"""
-        self.button_pressed.set(True)
+        if self.blitz_time_limit is not None:
+            self.countdown_label.pack()
+            self.user_entry.focus_set()
 
 
-class FinalScreen:
+class FinalScreen(Screen):
     """the final screen where the user can see how they did
     
     Attributes:
@@ -318,7 +510,7 @@ class FinalScreen:
     def __init__(self, root, number_correct, number_of_questions, points_earned, maximum_points):
         "initializes the final screen"
         #reference the GUI window
-        self.root = root
+        super().__init__(root)
 
         #record accuracy and points
         self.number_correct = number_correct
@@ -334,14 +526,15 @@ class FinalScreen:
         """creates the final screen"""
         self.create_final_widgets()
         self.display_final_widgets()
+        self.show()
 
     
     def create_final_widgets(self):
         """defines the widgets used for the final screen"""
-        self.thank_you_message_label = tk.Label(self.root, text = "Thank you! You have completed the US State Capitals Quiz!")
-        self.number_correct_label = tk.Label(self.root, text = f"Total Number Correct: {self.number_correct}/{self.number_of_questions}")
-        self.points_earned_label = tk.Label(self.root, text = f"Total Points Earned: {self.points_earned}/{self.maximum_points}")
-        self.exit_button = tk.Button(self.root, text = "Exit", command = self.close_final_window)
+        self.thank_you_message_label = tk.Label(self.frame, text = "Thank you! You have completed the US State Capitals Quiz!")
+        self.number_correct_label = tk.Label(self.frame, text = f"Total Number Correct: {self.number_correct}/{self.number_of_questions}")
+        self.points_earned_label = tk.Label(self.frame, text = f"Total Points Earned: {self.points_earned}/{self.maximum_points}")
+        self.exit_button = tk.Button(self.frame, text = "Exit", command = self.close_final_window)
 
 
     def display_final_widgets(self):
@@ -357,31 +550,248 @@ class FinalScreen:
         self.root.destroy()
 
 
-if __name__ == "__main__":
-    #create GUI window and rename it
-    root = tk.Tk()
-    root.title("US State Capitals Quiz GUI")
-    
-    #resize and center the screen (https://www.pythontutorial.net/tkinter/tkinter-window/ for explanation)
-    window_width = 600
-    window_height = 200
+#the question bank that is reloaded when the .csv file or the population ranks change, once it has been built
+reloadable_question_bank = None
 
-    screen_width = root.winfo_screenwidth()
-    screen_height = root.winfo_screenheight()
 
-    centerpoint_x = int(screen_width / 2 - window_width / 2)
-    centerpoint_y = int(screen_height / 2 - window_height / 2)
+def use_fetched_population_ranks(fetch_succeeded: bool):
+    """rebuilds the questions with the fetched population ranks; called from the background fetch thread
 
-    root.geometry(f'{window_width}x{window_height}+{centerpoint_x}+{centerpoint_y}')
+    Arguments:
+        fetch_succeeded: if the fetched ranks replaced the backup dictionary
+    """
+    if fetch_succeeded:
+        #once the question bank is built, only the states whose rank changed get new questions
+        if reloadable_question_bank is not None:
+            reloadable_question_bank.reload()
+        else:
+            Questions.update_population_ranks(Population_Rank_Web_Scraper.dictionary_of_population_ranks)
 
-    #ask for the number of questions
-    setup = SetupScreen(root)
+
+def start_quiz_flow(root, delay: int = DEFAULT_DELAY, adaptive_user: str | None = None, results_store: "Results_Store.ResultsStore | None" = None,
+        telemetry: "Quiz_Telemetry.QuizTelemetry | None" = None, blitz_time_limit: float | None = None, number_of_choices: int | None = None,
+        question_bank: "Question_Bank.ReloadableQuestionBank | None" = None, session_recorder = None):
+    """chains the three stages together, each one starting when the previous one calls back
+
+    Arguments:
+        root: the GUI window
+        delay: the pause (in milliseconds) after an answer or an invalid input
+        adaptive_user: whose saved schedule picks the questions, or None for uniformly random questions
+        results_store: where every answer and the finished session are saved, or None to not save them
+        telemetry: records how long answering and drawing take, or None to not record
+        blitz_time_limit: how many seconds a blitz quiz may take, or None for the normal quiz
+        number_of_choices: how many options each multiple-choice question has, or None to type the answers
+        question_bank: every quiz is taken from the version that is current when it starts, or from the module exports if None
+        session_recorder: logs every quiz so it can be replayed (a Session_Replay.SessionRecorder), or None to not log them
+    """
+    #the session key only names the quiz's rows in the results store
+    session_key = None
+    if results_store is not None:
+        import uuid
+        session_key = uuid.uuid4().hex
+    user_id = adaptive_user or ""
+
+    user_schedule = None
+    if adaptive_user is not None:
+        import Question_Scheduler
+        profile_file_name = Question_Scheduler.create_profile_file_name(adaptive_user)
+        user_schedule = Question_Scheduler.load_user_schedule(profile_file_name)
+
+    #the quiz being logged, if quizzes are recorded
+    session_recording = None
+
+    #display results with information from the quiz, saving what the user got wrong for next time
+    def show_final_screen(quiz):
+        nonlocal session_recording
+        if session_recording is not None:
+            session_recorder.finish_session(session_recording)
+            session_recording = None
+        if user_schedule is not None:
+            Question_Scheduler.save_user_schedule(user_schedule, profile_file_name)
+        if results_store is not None:
+            results_store.record_session(session_key, user_id, quiz.session)
+        FinalScreen(root, quiz.number_correct, quiz.number_of_questions, quiz.points_earned, quiz.maximum_points)
+
+    #the results store only queues the answer; its own thread writes it to disk
+    def save_answer(answer_result):
+        if results_store is not None:
+            results_store.record_answer(session_key, user_id, answer_result)
+        if session_recording is not None:
+            session_recording.record_answer(answer_result)
 
     #conduct the quiz
-    quiz = QuizScreen(root, setup.number_of_questions)
+    def start_quiz(number_of_questions):
+        nonlocal session_recording
+        current_question_bank = question_bank.current if question_bank is not None else None
+        list_of_questions = current_question_bank.list_of_questions if current_question_bank is not None else Questions.list_of_questions
+
+        #a reload may have shrunk the bank since the number was checked; SetupScreen shows this and asks again
+        if number_of_questions > len(list_of_questions):
+            raise ValueError(f"There are only {len(list_of_questions)} questions to choose from!")
+
+        #a recorded quiz gets its own seed, so the seed alone picks its questions again
+        seed, random_generator = session_recorder.create_random_generator() if session_recorder is not None else (None, None)
+        quiz = QuizScreen(root, number_of_questions, on_finished = show_final_screen, delay = delay, scheduler = user_schedule,
+            on_answer = save_answer if results_store is not None or session_recorder is not None else None, telemetry = telemetry,
+            blitz_time_limit = blitz_time_limit, number_of_choices = number_of_choices, question_bank = current_question_bank,
+            random_generator = random_generator)
+        if session_recorder is not None:
+            session_recording = session_recorder.start_session(quiz.session, seed, list_of_questions, scheduled = user_schedule is not None)
 
-    #display results with information from previous step
-    final_screen = FinalScreen(root, quiz.number_correct, quiz.number_of_questions, quiz.points_earned, quiz.maximum_points)
+    #ask for the number of questions
+    SetupScreen(root, on_finished = start_quiz, delay = delay, question_bank = question_bank)
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description = "A U.S. State Capitals Quiz built with tkinter.")
+    argument_parser.add_argument("--delay", type = float, default = DEFAULT_DELAY / 1000, help = "seconds to pause after each answer (0 for a fast practice mode)")
+    argument_parser.add_argument("--adaptive-user", help = "ask more often about the states this user got wrong before (their progress is saved)")
+    argument_parser.add_argument("--report-event-loop-lag", action = "store_true", help = "print event-loop lag statistics when the window closes")
+    argument_parser.add_argument("--results-database", nargs = "?", const = "", metavar = "PATH",
+        help = "save every answer and finished quiz to this SQLite file (the default results database if no file is given)")
+    argument_parser.add_argument("--telemetry-json", help = "write answer, drawing, event-loop lag and rank fetch timings here as JSON when the window closes")
+    argument_parser.add_argument("--telemetry-prometheus", help = "write the same timings here as Prometheus text when the window closes")
+    argument_parser.add_argument("--blitz", type = float, nargs = "?", const = DEFAULT_BLITZ_TIME_LIMIT, help = f"play a keyboard-only quiz against the clock (default {DEFAULT_BLITZ_TIME_LIMIT} seconds), with bonus points for fast answers")
+    argument_parser.add_argument("--multiple-choice", type = int, nargs = "?", const = DEFAULT_CHOICES_PLACEHOLDER, metavar = "N", help = "pick each answer from N buttons (Distractor_Index's default if N is not given) instead of typing it")
+    argument_parser.add_argument("--rank-sources", help = "a JSON file of population rank sources to fetch from at once (see Rank_Source_Fetcher)")
+    argument_parser.add_argument("--rank-strategy", choices = ("first", "quorum"), default = "first", help = "with --rank-sources, take the first valid ranking or wait for a majority to agree")
+    argument_parser.add_argument("--reload-interval", type = float, help = "seconds between checks of the .csv file and the ranks for changes (0 to never reload; Question_Bank's default if not given)")
+    argument_parser.add_argument("--record-sessions", metavar = "PATH", help = "log every quiz's seed, questions and timed answers here, for Session_Replay")
+    argument_parser.add_argument("--profile-startup", nargs = "?", const = "text", choices = ("text", "json"), help = "print how long each startup phase took (as text or json) and exit once the window is painted")
+    arguments = argument_parser.parse_args()
+
+    #every phase is timed; the timings are only printed with --profile-startup
+    startup_profiler = Startup_Profiler.StartupProfiler(STARTUP_STARTED_AT)
+    startup_profiler.record("imports", STARTUP_STARTED_AT, IMPORTS_FINISHED_AT)
+
+    #the defaults of optional features come from their own modules, which are only imported if the feature is used
+    if arguments.multiple_choice is DEFAULT_CHOICES_PLACEHOLDER:
+        import Distractor_Index
+        arguments.multiple_choice = Distractor_Index.DEFAULT_NUMBER_OF_CHOICES
+
+    #reloading is on unless the interval is 0; --profile-startup times a launch that never gets to reload
+    reload_question_bank = (arguments.reload_interval is None or arguments.reload_interval > 0) and not arguments.profile_startup
+
+    #telemetry is only recorded if it will be written somewhere
+    telemetry = None
+    if arguments.telemetry_json or arguments.telemetry_prometheus:
+        import Quiz_Telemetry
+        telemetry = Quiz_Telemetry.QuizTelemetry()
+        Population_Rank_Web_Scraper.timing_hook = telemetry.record
+
+    #the states and capitals come from the question bank snapshot unless the .csv file changed since it was built
+    with startup_profiler.phase("CSV load"):
+        question_bank_snapshot = Question_Bank_Snapshot.load_state_table()
+
+    #several rank sources are only used when configured; the fetcher is imported only then
+    if arguments.rank_sources:
+        import Rank_Source_Fetcher
+        Population_Rank_Web_Scraper.rank_sources = Rank_Source_Fetcher.load_rank_sources(arguments.rank_sources)
+        Population_Rank_Web_Scraper.rank_source_strategy = arguments.rank_strategy
+
+    #fetch the population ranks in the background so the window opens right away with the backup dictionary
+    #(only reading the cache happens here; a download runs on the worker thread)
+    with startup_profiler.phase("rank fetch"):
+        Population_Rank_Web_Scraper.start_background_fetch(on_complete = use_fetched_population_ranks)
+
+    #the questions come from the snapshot too, unless the ranks changed (then they are rebuilt and saved for next time)
+    with startup_profiler.phase("question build"):
+        #a fetch can finish on the worker thread while this runs and swap in its own questions first; the fetched ranks are
+        #published before that swap, so building again until the ranks used are still the current ones never leaves backup weights
+        while True:
+            population_ranks = Population_Rank_Web_Scraper.dictionary_of_population_ranks
+            Questions.replace_list_of_questions(Question_Bank_Snapshot.load_question_bank(population_ranks, question_bank_snapshot))
+            if Population_Rank_Web_Scraper.dictionary_of_population_ranks is population_ranks:
+                break
+
+        #what was just loaded becomes the first version; a fetch that finishes from here on is picked up by a reload
+        #(without reloading, a finished fetch updates the module exports instead)
+        if reload_question_bank:
+            import Question_Bank
+            if arguments.reload_interval is None:
+                arguments.reload_interval = Question_Bank.DEFAULT_POLL_INTERVAL
+            reloadable_question_bank = Question_Bank.ReloadableQuestionBank(Question_Bank.capture_question_bank())
+            reloadable_question_bank.reload()
+
+        #the distractors are worked out once here, so no question has to search for them (reloads only update them)
+        if arguments.multiple_choice is not None:
+            if reloadable_question_bank is not None:
+                reloadable_question_bank.current.distractor_index
+            else:
+                import Distractor_Index
+                Distractor_Index.get_distractor_index(Questions.list_of_questions)
 
-    #make GUI work
-    root.mainloop()
\ No newline at end of file
+    with startup_profiler.phase("window"):
+        #create GUI window and rename it
+        root = tk.Tk()
+        root.title("US State Capitals Quiz GUI")
+        
+        #resize and center the screen (https://www.pythontutorial.net/tkinter/tkinter-window/ for explanation)
+        window_width = 600
+        window_height = 200
+
+        screen_width = root.winfo_screenwidth()
+        screen_height = root.winfo_screenheight()
+
+        centerpoint_x = int(screen_width / 2 - window_width / 2)
+        centerpoint_y = int(screen_height / 2 - window_height / 2)
+
+        root.geometry(f'{window_width}x{window_height}+{centerpoint_x}+{centerpoint_y}')
+
+    #measure how responsive the window stays
+    event_loop_lag_monitor = None
+    if arguments.report_event_loop_lag or telemetry is not None:
+        import Event_Loop_Monitor
+        on_lag = (lambda lag: telemetry.record("event_loop_lag", round(lag * 1e9))) if telemetry is not None else None
+        event_loop_lag_monitor = Event_Loop_Monitor.EventLoopLagMonitor(root, on_lag = on_lag)
+        event_loop_lag_monitor.start()
+
+    #watch the .csv file and the ranks for changes while the window is open
+    if reloadable_question_bank is not None:
+        reloadable_question_bank.start_watching(arguments.reload_interval)
+
+    #keep every answer and finished quiz only when asked to (a store that cannot be opened only means results are not saved)
+    results_store = None
+    if arguments.results_database is not None and not arguments.profile_startup:
+        with startup_profiler.phase("results store"):
+            import sqlite3
+            import Results_Store
+            try:
+                results_store = Results_Store.ResultsStore(arguments.results_database or Results_Store.DEFAULT_DATABASE_FILE_NAME)
+            except (OSError, sqlite3.Error):
+                results_store = None
+
+    #the replay harness is imported only when quizzes are recorded
+    session_recorder = None
+    if arguments.record_sessions and not arguments.profile_startup:
+        import Session_Replay
+        session_recorder = Session_Replay.SessionRecorder(arguments.record_sessions)
+
+    #the first paint is done once the setup screen has been drawn
+    with startup_profiler.phase("first paint"):
+        start_quiz_flow(root, delay = max(0, round(arguments.delay * 1000)), adaptive_user = arguments.adaptive_user, results_store = results_store,
+            telemetry = telemetry, blitz_time_limit = arguments.blitz, number_of_choices = arguments.multiple_choice, question_bank = reloadable_question_bank,
+            session_recorder = session_recorder)
+        root.update()
+
+    if arguments.profile_startup:
+        print(startup_profiler.create_report_text(arguments.profile_startup))
+        root.destroy()
+    else:
+        #make GUI work
+        root.mainloop()
+
+    if results_store is not None:
+        results_store.close()
+
+    if session_recorder is not None:
+        session_recorder.close()
+
+    if event_loop_lag_monitor is not None and arguments.report_event_loop_lag:
+        print(event_loop_lag_monitor.create_report_text())
+
+    if telemetry is not None:
+        if arguments.telemetry_json:
+            telemetry.write_json(arguments.telemetry_json)
+        if arguments.telemetry_prometheus:
+            telemetry.write_prometheus(arguments.telemetry_prometheus)